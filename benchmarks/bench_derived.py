@@ -0,0 +1,61 @@
+"""
+派生指标性能测试
+
+生成 N 个地点一年的逐小时数据 (8760 小时)，分别用 numpy 和 array
+实现计算全部派生指标并输出耗时。
+
+用法:
+    python benchmarks/bench_derived.py --locations 300
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from derived import compute_derived, np  # noqa: E402
+
+HOURS_PER_YEAR = 8760
+
+
+def make_columns(locations: int, seed: int = 0) -> dict:
+    """生成随机的温度、湿度和风速列（所有地点首尾相接）"""
+    rng = random.Random(seed)
+    size = locations * HOURS_PER_YEAR
+    return {
+        "temperature": [rng.uniform(-30, 45) for _ in range(size)],
+        "humidity": [rng.uniform(5, 100) for _ in range(size)],
+        "wind_speed": [rng.uniform(0, 80) for _ in range(size)],
+    }
+
+
+def run(columns: dict, use_numpy: bool) -> float:
+    """计算一次全部派生指标，返回耗时（秒）"""
+    if use_numpy:
+        columns = {k: np.asarray(v, dtype=np.float64) for k, v in columns.items()}
+    started = time.perf_counter()
+    compute_derived(columns, use_numpy=use_numpy)
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="派生指标性能测试")
+    parser.add_argument("--locations", type=int, default=300, help="地点数，默认 300")
+    args = parser.parse_args()
+
+    columns = make_columns(args.locations)
+    size = len(columns["temperature"])
+    print(f"{args.locations} 个地点 x {HOURS_PER_YEAR} 小时 = {size} 条")
+
+    backends = [False] + ([True] if np is not None else [])
+    for use_numpy in backends:
+        elapsed = run(columns, use_numpy)
+        name = "numpy" if use_numpy else "array"
+        print(f"  {name:6s} {elapsed:8.3f} 秒  {size / elapsed / 1e6:8.2f} M 条/秒")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
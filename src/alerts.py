@@ -0,0 +1,319 @@
+"""
+阈值告警模块
+
+解析简单的告警规则语言，例如::
+
+    frost: min_temp < 0
+    storm: weather_code in thunderstorm
+    heat: max_temp >= 35 and not weather_code in [61, 63, 65]
+
+每条规则只解析一次，由校验过的词法单元生成 Python 源码并编译成
+一个批量求值函数，对所有地点的全部逐日预报记录一次性筛选，
+求值时没有逐条记录的解释开销。
+"""
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from weather import parse_weather_code
+
+# 规则中可以使用的字段（get_forecast 返回的记录字段）
+FIELDS = ("max_temp", "min_temp", "weather_code")
+
+# 可在 in 右侧使用的天气代码类别
+CATEGORIES: Dict[str, frozenset] = {
+    "clear": frozenset([0, 1]),
+    "fog": frozenset([45, 48]),
+    "drizzle": frozenset([51, 53, 55, 56, 57]),
+    "rain": frozenset([61, 63, 65, 66, 67, 80, 81, 82]),
+    "freezing": frozenset([56, 57, 66, 67]),
+    "snow": frozenset([71, 73, 75, 77, 85, 86]),
+    "thunderstorm": frozenset([95, 96, 99]),
+}
+
+_OPERATORS = {"<": "<", "<=": "<=", ">": ">", ">=": ">=", "=": "==", "==": "==", "!=": "!="}
+
+_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<number>-?\d+(?:\.\d+)?)"
+    r"|(?P<name>[A-Za-z_]\w*)"
+    r"|(?P<op><=|>=|==|!=|<|>|=)"
+    r"|(?P<punct>\.\.|[()\[\],]))"
+)
+
+_RULE_NAME_RE = re.compile(r"^\s*([\w-]+)\s*:(.*)$")
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    """将规则表达式切分为 (类型, 文本) 词法单元"""
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"规则语法错误: 无法识别 '{text[pos:].strip()}'")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+class _Compiler:
+    """递归下降解析器，输出 Python 表达式源码"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.constants: Dict[str, frozenset] = {}
+        # 已解析的比较中读取的字段（按出现顺序，可重复）
+        self.fields: List[str] = []
+
+    def peek(self) -> Optional[Tuple[str, str]]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def next(self, expected: Optional[str] = None) -> Tuple[str, str]:
+        token = self.peek()
+        if token is None:
+            raise ValueError(f"规则语法错误: '{self.text}' 不完整")
+        if expected is not None and token[1] != expected:
+            raise ValueError(
+                f"规则语法错误: 期望 '{expected}'，实际为 '{token[1]}'"
+            )
+        self.pos += 1
+        return token
+
+    def accept(self, word: str) -> bool:
+        token = self.peek()
+        if token is not None and token[1] == word:
+            self.pos += 1
+            return True
+        return False
+
+    def compile(self) -> str:
+        source = self.expr()
+        if self.peek() is not None:
+            raise ValueError(f"规则语法错误: 多余的 '{self.peek()[1]}'")
+        return source
+
+    def expr(self) -> str:
+        parts = [self.and_expr()]
+        while self.accept("or"):
+            parts.append(self.and_expr())
+        return parts[0] if len(parts) == 1 else "(" + " or ".join(parts) + ")"
+
+    def and_expr(self) -> str:
+        parts = [self.not_expr()]
+        while self.accept("and"):
+            parts.append(self.not_expr())
+        return parts[0] if len(parts) == 1 else "(" + " and ".join(parts) + ")"
+
+    def not_expr(self) -> str:
+        if self.accept("not"):
+            # 取反会把比较中的缺失值判断也取反，需要在外层再次排除缺失值
+            first = len(self.fields)
+            source = self.not_expr()
+            guards = "".join(
+                f"r[{field!r}] is not None and "
+                for field in dict.fromkeys(self.fields[first:])
+            )
+            return f"({guards}not {source})"
+        if self.accept("("):
+            source = self.expr()
+            self.next(")")
+            return source
+        return self.comparison()
+
+    def number(self) -> float:
+        kind, text = self.next()
+        if kind != "number":
+            raise ValueError(f"规则语法错误: 期望数字，实际为 '{text}'")
+        return float(text)
+
+    def comparison(self) -> str:
+        kind, field = self.next()
+        if kind != "name" or field not in FIELDS:
+            raise ValueError(
+                f"规则语法错误: 未知字段 '{field}'，可用字段: {list(FIELDS)}"
+            )
+        value = f"r[{field!r}]"
+        self.fields.append(field)
+
+        negate = self.accept("not")
+        if negate or self.accept("in"):
+            if negate:
+                self.next("in")
+            test = self.membership(value)
+            if negate:
+                test = f"not {test}"
+            return f"({value} is not None and {test})"
+
+        kind, op = self.next()
+        if kind != "op":
+            raise ValueError(f"规则语法错误: 期望比较运算符，实际为 '{op}'")
+        return f"({value} is not None and {value} {_OPERATORS[op]} {self.number()!r})"
+
+    def membership(self, value: str) -> str:
+        token = self.peek()
+        if token is not None and token[0] == "name":
+            self.pos += 1
+            if token[1] not in CATEGORIES:
+                raise ValueError(
+                    f"规则语法错误: 未知天气类别 '{token[1]}'，"
+                    f"可用类别: {list(CATEGORIES)}"
+                )
+            return f"{value} in {self.constant(CATEGORIES[token[1]])}"
+
+        if self.accept("["):
+            values = [self.number()]
+            while self.accept(","):
+                values.append(self.number())
+            self.next("]")
+            return f"{value} in {self.constant(frozenset(values))}"
+
+        low = self.number()
+        self.next("..")
+        high = self.number()
+        return f"{low!r} <= {value} <= {high!r}"
+
+    def constant(self, values: frozenset) -> str:
+        name = f"_set{len(self.constants)}"
+        self.constants[name] = values
+        return name
+
+
+class AlertRule:
+    """
+    编译后的告警规则
+
+    Attributes:
+        name: 规则名称
+        source: 规则表达式原文
+    """
+
+    def __init__(self, name: str, source: str):
+        """
+        Args:
+            name: 规则名称
+            source: 规则表达式
+
+        Raises:
+            ValueError: 规则语法错误时抛出
+        """
+        self.name = name
+        self.source = source.strip()
+        compiler = _Compiler(self.source)
+        condition = compiler.compile()
+        code = (
+            "def _evaluate(records):\n"
+            f"    return [i for i, r in enumerate(records) if {condition}]\n"
+        )
+        namespace = {"__builtins__": {}, "enumerate": enumerate, **compiler.constants}
+        exec(compile(code, f"<alert {name}>", "exec"), namespace)
+        self._evaluate: Callable[[List[Dict]], List[int]] = namespace["_evaluate"]
+
+    def match(self, records: List[Dict]) -> List[int]:
+        """
+        对一批记录求值。
+
+        Args:
+            records: 预报记录列表
+
+        Returns:
+            满足规则的记录下标列表
+        """
+        return self._evaluate(records)
+
+    def __repr__(self) -> str:
+        return f"AlertRule({self.name!r}, {self.source!r})"
+
+
+def parse_rules(text: str) -> List[AlertRule]:
+    """
+    解析规则文本。
+
+    每行（或以分号分隔）一条规则，可以用 "名称:" 前缀命名，
+    # 开头的行为注释。
+
+    Args:
+        text: 规则文本
+
+    Returns:
+        编译后的规则列表
+
+    Raises:
+        ValueError: 规则语法错误时抛出
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]
+        for part in line.split(";"):
+            if not part.strip():
+                continue
+            match = _RULE_NAME_RE.match(part)
+            if match:
+                name, source = match.group(1), match.group(2)
+            else:
+                name, source = part.strip(), part
+            rules.append(AlertRule(name, source))
+    return rules
+
+
+def load_rules(path: Path) -> List[AlertRule]:
+    """
+    从规则文件加载规则。
+
+    Args:
+        path: 规则文件路径
+
+    Returns:
+        编译后的规则列表
+
+    Raises:
+        OSError: 文件读取失败时抛出
+        ValueError: 规则语法错误时抛出
+    """
+    return parse_rules(Path(path).read_text(encoding="utf-8"))
+
+
+def evaluate_alerts(
+    rules: List[AlertRule], forecasts_by_location: Dict[str, list]
+) -> List[Dict]:
+    """
+    对所有地点的预报批量求值。
+
+    所有地点的记录先展开成一个列表，每条规则对整个列表只求值一次。
+
+    Args:
+        rules: 编译后的规则列表
+        forecasts_by_location: 地点名 -> 预报列表（get_forecast 格式）
+
+    Returns:
+        命中的告警列表，按地点、日期和规则顺序排列，每项包含
+        location, rule, date, max_temp, min_temp, weather_code, weather
+    """
+    locations = []
+    records = []
+    for location, forecasts in forecasts_by_location.items():
+        locations.extend([location] * len(forecasts))
+        records.extend(forecasts)
+
+    hits = []
+    for rule_index, rule in enumerate(rules):
+        hits.extend((i, rule_index) for i in rule.match(records))
+    hits.sort()
+
+    alerts = []
+    for i, rule_index in hits:
+        record = records[i]
+        code = record.get("weather_code")
+        alerts.append({
+            "location": locations[i],
+            "rule": rules[rule_index].name,
+            "date": record.get("date"),
+            "max_temp": record.get("max_temp"),
+            "min_temp": record.get("min_temp"),
+            "weather_code": code,
+            "weather": parse_weather_code(code) if code is not None else None,
+        })
+    return alerts
@@ -0,0 +1,146 @@
+"""
+熔断器模块
+
+为每个上游接口维护 closed / open / half_open 三种状态。连续失败达到
+阈值后熔断器打开，在冷却期内直接快速失败；冷却期结束后只放行一个
+探测请求，成功则恢复，失败则重新打开。状态保存在 ~/.weather-cli/ 下
+并由文件锁保护，多个短生命周期的 cli.py 进程共享同一份状态。
+"""
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from storage import StateStore
+
+logger = logging.getLogger("weather-cli.breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamUnavailableError(ValueError):
+    """
+    上游服务不可用（熔断器处于打开状态）
+
+    继承 ValueError，原有只捕获 ValueError 的调用方仍然可以正常处理。
+    """
+
+    def __init__(self, endpoint: str, retry_in: float):
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+        super().__init__(
+            f"上游服务不可用: {endpoint} 已熔断，约 {retry_in:.0f} 秒后重试"
+        )
+
+
+class CircuitBreaker:
+    """
+    跨进程共享的熔断器
+
+    同一个状态文件中可以保存多个接口的熔断器，按 name 区分。
+    """
+
+    def __init__(
+        self,
+        state_file: Optional[Path],
+        name: str,
+        failure_threshold: int = 3,
+        cooldown: float = 60.0,
+        probe_timeout: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Args:
+            state_file: 状态文件路径，锁文件为同名 .lock 文件；
+                为 None 时状态只保存在内存中
+            name: 接口名称
+            failure_threshold: 触发熔断的连续失败次数
+            cooldown: 熔断后的冷却时间（秒）
+            probe_timeout: 探测请求的最长占用时间（秒），超时后允许新的探测
+            clock: 时间函数（便于测试）
+        """
+        self._store = StateStore(state_file)
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.probe_timeout = probe_timeout
+        self._clock = clock
+
+    def _update(self, change: Callable[[Dict, float], Dict]) -> Dict:
+        """在锁内读取、修改并写回本接口的状态"""
+        with self._store.transaction() as states:
+            state = states.get(self.name) or {"state": CLOSED, "failures": 0}
+            new_state = change(dict(state), self._clock())
+            if new_state != state:
+                states[self.name] = new_state
+            return new_state
+
+    def state(self) -> str:
+        """
+        获取当前状态。
+
+        Returns:
+            closed / open / half_open
+        """
+        states = self._store.read()
+        return (states.get(self.name) or {}).get("state", CLOSED)
+
+    def before_call(self) -> None:
+        """
+        请求前检查熔断器。
+
+        Raises:
+            UpstreamUnavailableError: 熔断器打开或探测请求进行中时抛出
+        """
+        blocked = {}
+
+        def change(state: Dict, now: float) -> Dict:
+            if state["state"] == OPEN:
+                reopen_at = state["opened_at"] + self.cooldown
+                if now < reopen_at:
+                    blocked["retry_in"] = reopen_at - now
+                    return state
+                logger.info(f"熔断器半开，发送探测请求: {self.name}")
+                return {**state, "state": HALF_OPEN, "probe_started": now}
+            if state["state"] == HALF_OPEN:
+                probe_deadline = state["probe_started"] + self.probe_timeout
+                if now < probe_deadline:
+                    blocked["retry_in"] = probe_deadline - now
+                    return state
+                return {**state, "probe_started": now}
+            return state
+
+        self._update(change)
+        if blocked:
+            raise UpstreamUnavailableError(self.name, blocked["retry_in"])
+
+    def record_success(self) -> None:
+        """记录一次成功请求，熔断器恢复为关闭状态"""
+        def change(state: Dict, now: float) -> Dict:
+            if state["state"] != CLOSED:
+                logger.info(f"熔断器恢复: {self.name}")
+            return {"state": CLOSED, "failures": 0}
+
+        self._update(change)
+
+    def record_failure(self) -> None:
+        """
+        记录一次失败请求，必要时打开熔断器。
+
+        熔断器已打开时，熔断前发出的请求陆续失败不会推迟冷却结束时间。
+        """
+        def change(state: Dict, now: float) -> Dict:
+            failures = state.get("failures", 0) + 1
+            if state["state"] == OPEN:
+                return {**state, "failures": failures}
+            if state["state"] == HALF_OPEN or failures >= self.failure_threshold:
+                logger.warning(
+                    f"熔断器打开: {self.name}，连续失败 {failures} 次，"
+                    f"冷却 {self.cooldown:.0f} 秒"
+                )
+                return {"state": OPEN, "failures": failures, "opened_at": now}
+            return {**state, "failures": failures}
+
+        self._update(change)
@@ -0,0 +1,232 @@
+"""
+本地天气缓存模块
+
+将坐标、当前天气和预报结果以 JSON 文件缓存在 ~/.weather-cli/cache/ 下，
+普通查询在缓存有效期内直接使用本地数据，由 warm 命令提前刷新。
+"""
+import hashlib
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import CONFIG_DIR, get_config
+from storage import atomic_write_json, read_json
+from weather import get_coordinates, get_forecast, get_weather
+
+logger = logging.getLogger("weather-cli.cache")
+
+# 缓存目录
+CACHE_DIR = CONFIG_DIR / "cache"
+
+# 会过期的缓存类别（坐标缓存永不过期，不参与清理）
+EXPIRING_KINDS = ("current", "forecast")
+
+# 超过 cache_ttl 的多少倍后删除缓存条目
+PRUNE_AGE_FACTOR = 4
+
+
+def _entry_path(kind: str, key: str) -> Path:
+    """
+    计算缓存条目的文件路径。
+
+    Args:
+        kind: 缓存类别（geocode / current / forecast）
+        key: 条目键
+
+    Returns:
+        缓存文件路径
+    """
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return CACHE_DIR / kind / f"{digest}.json"
+
+
+def location_key(lat: float, lon: float) -> str:
+    """将坐标转换为缓存键，保留 4 位小数"""
+    return f"{lat:.4f},{lon:.4f}"
+
+
+def read_cache_entry(kind: str, key: str) -> Optional[Dict[str, Any]]:
+    """
+    读取缓存条目，不检查是否过期。
+
+    Args:
+        kind: 缓存类别
+        key: 条目键
+
+    Returns:
+        {"fetched_at": 时间戳, "data": 数据}，不存在时返回 None
+    """
+    entry = read_json(_entry_path(kind, key))
+    if not isinstance(entry, dict) or entry.get("key") != key:
+        return None
+    return entry
+
+
+def read_cache(kind: str, key: str, max_age: Optional[float]) -> Optional[Any]:
+    """
+    读取未过期的缓存数据。
+
+    Args:
+        kind: 缓存类别
+        key: 条目键
+        max_age: 最长有效期（秒），None 表示永不过期
+
+    Returns:
+        缓存数据，不存在或已过期时返回 None
+    """
+    entry = read_cache_entry(kind, key)
+    if entry is None:
+        return None
+    if max_age is not None and time.time() - entry["fetched_at"] > max_age:
+        return None
+    return entry["data"]
+
+
+def write_cache(kind: str, key: str, data: Any) -> None:
+    """
+    原子地写入缓存条目。
+
+    Args:
+        kind: 缓存类别
+        key: 条目键
+        data: 可 JSON 序列化的数据
+    """
+    path = _entry_path(kind, key)
+    try:
+        atomic_write_json(
+            path, {"key": key, "fetched_at": time.time(), "data": data}
+        )
+    except OSError as e:
+        logger.warning(f"写入缓存失败 {path}: {e}")
+
+
+def prune_cache(max_age: float, now: Optional[float] = None) -> int:
+    """
+    删除写入时间早于 max_age 秒之前的当前天气和预报缓存条目。
+
+    Args:
+        max_age: 最长保留时间（秒）
+        now: 当前时间戳（便于测试）
+
+    Returns:
+        删除的条目数
+    """
+    if now is None:
+        now = time.time()
+    removed = 0
+    for kind in EXPIRING_KINDS:
+        directory = CACHE_DIR / kind
+        if not directory.is_dir():
+            continue
+        for path in directory.glob("*.json"):
+            entry = read_json(path)
+            fetched_at = entry.get("fetched_at") if isinstance(entry, dict) else None
+            if isinstance(fetched_at, (int, float)) and now - fetched_at <= max_age:
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except OSError as e:
+                logger.warning(f"删除缓存失败 {path}: {e}")
+    if removed:
+        logger.info(f"已清理 {removed} 个过期缓存条目")
+    return removed
+
+
+def _cached(
+    kind: str,
+    key: str,
+    max_age: Optional[float],
+    fetch: Callable[[], Any],
+    refresh: bool,
+) -> Any:
+    """读取缓存，未命中时调用 fetch 获取并写回缓存；max_age 为 0 时不读也不写"""
+    if not refresh and max_age != 0:
+        data = read_cache(kind, key, max_age)
+        if data is not None:
+            logger.debug(f"缓存命中: {kind} {key}")
+            return data
+    data = fetch()
+    if max_age != 0:
+        write_cache(kind, key, data)
+    return data
+
+
+def cached_coordinates(city: str, refresh: bool = False) -> Dict:
+    """
+    获取城市坐标，优先使用本地缓存（坐标不会过期）。
+
+    Args:
+        city: 城市名称
+        refresh: 为 True 时忽略缓存重新查询
+
+    Returns:
+        与 get_coordinates() 相同的坐标字典
+    """
+    return _cached(
+        "geocode", city.strip().lower(), None,
+        lambda: get_coordinates(city), refresh,
+    )
+
+
+def cached_weather(
+    lat: float,
+    lon: float,
+    ttl: Optional[int] = None,
+    refresh: bool = False,
+    variables: Optional[List[str]] = None,
+) -> Dict:
+    """
+    获取当前天气，缓存未过期时直接返回本地数据。
+
+    Args:
+        lat: 纬度
+        lon: 经度
+        ttl: 缓存有效期（秒），默认读取 cache_ttl 配置
+        refresh: 为 True 时忽略缓存重新查询
+        variables: 额外变量，参见 weather.get_weather()
+
+    Returns:
+        与 get_weather() 相同的天气字典
+    """
+    if ttl is None:
+        ttl = get_config("cache_ttl", 0)
+    if not variables:
+        return _cached(
+            "current", location_key(lat, lon), ttl,
+            lambda: get_weather(lat, lon), refresh,
+        )
+    key = location_key(lat, lon) + "|" + ",".join(sorted(variables))
+    return _cached(
+        "current", key, ttl,
+        lambda: get_weather(lat, lon, variables), refresh,
+    )
+
+
+def cached_forecast(
+    lat: float,
+    lon: float,
+    days: int = 3,
+    ttl: Optional[int] = None,
+    refresh: bool = False,
+) -> list:
+    """
+    获取天气预报，缓存未过期时直接返回本地数据。
+
+    Args:
+        lat: 纬度
+        lon: 经度
+        days: 预报天数
+        ttl: 缓存有效期（秒），默认读取 cache_ttl 配置
+        refresh: 为 True 时忽略缓存重新查询
+
+    Returns:
+        与 get_forecast() 相同的预报列表
+    """
+    if ttl is None:
+        ttl = get_config("cache_ttl", 0)
+    return _cached(
+        "forecast", f"{location_key(lat, lon)}/{days}", ttl,
+        lambda: get_forecast(lat, lon, days), refresh,
+    )
@@ -5,11 +5,15 @@ Weather CLI - 命令行天气查询工具
 """
 import argparse
 import sys
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 # 导入配置模块
 from config import (
     get_config,
+    get_watchlist,
     load_config,
     reset_config,
     set_config,
@@ -17,23 +21,59 @@ from config import (
 )
 
 # 导入日志模块
-from logger import setup_logger, LOG_FILE
+from logger import get_logger, setup_logger, LOG_FILE
 
 # 导入天气模块
 from weather import (
-    get_coordinates,
-    get_weather,
+    UpstreamUnavailableError,
     get_forecast,
+    get_hourly,
+    get_model_forecasts,
     parse_weather_code,
 )
 
+# 导入缓存与预热模块
+from cache import cached_coordinates, cached_forecast, cached_weather
+from warm import warm_watchlist
+
+# 导入历史数据导出模块
+from history import OUTPUT_FORMATS, export_history, read_city_file
+
+# 导入流式批量查询模块
+from pipeline import stream_weather
+
+# 导入本地观测记录模块
+from observations import parse_since, query_observations, record_observation
+
+# 导入告警模块
+from alerts import evaluate_alerts, load_rules, parse_rules
+
+# 导入统计与多模型对比模块
+from stats import forecast_stats, hourly_stats
+from compare import compare_models
+
+# 导入内存分析模块
+from memprofile import MemoryProfiler, profile_phase
+
 # 导入格式化模块
 from formatter import (
     format_text_current,
     format_text_forecast,
     format_json,
+    format_text_stats,
+    format_stats_json,
+    format_text_models,
+    format_models_json,
+    format_text_alerts,
+    format_alerts_json,
+    format_text_observations,
+    format_observations_json,
+    format_text_memprofile,
 )
 
+# 命中告警时的退出码（1 表示执行出错）
+ALERT_EXIT_CODE = 2
+
 
 def build_parser() -> argparse.ArgumentParser:
     """
@@ -46,6 +86,7 @@ def build_parser() -> argparse.ArgumentParser:
     config = load_config()
     default_city: str = config.get("default_city", "")
     default_format: str = config.get("default_format", "text")
+    forecast_days: int = config.get("forecast_days", 3)
 
     parser = argparse.ArgumentParser(
         prog="cli.py",
@@ -70,6 +111,114 @@ def build_parser() -> argparse.ArgumentParser:
         help="以 JSON 格式输出",
     )
     
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="显示预报统计（均值、分位数、雨天数、度日数）",
+    )
+    parser.add_argument(
+        "--models",
+        metavar="LIST",
+        help="逗号分隔的预报模型，并排对比，例如 ecmwf_ifs025,gfs_seamless,icon_seamless",
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=forecast_days,
+        help=f"统计和模型对比使用的预报天数，默认 {forecast_days}",
+    )
+    parser.add_argument(
+        "--cities-file",
+        metavar="PATH",
+        help="城市列表文件，每行一个城市（用于批量命令）",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="批量命令的并行请求数，默认 4",
+    )
+
+    parser.add_argument(
+        "--vars",
+        metavar="LIST",
+        help=(
+            "逗号分隔的额外变量 (humidity, wind_speed, precipitation)，"
+            "同时显示露点、酷热指数等派生指标"
+        ),
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="忽略本地缓存，直接请求 API",
+    )
+
+    # 本地观测记录
+    local_group = parser.add_argument_group("本地观测记录")
+    local_group.add_argument(
+        "--record",
+        action="store_true",
+        help="把本次查询到的当前天气记录到本地（或设置 record_observations=1）",
+    )
+    local_group.add_argument(
+        "--history-local",
+        metavar="CITY",
+        help="查询本地记录的观测数据",
+    )
+    local_group.add_argument(
+        "--since",
+        default="24h",
+        metavar="WHEN",
+        help="起始时间: 30m / 6h / 2d / 1w 或 YYYY-MM-DD[THH:MM] (UTC)，默认 24h",
+    )
+    local_group.add_argument(
+        "--until",
+        metavar="WHEN",
+        help="结束时间，格式同 --since，默认不限",
+    )
+
+    # 阈值告警
+    alert_group = parser.add_argument_group("阈值告警")
+    alert_group.add_argument(
+        "--alert",
+        action="append",
+        metavar="RULE",
+        help="告警规则，可重复，例如 'frost: min_temp < 0'、'weather_code in thunderstorm'",
+    )
+    alert_group.add_argument(
+        "--alert-file",
+        metavar="PATH",
+        help="告警规则文件，每行一条规则，# 开头为注释",
+    )
+
+    # 缓存预热
+    warm_group = parser.add_argument_group("缓存预热")
+    warm_group.add_argument(
+        "--warm",
+        action="store_true",
+        help="持续在缓存过期前刷新预热列表（--cities-file 或 watchlist 配置）",
+    )
+    warm_group.add_argument(
+        "--once",
+        action="store_true",
+        help="与 --warm 一起使用: 只刷新已到期的城市后退出，适合 cron",
+    )
+
+    # 流式批量查询
+    stream_group = parser.add_argument_group("流式批量查询")
+    stream_group.add_argument(
+        "--stream",
+        metavar="INPUT",
+        help="从 CSV/JSON Lines 坐标文件流式查询当前天气，结果写入 --output",
+    )
+    stream_group.add_argument(
+        "--snap",
+        type=float,
+        default=0.01,
+        help="坐标吸附精度（度），吸附后相同的坐标只查询一次，默认 0.01",
+    )
+
     # 日志级别控制
     log_group = parser.add_mutually_exclusive_group()
     log_group.add_argument(
@@ -82,6 +231,11 @@ def build_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="只显示警告和错误",
     )
+    parser.add_argument(
+        "--memprofile",
+        action="store_true",
+        help="分析内存: 按阶段 (fetch/parse/format/output) 输出峰值和主要分配位置到 stderr",
+    )
     
     # 配置命令
     parser.add_argument(
@@ -100,9 +254,118 @@ def build_parser() -> argparse.ArgumentParser:
         help="重置配置为默认值",
     )
 
+    # 历史数据导出
+    history_group = parser.add_argument_group("历史数据导出")
+    history_group.add_argument(
+        "--history",
+        nargs=2,
+        metavar=("START", "END"),
+        help="导出历史数据，日期格式 YYYY-MM-DD",
+    )
+    history_group.add_argument(
+        "-o", "--output",
+        metavar="PATH",
+        help="输出位置: --history 为文件（csv）或目录（npz），--stream 为文件",
+    )
+    history_group.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default="csv",
+        help="输出格式，默认 csv",
+    )
+    history_group.add_argument(
+        "--hourly",
+        action="store_true",
+        help="导出逐小时数据（默认逐日）；与 --stats 一起使用时统计逐小时预报",
+    )
+    history_group.add_argument(
+        "--variables",
+        metavar="A,B,C",
+        help="要导出的变量，逗号分隔",
+    )
+    history_group.add_argument(
+        "--chunk-days",
+        type=int,
+        default=90,
+        help="每个请求覆盖的天数，默认 90",
+    )
+
     return parser
 
 
+def resolve_cities(args: argparse.Namespace) -> List[str]:
+    """
+    获取要查询的城市列表。
+
+    优先使用 --cities-file，否则使用位置参数中的城市。
+
+    Args:
+        args: 命令行参数。
+
+    Returns:
+        List[str]: 城市名列表，可能为空。
+    """
+    if args.cities_file:
+        return read_city_file(Path(args.cities_file))
+    return [args.city] if args.city else []
+
+
+def run_history_command(args: argparse.Namespace) -> int:
+    """
+    处理历史数据导出命令。
+
+    Args:
+        args: 命令行参数。
+
+    Returns:
+        int: 退出码，0 表示成功；-1 表示不是导出命令。
+    """
+    if not args.history:
+        return -1
+
+    try:
+        start, end = (date.fromisoformat(d) for d in args.history)
+    except ValueError:
+        print("错误: 日期格式应为 YYYY-MM-DD")
+        return 1
+
+    try:
+        cities = resolve_cities(args)
+    except OSError as e:
+        print(f"错误: 无法读取城市列表: {e}")
+        return 1
+    if not cities:
+        print("错误: 请指定城市名称或 --cities-file")
+        return 1
+    if not args.output:
+        print("错误: 请使用 --output 指定输出位置")
+        return 1
+
+    variables = args.variables.split(",") if args.variables else None
+    try:
+        stats = export_history(
+            cities,
+            start,
+            end,
+            Path(args.output),
+            output_format=args.output_format,
+            resolution="hourly" if args.hourly else "daily",
+            variables=variables,
+            chunk_days=args.chunk_days,
+            workers=args.workers,
+        )
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 1
+
+    with profile_phase("output"):
+        print(
+            f"导出完成: {stats['downloaded']} 块已下载, {stats['skipped']} 块已跳过, "
+            f"{stats['failed']} 块失败, 共写入 {stats['rows']} 行"
+        )
+    return 1 if stats["failed"] else 0
+
+
 def run_config_command(args: argparse.Namespace) -> int:
     """
     处理配置相关命令。
@@ -135,6 +398,313 @@ def run_config_command(args: argparse.Namespace) -> int:
     return -1  # 不是配置命令
 
 
+def fetch_forecasts(
+    cities: List[str], days: int, workers: int, hourly: bool = False
+) -> Dict[str, Any]:
+    """
+    并行获取多个城市的逐日预报（或逐小时预报）。
+
+    Args:
+        cities: 城市名列表。
+        days: 预报天数。
+        workers: 最大并行请求数。
+        hourly: 是否获取逐小时预报（含降水量，get_hourly 的列式数据）。
+
+    Returns:
+        Dict[str, Any]: 城市名 -> 预报列表（或逐小时列式数据），保持输入顺序。
+
+    Raises:
+        ValueError: 任一城市查询失败时抛出。
+    """
+    def fetch(city: str) -> Any:
+        city_info = cached_coordinates(city)
+        lat, lon = city_info["latitude"], city_info["longitude"]
+        if hourly:
+            return get_hourly(lat, lon, ["precipitation"], days)
+        return get_forecast(lat, lon, days)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(fetch, cities))
+    return dict(zip(cities, results))
+
+
+def run_stats_command(args: argparse.Namespace) -> int:
+    """
+    处理预报统计命令。
+
+    Args:
+        args: 命令行参数。
+
+    Returns:
+        int: 退出码，0 表示成功；-1 表示不是统计命令。
+    """
+    if not args.stats:
+        return -1
+
+    try:
+        cities = resolve_cities(args)
+    except OSError as e:
+        print(f"错误: 无法读取城市列表: {e}")
+        return 1
+    if not cities:
+        print("错误: 请指定城市名称或 --cities-file")
+        return 1
+
+    logger = get_logger()
+    try:
+        if args.hourly:
+            hourly = fetch_forecasts(cities, args.days, args.workers, hourly=True)
+            stats = hourly_stats(hourly)
+        else:
+            forecasts = fetch_forecasts(cities, args.days, args.workers)
+            stats = forecast_stats(forecasts)
+    except ValueError as e:
+        logger.error(f"统计失败: {e}")
+        print(f"错误: {e}")
+        return 1
+
+    with profile_phase("format"):
+        if args.json:
+            output = format_stats_json(stats)
+        else:
+            output = format_text_stats(stats)
+    with profile_phase("output"):
+        print(output)
+    return 0
+
+
+def run_models_command(args: argparse.Namespace) -> int:
+    """
+    处理多模型预报对比命令。
+
+    每个城市的所有模型在一次请求中获取，多个城市并行查询。
+
+    Args:
+        args: 命令行参数。
+
+    Returns:
+        int: 退出码，0 表示成功；-1 表示不是模型对比命令。
+    """
+    if not args.models:
+        return -1
+
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    try:
+        cities = resolve_cities(args)
+    except OSError as e:
+        print(f"错误: 无法读取城市列表: {e}")
+        return 1
+    if not cities:
+        print("错误: 请指定城市名称或 --cities-file")
+        return 1
+
+    def fetch(city: str) -> dict:
+        city_info = cached_coordinates(city)
+        return compare_models(get_model_forecasts(
+            city_info["latitude"], city_info["longitude"], models, args.days
+        ))
+
+    logger = get_logger()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+            comparisons = dict(zip(cities, executor.map(fetch, cities)))
+    except ValueError as e:
+        logger.error(f"模型对比失败: {e}")
+        print(f"错误: {e}")
+        return 1
+
+    with profile_phase("format"):
+        if args.json:
+            output = format_models_json(comparisons)
+        else:
+            output = format_text_models(comparisons)
+    with profile_phase("output"):
+        print(output)
+    return 0
+
+
+def run_history_local_command(args: argparse.Namespace) -> int:
+    """
+    处理本地观测记录查询命令。
+
+    Args:
+        args: 命令行参数。
+
+    Returns:
+        int: 退出码，0 表示成功；-1 表示不是本地记录查询命令。
+    """
+    if not args.history_local:
+        return -1
+
+    logger = get_logger()
+    try:
+        since = parse_since(args.since)
+        until = parse_since(args.until) if args.until else None
+        city_info = cached_coordinates(args.history_local)
+        observations = query_observations(
+            city_info["latitude"], city_info["longitude"], since, until
+        )
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 1
+    except OSError as e:
+        logger.error(f"读取本地观测记录失败: {e}")
+        print(f"错误: 读取本地观测记录失败: {e}")
+        return 1
+
+    with profile_phase("format"):
+        if args.json:
+            output = format_observations_json(city_info["name"], observations)
+        else:
+            output = format_text_observations(city_info["name"], observations)
+    with profile_phase("output"):
+        print(output)
+    return 0
+
+
+def run_alert_command(args: argparse.Namespace) -> int:
+    """
+    处理阈值告警命令。
+
+    规则只编译一次，然后对所有城市的逐日预报批量求值，只输出命中的告警。
+
+    Args:
+        args: 命令行参数。
+
+    Returns:
+        int: 退出码，0 表示没有告警；ALERT_EXIT_CODE 表示有告警命中；
+            1 表示出错；-1 表示不是告警命令。
+    """
+    if not args.alert and not args.alert_file:
+        return -1
+
+    try:
+        rules = parse_rules("\n".join(args.alert or []))
+        if args.alert_file:
+            rules += load_rules(Path(args.alert_file))
+        cities = resolve_cities(args)
+    except OSError as e:
+        print(f"错误: 无法读取文件: {e}")
+        return 1
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 1
+    if not rules:
+        print("错误: 没有有效的告警规则")
+        return 1
+    if not cities:
+        print("错误: 请指定城市名称或 --cities-file")
+        return 1
+
+    logger = get_logger()
+    try:
+        forecasts = fetch_forecasts(cities, args.days, args.workers)
+    except ValueError as e:
+        logger.error(f"告警检查失败: {e}")
+        print(f"错误: {e}")
+        return 1
+
+    alerts = evaluate_alerts(rules, forecasts)
+    logger.info(f"告警检查完成: {len(cities)} 个城市, 命中 {len(alerts)} 条")
+    with profile_phase("format"):
+        if args.json:
+            output = format_alerts_json(alerts)
+        else:
+            output = format_text_alerts(alerts)
+    with profile_phase("output"):
+        print(output)
+    return ALERT_EXIT_CODE if alerts else 0
+
+
+def run_warm_command(args: argparse.Namespace) -> int:
+    """
+    处理缓存预热命令。
+
+    Args:
+        args: 命令行参数。
+
+    Returns:
+        int: 退出码，0 表示成功；-1 表示不是预热命令。
+    """
+    if not args.warm:
+        return -1
+
+    try:
+        if args.cities_file:
+            cities = read_city_file(Path(args.cities_file))
+        else:
+            cities = get_watchlist()
+    except OSError as e:
+        print(f"错误: 无法读取城市列表: {e}")
+        return 1
+    if not cities:
+        print("错误: 预热列表为空，请设置 watchlist / default_city 或使用 --cities-file")
+        return 1
+
+    try:
+        stats = warm_watchlist(
+            cities, get_config("cache_ttl", 0), once=args.once
+        )
+    except ValueError as e:
+        print(f"错误: {e}")
+        return 1
+    except KeyboardInterrupt:
+        print("预热已停止")
+        return 0
+
+    with profile_phase("output"):
+        print(
+            f"预热完成: 刷新 {stats['refreshed']} 次, 失败 {stats['failed']} 次, "
+            f"清理过期缓存 {stats['pruned']} 个"
+        )
+    return 1 if stats["failed"] else 0
+
+
+def run_stream_command(args: argparse.Namespace) -> int:
+    """
+    处理流式批量查询命令。
+
+    Args:
+        args: 命令行参数。
+
+    Returns:
+        int: 退出码，0 表示成功；-1 表示不是流式查询命令。
+    """
+    if not args.stream:
+        return -1
+    if not args.output:
+        print("错误: 请使用 --output 指定输出文件")
+        return 1
+
+    try:
+        stats = stream_weather(
+            Path(args.stream),
+            Path(args.output),
+            workers=args.workers,
+            snap=args.snap,
+        )
+    except UpstreamUnavailableError as e:
+        print(f"错误: {e}")
+        print("已保存断点，稍后用相同参数重新运行即可继续")
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}")
+        return 1
+
+    rss = stats["peak_rss_mb"]
+    with profile_phase("output"):
+        print(
+            f"处理完成: {stats['rows']} 行 (从第 {stats['resumed_from']} 行开始), "
+            f"API 查询 {stats['fetched']} 次, 去重命中 {stats['deduped']} 次, "
+            f"失败 {stats['failed']} 行"
+        )
+        print(
+            f"耗时 {stats['elapsed']:.1f}s, {stats['rows_per_sec']:.1f} 行/秒, "
+            f"峰值内存 {f'{rss:.1f} MB' if rss is not None else '未知'}"
+        )
+    return 1 if stats["failed"] else 0
+
+
 def run_weather_query(args: argparse.Namespace) -> int:
     """
     执行天气查询。
@@ -151,13 +721,13 @@ def run_weather_query(args: argparse.Namespace) -> int:
         return 1
 
     # 获取日志记录器
-    logger = setup_logger()
+    logger = get_logger()
     logger.info(f"查询城市: {city}")
 
     try:
         # 获取城市坐标
         logger.debug(f"正在获取 {city} 的坐标")
-        city_info = get_coordinates(city)
+        city_info = cached_coordinates(city, refresh=args.no_cache)
         lat = city_info["latitude"]
         lon = city_info["longitude"]
         city_name = city_info["name"]
@@ -167,28 +737,45 @@ def run_weather_query(args: argparse.Namespace) -> int:
 
         # 获取当前天气
         logger.debug("正在获取天气数据")
-        current = get_weather(lat, lon)
+        variables = [v.strip() for v in (args.vars or "").split(",") if v.strip()]
+        current = cached_weather(
+            lat, lon, refresh=args.no_cache, variables=variables
+        )
         logger.debug(f"天气数据: {current}")
 
+        if args.record or get_config("record_observations", 0):
+            try:
+                record_observation(
+                    lat, lon, current,
+                    retention_days=get_config("observation_retention_days", 0),
+                )
+            except (OSError, ValueError) as e:
+                logger.warning(f"记录观测数据失败: {e}")
+
+        forecasts = None
+        if args.forecast:
+            forecasts = cached_forecast(lat, lon, refresh=args.no_cache)
+
         # 根据参数输出
-        if args.json:
-            if args.forecast:
-                forecasts = get_forecast(lat, lon)
-                print(format_json(city_name, country, lat, lon, current, forecasts))
-            else:
-                print(format_json(city_name, country, lat, lon, current))
-        else:
-            if args.forecast:
-                forecasts = get_forecast(lat, lon)
-                print(format_text_forecast(
+        with profile_phase("format"):
+            if args.json:
+                output = format_json(city_name, country, lat, lon, current, forecasts)
+            elif forecasts is not None:
+                output = format_text_forecast(
                     city_name, country, lat, lon, current, forecasts
-                ))
+                )
             else:
-                print(format_text_current(city_name, country, lat, lon, current))
-        
+                output = format_text_current(city_name, country, lat, lon, current)
+        with profile_phase("output"):
+            print(output)
+
         logger.info(f"查询完成: {city_name}")
         return 0
 
+    except UpstreamUnavailableError as e:
+        logger.error(f"上游服务不可用: {e}")
+        print(f"错误: {e}")
+        return 1
     except ValueError as e:
         logger.error(f"查询失败: {e}")
         print(f"错误: {e}")
@@ -217,11 +804,65 @@ def main() -> int:
     else:
         setup_logger(level=20)  # INFO
 
+    if not args.memprofile:
+        return dispatch(args)
+
+    with MemoryProfiler() as profiler:
+        result = dispatch(args)
+    print(format_text_memprofile(profiler.report()), file=sys.stderr)
+    return result
+
+
+def dispatch(args: argparse.Namespace) -> int:
+    """
+    根据命令行参数执行对应的命令。
+
+    Args:
+        args: 命令行参数。
+
+    Returns:
+        int: 程序退出码。
+    """
     # 处理配置命令
     config_result = run_config_command(args)
     if config_result >= 0:
         return config_result
 
+    # 处理历史数据导出
+    history_result = run_history_command(args)
+    if history_result >= 0:
+        return history_result
+
+    # 处理本地观测记录查询
+    local_result = run_history_local_command(args)
+    if local_result >= 0:
+        return local_result
+
+    # 处理流式批量查询
+    stream_result = run_stream_command(args)
+    if stream_result >= 0:
+        return stream_result
+
+    # 处理缓存预热
+    warm_result = run_warm_command(args)
+    if warm_result >= 0:
+        return warm_result
+
+    # 处理预报统计
+    stats_result = run_stats_command(args)
+    if stats_result >= 0:
+        return stats_result
+
+    # 处理阈值告警
+    alert_result = run_alert_command(args)
+    if alert_result >= 0:
+        return alert_result
+
+    # 处理多模型预报对比
+    models_result = run_models_command(args)
+    if models_result >= 0:
+        return models_result
+
     # 执行天气查询
     return run_weather_query(args)
 
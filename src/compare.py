@@ -0,0 +1,68 @@
+"""
+多模型预报对比模块
+
+将多个预报模型的逐日预报按日期对齐，计算每天各模型之间的
+温度离散度（最大值与最小值之差）以及天气现象的一致程度。
+"""
+from collections import Counter
+from typing import Dict, List, Optional
+
+from weather import parse_weather_code
+
+
+def _spread(values: List[Optional[float]]) -> Optional[float]:
+    """计算有效值的极差，不足两个有效值时返回 None"""
+    present = [v for v in values if v is not None]
+    if len(present) < 2:
+        return None
+    return round(max(present) - min(present), 2)
+
+
+def compare_models(forecasts_by_model: Dict[str, list]) -> Dict:
+    """
+    按日期对齐多个模型的预报并计算离散度与一致度。
+
+    Args:
+        forecasts_by_model: 模型名 -> 预报列表（get_forecast 格式）
+
+    Returns:
+        {"models": [...], "days": [...]}，每天包含:
+        date, models (模型名 -> {max_temp, min_temp, weather_code, weather}，
+        缺少数据的模型为 None), max_temp_spread, min_temp_spread,
+        consensus (出现最多的天气描述) 和 agreement (与之一致的模型比例)
+    """
+    models = list(forecasts_by_model)
+    by_date: Dict[str, Dict[str, dict]] = {}
+    for model, forecasts in forecasts_by_model.items():
+        for f in forecasts:
+            by_date.setdefault(f["date"], {})[model] = f
+
+    days = []
+    for date in sorted(by_date):
+        entries = {}
+        for model in models:
+            f = by_date[date].get(model)
+            if f is None or f.get("max_temp") is None:
+                entries[model] = None
+                continue
+            code = f.get("weather_code")
+            entries[model] = {
+                "max_temp": f["max_temp"],
+                "min_temp": f.get("min_temp"),
+                "weather_code": code,
+                "weather": parse_weather_code(code) if code is not None else None,
+            }
+
+        present = [e for e in entries.values() if e is not None]
+        weathers = Counter(e["weather"] for e in present if e["weather"] is not None)
+        consensus, votes = weathers.most_common(1)[0] if weathers else (None, 0)
+        days.append({
+            "date": date,
+            "models": entries,
+            "max_temp_spread": _spread([e["max_temp"] for e in present]),
+            "min_temp_spread": _spread([e["min_temp"] for e in present]),
+            "consensus": consensus,
+            "agreement": round(votes / len(present), 2) if present else None,
+        })
+
+    return {"models": models, "days": days}
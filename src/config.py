@@ -7,20 +7,40 @@
 
 import json
 import logging
+import os
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from storage import atomic_write_json, file_lock, file_signature
 
 logger = logging.getLogger(__name__)
 
 # 配置文件路径
 CONFIG_DIR = Path.home() / ".weather-cli"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+CONFIG_LOCK_FILE = CONFIG_DIR / "config.lock"
+
+# 系统级配置文件（优先级低于用户配置），可通过环境变量覆盖路径
+SYSTEM_CONFIG_FILE = Path(
+    os.environ.get("WEATHER_CLI_SYSTEM_CONFIG", "/etc/weather-cli/config.json")
+)
+
+# 环境变量前缀，例如 WEATHER_CLI_DEFAULT_CITY=Beijing
+ENV_PREFIX = "WEATHER_CLI_"
 
 # 默认配置
 DEFAULT_CONFIG: Dict[str, Any] = {
     "default_city": "",
     "default_format": "text",
     "forecast_days": 3,
+    "watchlist": "",
+    "cache_ttl": 900,
+    "rate_limit_per_minute": 500,
+    "rate_limit_burst": 10,
+    "breaker_failure_threshold": 3,
+    "breaker_cooldown": 60,
+    "record_observations": 0,
+    "observation_retention_days": 30,
 }
 
 # 合法的配置键及其类型
@@ -28,20 +48,178 @@ VALID_CONFIG_KEYS: Dict[str, type] = {
     "default_city": str,
     "default_format": str,
     "forecast_days": int,
+    "watchlist": str,  # 逗号分隔的城市列表
+    "cache_ttl": int,  # 本地缓存有效期（秒）
+    "rate_limit_per_minute": int,  # 所有进程合计的每分钟请求数
+    "rate_limit_burst": int,  # 允许的突发请求数
+    "breaker_failure_threshold": int,  # 触发熔断的连续失败次数
+    "breaker_cooldown": int,  # 熔断冷却时间（秒）
+    "record_observations": int,  # 1 表示把每次查询到的当前天气记录到本地
+    "observation_retention_days": int,  # 本地观测记录保留天数
 }
 
 # 合法的配置值约束
 CONFIG_CONSTRAINTS: Dict[str, Any] = {
     "default_format": ["text", "json"],
     "forecast_days": range(1, 8),  # 1-7
+    "cache_ttl": range(0, 86401),  # 0 表示不使用缓存，最长 1 天
+    "rate_limit_per_minute": range(0, 100001),  # 0 表示不限流
+    "rate_limit_burst": range(1, 1001),
+    "breaker_failure_threshold": range(0, 101),  # 0 表示不熔断
+    "breaker_cooldown": range(1, 3601),
+    "record_observations": range(0, 2),
+    "observation_retention_days": range(0, 3651),  # 0 表示永久保留
 }
 
+# 进程内缓存: 用户配置文件按 (mtime, size) 签名失效；
+# 系统配置和环境变量只在首次加载时解析一次
+_user_cache: Dict[str, Any] = {"signature": None, "data": None}
+_static_layers: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None
+
+
+def _convert_value(key: str, value: Any) -> Any:
+    """
+    按配置项的类型和约束转换并校验值。
+
+    Args:
+        key: 配置项的键名
+        value: 原始值（通常为字符串）
+
+    Returns:
+        转换后的值
+
+    Raises:
+        ValueError: 键名不合法或值不符合约束时抛出
+    """
+    if key not in VALID_CONFIG_KEYS:
+        raise ValueError(
+            f"不支持的配置项: '{key}'。合法的配置项: {list(VALID_CONFIG_KEYS.keys())}"
+        )
+
+    # 类型转换
+    expected_type = VALID_CONFIG_KEYS[key]
+    try:
+        typed_value: Any = expected_type(value)
+    except (ValueError, TypeError) as e:
+        raise ValueError(
+            f"配置项 '{key}' 的值类型错误，期望 {expected_type.__name__}: {e}"
+        ) from e
+
+    # 值约束检查
+    if key in CONFIG_CONSTRAINTS:
+        constraint = CONFIG_CONSTRAINTS[key]
+        if typed_value not in constraint:
+            if isinstance(constraint, range):
+                allowed = f"{constraint.start}-{constraint.stop - 1}"
+            else:
+                allowed = str(list(constraint))
+            raise ValueError(
+                f"配置项 '{key}' 的值 '{typed_value}' 不合法。"
+                f"合法值: {allowed}"
+            )
+    return typed_value
+
+
+def _read_json_file(path: Path) -> Dict[str, Any]:
+    """
+    读取 JSON 配置文件。
+
+    Args:
+        path: 配置文件路径
+
+    Returns:
+        Dict[str, Any]: 文件内容
+
+    Raises:
+        json.JSONDecodeError: 文件格式错误时抛出
+        OSError: 读取失败时抛出
+    """
+    with path.open("r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise json.JSONDecodeError("配置文件顶层必须是对象", str(path), 0)
+    return data
+
+
+def _load_static_layers() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    解析系统级配置文件和环境变量，结果在进程内只计算一次。
+
+    Returns:
+        (系统配置, 环境变量配置) 元组
+    """
+    global _static_layers
+    if _static_layers is not None:
+        return _static_layers
+
+    system: Dict[str, Any] = {}
+    if SYSTEM_CONFIG_FILE.exists():
+        try:
+            system = _read_json_file(SYSTEM_CONFIG_FILE)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("忽略无法读取的系统配置 %s: %s", SYSTEM_CONFIG_FILE, e)
+
+    env: Dict[str, Any] = {}
+    for key in VALID_CONFIG_KEYS:
+        raw = os.environ.get(ENV_PREFIX + key.upper())
+        if raw is None:
+            continue
+        try:
+            env[key] = _convert_value(key, raw)
+        except ValueError as e:
+            logger.warning("忽略无效的环境变量 %s%s: %s", ENV_PREFIX, key.upper(), e)
+
+    _static_layers = (system, env)
+    return _static_layers
+
+
+def _load_user_config(force: bool = False) -> Dict[str, Any]:
+    """
+    读取用户配置文件，仅在文件签名变化时重新解析。
+
+    Args:
+        force: 为 True 时忽略缓存强制重新读取
+
+    Returns:
+        Dict[str, Any]: 用户配置文件内容（缓存的副本）
+
+    Raises:
+        json.JSONDecodeError: 配置文件格式错误时抛出
+    """
+    signature = file_signature(CONFIG_FILE)
+    if (
+        not force
+        and signature is not None
+        and signature == _user_cache["signature"]
+    ):
+        return dict(_user_cache["data"])
+
+    data = _read_json_file(CONFIG_FILE)
+    _user_cache["signature"] = signature
+    _user_cache["data"] = data
+    return dict(data)
+
+
+def reload_config() -> None:
+    """
+    清空进程内的配置缓存。
+
+    下一次 load_config() 会重新读取配置文件、系统配置和环境变量。
+    """
+    global _static_layers
+    _static_layers = None
+    _user_cache["signature"] = None
+    _user_cache["data"] = None
+
 
 def load_config() -> Dict[str, Any]:
     """
     加载配置文件。
 
-    如果配置文件不存在，则自动创建并写入默认配置。
+    如果配置文件不存在，则自动创建一个空的用户配置文件（默认值在读取时合并，
+    不写入文件，否则会覆盖系统配置）。
+    配置按 默认值 < 系统配置 < 用户配置 < 环境变量 的优先级合并；
+    用户配置文件未变化时直接使用进程内缓存。
 
     Returns:
         Dict[str, Any]: 配置字典，包含所有配置项。
@@ -49,31 +227,36 @@ def load_config() -> Dict[str, Any]:
     Raises:
         json.JSONDecodeError: 配置文件格式错误时抛出。
     """
+    system, env = _load_static_layers()
+
     if not CONFIG_FILE.exists():
         logger.info("配置文件不存在，创建默认配置: %s", CONFIG_FILE)
-        save_config(DEFAULT_CONFIG.copy())
-        return DEFAULT_CONFIG.copy()
-
-    try:
-        with CONFIG_FILE.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-        # 合并默认配置，确保所有键都存在
-        config = DEFAULT_CONFIG.copy()
-        config.update(data)
-        return config
-    except json.JSONDecodeError as e:
-        logger.error("配置文件格式错误: %s", e)
-        raise
-    except OSError as e:
-        logger.error("读取配置文件失败: %s", e)
-        return DEFAULT_CONFIG.copy()
+        save_config({})
+        user: Dict[str, Any] = {}
+    else:
+        try:
+            user = _load_user_config()
+        except json.JSONDecodeError as e:
+            logger.error("配置文件格式错误: %s", e)
+            raise
+        except OSError as e:
+            logger.error("读取配置文件失败: %s", e)
+            user = {}
+
+    # 合并默认配置，确保所有键都存在
+    config = DEFAULT_CONFIG.copy()
+    config.update(system)
+    config.update(user)
+    config.update(env)
+    return config
 
 
 def save_config(config: Dict[str, Any]) -> None:
     """
     保存配置到文件。
 
-    如果配置目录不存在，则自动创建。
+    如果配置目录不存在，则自动创建。写入通过临时文件 + os.replace
+    原子完成，并发读取方不会读到截断的文件。
 
     Args:
         config (Dict[str, Any]): 要保存的配置字典。
@@ -82,9 +265,9 @@ def save_config(config: Dict[str, Any]) -> None:
         OSError: 写入文件失败时抛出。
     """
     try:
-        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        with CONFIG_FILE.open("w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        atomic_write_json(CONFIG_FILE, config)
+        _user_cache["signature"] = file_signature(CONFIG_FILE)
+        _user_cache["data"] = dict(config)
         logger.info("配置已保存到: %s", CONFIG_FILE)
     except OSError as e:
         logger.error("保存配置文件失败: %s", e)
@@ -110,6 +293,10 @@ def set_config(key: str, value: Union[str, int, float]) -> None:
     """
     设置指定配置项的值并保存。
 
+    读取-修改-写入过程持有配置锁，并发的 set_config 不会互相覆盖。
+    只写回用户配置文件本身已有的键和新设置的键，不会把默认值、
+    系统配置或环境变量固化进去。
+
     Args:
         key (str): 配置项的键名。
         value (Union[str, int, float]): 要设置的值（字符串形式，会自动转换类型）。
@@ -117,32 +304,14 @@ def set_config(key: str, value: Union[str, int, float]) -> None:
     Raises:
         ValueError: 键名不合法或值不符合约束时抛出。
     """
-    if key not in VALID_CONFIG_KEYS:
-        raise ValueError(
-            f"不支持的配置项: '{key}'。合法的配置项: {list(VALID_CONFIG_KEYS.keys())}"
-        )
-
-    # 类型转换
-    expected_type = VALID_CONFIG_KEYS[key]
-    try:
-        typed_value: Any = expected_type(value)
-    except (ValueError, TypeError) as e:
-        raise ValueError(
-            f"配置项 '{key}' 的值类型错误，期望 {expected_type.__name__}: {e}"
-        ) from e
-
-    # 值约束检查
-    if key in CONFIG_CONSTRAINTS:
-        constraint = CONFIG_CONSTRAINTS[key]
-        if typed_value not in constraint:
-            raise ValueError(
-                f"配置项 '{key}' 的值 '{typed_value}' 不合法。"
-                f"合法值: {list(constraint)}"
-            )
-
-    config = load_config()
-    config[key] = typed_value
-    save_config(config)
+    typed_value = _convert_value(key, value)
+
+    with file_lock(CONFIG_LOCK_FILE):
+        config: Dict[str, Any] = {}
+        if CONFIG_FILE.exists():
+            config.update(_load_user_config(force=True))
+        config[key] = typed_value
+        save_config(config)
     logger.info("配置项 '%s' 已设置为: %s", key, typed_value)
 
 
@@ -150,9 +319,10 @@ def reset_config() -> None:
     """
     重置配置文件为默认值。
 
-    将所有配置项恢复为默认值并保存。
+    清空用户配置文件，所有配置项回到默认值（或系统配置中的值）。
     """
-    save_config(DEFAULT_CONFIG.copy())
+    with file_lock(CONFIG_LOCK_FILE):
+        save_config({})
     logger.info("配置已重置为默认值")
 
 
@@ -171,6 +341,21 @@ def show_config() -> str:
     return "\n".join(lines)
 
 
+def get_watchlist() -> List[str]:
+    """
+    获取预热城市列表。
+
+    由 watchlist 配置项（逗号分隔）和 default_city 组成，去重并保持顺序。
+
+    Returns:
+        List[str]: 城市名列表。
+    """
+    config = load_config()
+    cities = [c.strip() for c in config.get("watchlist", "").split(",")]
+    cities.append(config.get("default_city", "").strip())
+    return list(dict.fromkeys(c for c in cities if c))
+
+
 def parse_config_assignment(assignment: str) -> tuple[str, str]:
     """
     解析 'key=value' 格式的配置赋值字符串。
@@ -0,0 +1,259 @@
+"""
+派生气象指标模块
+
+根据温度、相对湿度和风速计算露点、酷热指数、风寒温度和湿热指数 (humidex)。
+所有函数都接受整段数组（例如一年的逐小时数据）并一次性计算：
+安装了 numpy 时使用向量化计算，否则使用 array 模块逐元素计算。
+无法计算的位置（缺失输入、湿度为 0 等）结果为 NaN。
+"""
+import math
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖
+    np = None
+
+# 可在查询中附加的变量: 名称 -> Open-Meteo 变量名
+EXTRA_VARIABLES: Dict[str, str] = {
+    "humidity": "relative_humidity_2m",
+    "wind_speed": "wind_speed_10m",
+    "precipitation": "precipitation",
+}
+
+# 派生指标及其依赖的输入变量
+DERIVED_INPUTS: Dict[str, tuple] = {
+    "dew_point": ("temperature", "humidity"),
+    "heat_index": ("temperature", "humidity"),
+    "wind_chill": ("temperature", "wind_speed"),
+    "humidex": ("temperature", "humidity"),
+}
+
+# Magnus 公式系数
+_MAGNUS_A = 17.625
+_MAGNUS_B = 243.04
+
+
+def _use_numpy(use_numpy: Optional[bool]) -> bool:
+    """决定是否使用 numpy"""
+    if use_numpy is None:
+        return np is not None
+    if use_numpy and np is None:
+        raise ValueError("需要安装 numpy: pip install numpy")
+    return use_numpy
+
+
+def _as_array(values: Iterable, use_numpy: bool):
+    """转换为 float64 数组，None 视为 NaN"""
+    if use_numpy:
+        if isinstance(values, np.ndarray):
+            return values.astype(np.float64, copy=False)
+        return np.array(
+            [math.nan if v is None else v for v in values], dtype=np.float64
+        )
+    return array("d", (math.nan if v is None else v for v in values))
+
+
+def dew_point(temp: Sequence, humidity: Sequence, use_numpy: Optional[bool] = None):
+    """
+    计算露点温度 (Magnus 公式)。
+
+    Args:
+        temp: 气温 (°C)
+        humidity: 相对湿度 (%)
+        use_numpy: 是否使用 numpy，默认在可用时使用
+
+    Returns:
+        露点温度 (°C) 数组
+    """
+    fast = _use_numpy(use_numpy)
+    t = _as_array(temp, fast)
+    rh = _as_array(humidity, fast)
+    a, b = _MAGNUS_A, _MAGNUS_B
+
+    if fast:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            gamma = np.log(np.where(rh > 0, rh, np.nan) / 100) + a * t / (b + t)
+            return b * gamma / (a - gamma)
+
+    result = array("d", bytes(8 * len(t)))
+    for i in range(len(t)):
+        if not rh[i] > 0 or math.isnan(t[i]):
+            result[i] = math.nan
+            continue
+        gamma = math.log(rh[i] / 100) + a * t[i] / (b + t[i])
+        result[i] = b * gamma / (a - gamma)
+    return result
+
+
+def heat_index(temp: Sequence, humidity: Sequence, use_numpy: Optional[bool] = None):
+    """
+    计算酷热指数 (美国国家气象局 Rothfusz 回归)。
+
+    温度较低时简化公式的结果接近气温本身。
+
+    Args:
+        temp: 气温 (°C)
+        humidity: 相对湿度 (%)
+        use_numpy: 是否使用 numpy，默认在可用时使用
+
+    Returns:
+        酷热指数 (°C) 数组
+    """
+    fast = _use_numpy(use_numpy)
+    t = _as_array(temp, fast)
+    rh = _as_array(humidity, fast)
+
+    if fast:
+        f = t * 1.8 + 32
+        simple = 0.5 * (f + 61.0 + (f - 68.0) * 1.2 + rh * 0.094)
+        full = (
+            -42.379 + 2.04901523 * f + 10.14333127 * rh
+            - 0.22475541 * f * rh - 6.83783e-3 * f * f
+            - 5.481717e-2 * rh * rh + 1.22874e-3 * f * f * rh
+            + 8.5282e-4 * f * rh * rh - 1.99e-6 * f * f * rh * rh
+        )
+        with np.errstate(invalid="ignore"):
+            dry = (rh < 13) & (f >= 80) & (f <= 112)
+            humid = (rh > 85) & (f >= 80) & (f <= 87)
+            full = full - np.where(
+                dry,
+                (13 - rh) / 4 * np.sqrt(np.abs(17 - np.abs(f - 95.0)) / 17),
+                0.0,
+            )
+            full = full + np.where(humid, (rh - 85) / 10 * (87 - f) / 5, 0.0)
+            hi = np.where((simple + f) / 2 >= 80, full, simple)
+        return (hi - 32) / 1.8
+
+    result = array("d", bytes(8 * len(t)))
+    for i in range(len(t)):
+        f = t[i] * 1.8 + 32
+        h = rh[i]
+        hi = 0.5 * (f + 61.0 + (f - 68.0) * 1.2 + h * 0.094)
+        if (hi + f) / 2 >= 80:
+            hi = (
+                -42.379 + 2.04901523 * f + 10.14333127 * h
+                - 0.22475541 * f * h - 6.83783e-3 * f * f
+                - 5.481717e-2 * h * h + 1.22874e-3 * f * f * h
+                + 8.5282e-4 * f * h * h - 1.99e-6 * f * f * h * h
+            )
+            if h < 13 and 80 <= f <= 112:
+                hi -= (13 - h) / 4 * math.sqrt(abs(17 - abs(f - 95.0)) / 17)
+            elif h > 85 and 80 <= f <= 87:
+                hi += (h - 85) / 10 * (87 - f) / 5
+        result[i] = (hi - 32) / 1.8
+    return result
+
+
+def wind_chill(temp: Sequence, wind_speed: Sequence, use_numpy: Optional[bool] = None):
+    """
+    计算风寒温度 (加拿大/美国公制公式)。
+
+    仅在气温 ≤ 10°C 且风速 > 4.8 km/h 时适用，其余情况返回气温本身。
+
+    Args:
+        temp: 气温 (°C)
+        wind_speed: 10 米风速 (km/h)
+        use_numpy: 是否使用 numpy，默认在可用时使用
+
+    Returns:
+        风寒温度 (°C) 数组
+    """
+    fast = _use_numpy(use_numpy)
+    t = _as_array(temp, fast)
+    v = _as_array(wind_speed, fast)
+
+    if fast:
+        with np.errstate(invalid="ignore"):
+            vp = np.power(np.maximum(v, 0.0), 0.16)
+            wc = 13.12 + 0.6215 * t - 11.37 * vp + 0.3965 * t * vp
+            applies = (t <= 10) & (v > 4.8)
+        return np.where(np.isnan(v), np.nan, np.where(applies, wc, t))
+
+    result = array("d", bytes(8 * len(t)))
+    for i in range(len(t)):
+        if math.isnan(v[i]):
+            result[i] = math.nan
+        elif t[i] <= 10 and v[i] > 4.8:
+            vp = v[i] ** 0.16
+            result[i] = 13.12 + 0.6215 * t[i] - 11.37 * vp + 0.3965 * t[i] * vp
+        else:
+            result[i] = t[i]
+    return result
+
+
+def humidex(temp: Sequence, humidity: Sequence, use_numpy: Optional[bool] = None):
+    """
+    计算湿热指数 humidex (加拿大气象局公式)。
+
+    Args:
+        temp: 气温 (°C)
+        humidity: 相对湿度 (%)
+        use_numpy: 是否使用 numpy，默认在可用时使用
+
+    Returns:
+        humidex 数组
+    """
+    fast = _use_numpy(use_numpy)
+    t = _as_array(temp, fast)
+    td = dew_point(t, humidity, use_numpy=fast)
+
+    if fast:
+        vapour = 6.11 * np.exp(5417.7530 * (1 / 273.16 - 1 / (273.15 + td)))
+        return t + 0.5555 * (vapour - 10.0)
+
+    result = array("d", bytes(8 * len(t)))
+    for i in range(len(t)):
+        vapour = 6.11 * math.exp(5417.7530 * (1 / 273.16 - 1 / (273.15 + td[i])))
+        result[i] = t[i] + 0.5555 * (vapour - 10.0)
+    return result
+
+
+_FUNCTIONS = {
+    "dew_point": dew_point,
+    "heat_index": heat_index,
+    "wind_chill": wind_chill,
+    "humidex": humidex,
+}
+
+
+def compute_derived(
+    columns: Dict[str, Sequence], use_numpy: Optional[bool] = None
+) -> Dict[str, object]:
+    """
+    根据已有的输入列计算所有可计算的派生指标。
+
+    Args:
+        columns: 包含 temperature 以及 humidity / wind_speed 等列的字典
+        use_numpy: 是否使用 numpy，默认在可用时使用
+
+    Returns:
+        指标名 -> 数组，缺少输入的指标不会出现在结果中
+    """
+    fast = _use_numpy(use_numpy)
+    arrays = {
+        name: _as_array(values, fast)
+        for name, values in columns.items()
+        if name in ("temperature", "humidity", "wind_speed")
+    }
+    results = {}
+    for name, inputs in DERIVED_INPUTS.items():
+        if all(key in arrays for key in inputs):
+            results[name] = _FUNCTIONS[name](
+                *(arrays[key] for key in inputs), use_numpy=fast
+            )
+    return results
+
+
+def to_list(values) -> List[Optional[float]]:
+    """
+    将结果数组转换为可 JSON 序列化的列表，NaN 转换为 None。
+
+    Args:
+        values: numpy 数组或 array('d')
+
+    Returns:
+        保留两位小数的浮点数列表
+    """
+    return [None if math.isnan(v) else round(v, 2) for v in values.tolist()]
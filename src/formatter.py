@@ -2,9 +2,65 @@
 输出格式化模块
 """
 import json
+import unicodedata
+
 from weather import parse_weather_code
 
 
+def _display_width(text: str) -> int:
+    """计算字符串在终端中的显示宽度（中文等宽字符计为 2）"""
+    return sum(
+        2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1
+        for ch in text
+    )
+
+
+def _format_table(header: list[str], rows: list[list[str]]) -> list[str]:
+    """
+    将表头和数据行格式化为按显示宽度对齐的文本行
+
+    Args:
+        header: 表头
+        rows: 数据行，每个单元格为字符串
+
+    Returns:
+        对齐后的文本行列表（带两个空格缩进）
+    """
+    widths = [
+        max(_display_width(cell) for cell in column)
+        for column in zip(header, *rows)
+    ]
+    lines = []
+    for row in [header, *rows]:
+        cells = [
+            cell + " " * (width - _display_width(cell))
+            for cell, width in zip(row, widths)
+        ]
+        lines.append("  " + "  ".join(cells).rstrip())
+    return lines
+
+
+# 额外变量与派生指标的显示名称和单位
+EXTRA_FIELDS = [
+    ("humidity", "湿度", "%"),
+    ("wind_speed", "风速", " km/h"),
+    ("precipitation", "降水", " mm"),
+    ("dew_point", "露点", "°C"),
+    ("heat_index", "酷热指数", "°C"),
+    ("wind_chill", "风寒温度", "°C"),
+    ("humidex", "湿热指数", ""),
+]
+
+
+def _extra_lines(weather: dict) -> list[str]:
+    """生成天气数据中额外变量和派生指标的文本行（只包含存在的字段）"""
+    return [
+        f"  {label}: {weather[key]}{unit}"
+        for key, label, unit in EXTRA_FIELDS
+        if weather.get(key) is not None
+    ]
+
+
 def format_text_current(
     city: str, country: str, lat: float, lon: float, weather: dict
 ) -> str:
@@ -29,6 +85,7 @@ def format_text_current(
         "当前天气:",
         f"  温度: {weather['temperature']}°C",
         f"  天气: {weather_desc}",
+        *_extra_lines(weather),
         "",
     ]
     return "\n".join(lines)
@@ -59,6 +116,7 @@ def format_text_forecast(
         "当前天气:",
         f"  温度: {current['temperature']}°C",
         f"  天气: {current_desc}",
+        *_extra_lines(current),
         "",
         "未来 3 天预报:",
     ]
@@ -109,6 +167,9 @@ def format_json(
             "time": current.get("time"),
         },
     }
+    for key, _, _ in EXTRA_FIELDS:
+        if key in current:
+            data["current"][key] = current[key]
 
     if forecasts:
         data["forecast"] = [
@@ -125,6 +186,253 @@ def format_json(
     return json.dumps(data, ensure_ascii=False, indent=2)
 
 
+def _format_number(value: float | None) -> str:
+    """保留一位小数，缺失值显示为 -"""
+    return "-" if value is None else f"{value:.1f}"
+
+
+def format_text_stats(stats: dict) -> str:
+    """
+    格式化预报统计为文本表格
+
+    Args:
+        stats: stats.forecast_stats() 或 stats.hourly_stats() 的返回值
+
+    Returns:
+        格式化的文本输出
+    """
+    hourly = stats.get("resolution") == "hourly"
+    if hourly:
+        unit, label, rainy_label = "hours", "小时", "降水小时"
+    else:
+        unit, label, rainy_label = "days", "天", "雨天"
+    pct_keys = list(stats["locations"][0]["percentiles"]) if stats["locations"] else []
+    header = [
+        "城市", f"{label}数", "均温", "最高", "最低", *pct_keys, rainy_label, "HDD", "CDD",
+    ]
+    rows = []
+    for loc in stats["locations"]:
+        rainy = loc[f"rainy_{unit}"]
+        rows.append([
+            loc["name"],
+            str(loc[unit]),
+            _format_number(loc["mean_temp"]),
+            _format_number(loc["max_temp"]),
+            _format_number(loc["min_temp"]),
+            *(_format_number(loc["percentiles"][k]) for k in pct_keys),
+            "-" if rainy is None else str(rainy),
+            f"{loc['hdd']:.1f}",
+            f"{loc['cdd']:.1f}",
+        ])
+
+    title = "逐小时预报统计" if hourly else "预报统计"
+    lines = [
+        "",
+        f"{title} (度日基准 {stats['base_temp']}°C, 滑动窗口 {stats['window']} {label}):",
+        *_format_table(header, rows),
+    ]
+
+    lines.append("")
+    lines.append(f"{stats['window']} {'小时' if hourly else '日'}滑动平均温度:")
+    for loc in stats["locations"]:
+        values = ", ".join(_format_number(v) for v in loc["rolling_mean"])
+        lines.append(f"  {loc['name']}: {values or '-'}")
+
+    lines.append("")
+    return "\n".join(lines)
+
+
+def format_stats_json(stats: dict) -> str:
+    """
+    格式化预报统计为 JSON
+
+    Args:
+        stats: stats.forecast_stats() 或 stats.hourly_stats() 的返回值
+
+    Returns:
+        格式化的 JSON 字符串
+    """
+    return json.dumps(stats, ensure_ascii=False, indent=2)
+
+
+def format_text_models(comparisons: dict) -> str:
+    """
+    格式化多模型预报对比为文本表格
+
+    Args:
+        comparisons: 城市名 -> compare.compare_models() 的返回值
+
+    Returns:
+        格式化的文本输出
+    """
+    lines = []
+    for city, comparison in comparisons.items():
+        models = comparison["models"]
+        header = ["日期", *models, "最高温离散", "一致天气", "一致度"]
+        rows = []
+        for day in comparison["days"]:
+            cells = []
+            for model in models:
+                entry = day["models"][model]
+                cells.append(
+                    "-" if entry is None
+                    else f"{entry['min_temp']}~{entry['max_temp']}°C {entry['weather']}"
+                )
+            spread = day["max_temp_spread"]
+            agreement = day["agreement"]
+            rows.append([
+                day["date"],
+                *cells,
+                "-" if spread is None else f"{spread:.1f}",
+                day["consensus"] or "-",
+                "-" if agreement is None else f"{agreement:.0%}",
+            ])
+        lines += ["", f"{city} 多模型预报对比:", *_format_table(header, rows)]
+
+    lines.append("")
+    return "\n".join(lines)
+
+
+def format_models_json(comparisons: dict) -> str:
+    """
+    格式化多模型预报对比为 JSON
+
+    Args:
+        comparisons: 城市名 -> compare.compare_models() 的返回值
+
+    Returns:
+        格式化的 JSON 字符串
+    """
+    return json.dumps(comparisons, ensure_ascii=False, indent=2)
+
+
+def format_text_alerts(alerts: list[dict]) -> str:
+    """
+    格式化命中的告警为文本表格
+
+    Args:
+        alerts: alerts.evaluate_alerts() 的返回值
+
+    Returns:
+        格式化的文本输出
+    """
+    if not alerts:
+        return "\n未触发任何告警\n"
+    header = ["城市", "日期", "规则", "最低", "最高", "天气"]
+    rows = [
+        [
+            a["location"],
+            a["date"] or "-",
+            a["rule"],
+            "-" if a["min_temp"] is None else f"{a['min_temp']}°C",
+            "-" if a["max_temp"] is None else f"{a['max_temp']}°C",
+            a["weather"] or "-",
+        ]
+        for a in alerts
+    ]
+    lines = ["", f"触发 {len(alerts)} 条告警:", *_format_table(header, rows), ""]
+    return "\n".join(lines)
+
+
+def format_alerts_json(alerts: list[dict]) -> str:
+    """
+    格式化命中的告警为 JSON
+
+    Args:
+        alerts: alerts.evaluate_alerts() 的返回值
+
+    Returns:
+        格式化的 JSON 字符串
+    """
+    return json.dumps({"alerts": alerts}, ensure_ascii=False, indent=2)
+
+
+def format_text_observations(city: str, observations: list[dict]) -> str:
+    """
+    格式化本地观测记录为文本表格
+
+    Args:
+        city: 城市名称
+        observations: observations.query_observations() 的返回值
+
+    Returns:
+        格式化的文本输出
+    """
+    if not observations:
+        return f"\n{city}: 没有本地观测记录\n"
+    header = ["时间 (UTC)", "温度", "天气"]
+    rows = [
+        [
+            o["time"],
+            "-" if o["temperature"] is None else f"{o['temperature']}°C",
+            "-" if o["weather_code"] is None else parse_weather_code(o["weather_code"]),
+        ]
+        for o in observations
+    ]
+    temps = [o["temperature"] for o in observations if o["temperature"] is not None]
+    lines = ["", f"{city} 本地观测记录 ({len(observations)} 条):", *_format_table(header, rows)]
+    if temps:
+        lines.append(f"  温度范围: {min(temps)}°C ~ {max(temps)}°C")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def format_observations_json(city: str, observations: list[dict]) -> str:
+    """
+    格式化本地观测记录为 JSON
+
+    Args:
+        city: 城市名称
+        observations: observations.query_observations() 的返回值
+
+    Returns:
+        格式化的 JSON 字符串
+    """
+    return json.dumps(
+        {"city": city, "observations": observations}, ensure_ascii=False, indent=2
+    )
+
+
+def _format_bytes(size: int) -> str:
+    """将字节数格式化为 KB / MB"""
+    if abs(size) >= 1024 * 1024:
+        return f"{size / 1024 / 1024:.1f} MB"
+    return f"{size / 1024:.1f} KB"
+
+
+def format_text_memprofile(report: dict) -> str:
+    """
+    格式化内存分析报告为文本
+
+    Args:
+        report: memprofile.MemoryProfiler.report() 的返回值
+
+    Returns:
+        格式化的文本输出
+    """
+    header = ["阶段", "次数", "峰值", "净分配"]
+    rows = [
+        [name, str(p["calls"]), _format_bytes(p["peak"]), _format_bytes(p["allocated"])]
+        for name, p in report["phases"].items()
+    ]
+    lines = [
+        "",
+        f"内存分析 (总峰值 {_format_bytes(report['peak'])}):",
+        *_format_table(header, rows),
+    ]
+    for name, p in report["phases"].items():
+        if not p["top"]:
+            continue
+        lines.append("")
+        lines.append(f"{name} 主要分配位置:")
+        lines += _format_table(
+            ["位置", "分配量", "块数"],
+            [[t["site"], _format_bytes(t["size"]), str(t["count"])] for t in p["top"]],
+        )
+    lines.append("")
+    return "\n".join(lines)
+
+
 def format_error_json(message: str) -> str:
     """
     格式化错误信息为 JSON
@@ -0,0 +1,476 @@
+"""
+历史数据导出模块
+
+将 日期范围 × 城市列表 切分为若干块，并行下载 Open-Meteo 历史数据，
+边下载边写入 CSV 或 NumPy .npz 文件，并记录断点以便中断后续传。
+"""
+import csv
+import logging
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from memprofile import profile_phase
+from storage import atomic_write_json, read_json
+from weather import get_archive, get_coordinates
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，仅 npz 格式需要
+    np = None
+
+logger = logging.getLogger("weather-cli.history")
+
+# 默认导出的变量
+DEFAULT_VARIABLES: Dict[str, List[str]] = {
+    "daily": [
+        "temperature_2m_max",
+        "temperature_2m_min",
+        "precipitation_sum",
+        "weather_code",
+    ],
+    "hourly": [
+        "temperature_2m",
+        "relative_humidity_2m",
+        "precipitation",
+        "weather_code",
+    ],
+}
+
+OUTPUT_FORMATS = ("csv", "npz")
+
+
+def read_city_file(path: Path) -> List[str]:
+    """
+    读取城市列表文件。
+
+    每行一个城市名，忽略空行和以 # 开头的注释行。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        城市名列表
+    """
+    cities = []
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                cities.append(line)
+    return cities
+
+
+def split_date_range(
+    start: date, end: date, chunk_days: int
+) -> List[Tuple[date, date]]:
+    """
+    将闭区间 [start, end] 切分为不超过 chunk_days 天的若干块。
+
+    Args:
+        start: 开始日期
+        end: 结束日期（包含）
+        chunk_days: 每块的最大天数
+
+    Returns:
+        (块开始日期, 块结束日期) 列表
+
+    Raises:
+        ValueError: 日期范围或块大小不合法时抛出
+    """
+    if end < start:
+        raise ValueError(f"结束日期 {end} 早于开始日期 {start}")
+    if chunk_days < 1:
+        raise ValueError(f"块大小必须为正整数: {chunk_days}")
+
+    chunks = []
+    cursor = start
+    while cursor <= end:
+        chunk_end = min(cursor + timedelta(days=chunk_days - 1), end)
+        chunks.append((cursor, chunk_end))
+        cursor = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _safe_name(text: str) -> str:
+    """将城市名转换为可用作文件名的形式"""
+    return re.sub(r"[^\w.-]+", "_", text).strip("_") or "city"
+
+
+class Checkpoint:
+    """
+    断点记录
+
+    已完成的块以追加日志记录，每块一行 "块ID<TAB>输出文件大小"，
+    每次只追加一行，开销与块总数无关；城市坐标单独保存在
+    <断点文件>.coords.json 中，导出参数保存在 <断点文件>.params.json 中。
+    中断后用相同参数重新运行会跳过已完成的块，CSV 输出截断到最后一个
+    已完成块的大小，丢弃写了一半的数据；参数不同时断点作废，从头开始。
+    """
+
+    def __init__(self, path: Path, params: Optional[Dict] = None):
+        """
+        Args:
+            path: 完成日志路径
+            params: 本次导出的参数（可 JSON 序列化），与断点中记录的不同时
+                丢弃断点
+        """
+        self.path = Path(path)
+        self.coordinates_path = self.path.with_name(self.path.name + ".coords.json")
+        self.params_path = self.path.with_name(self.path.name + ".params.json")
+        self.params = params
+        self.done = set()
+        self.output_size = 0
+        self.coordinates: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._log = None
+
+        if params is not None and read_json(self.params_path) != params:
+            if self.path.exists():
+                logger.warning(f"导出参数与断点不一致，重新开始: {self.path}")
+            self.reset()
+            return
+        self._load()
+        self.coordinates = read_json(self.coordinates_path, default={}) or {}
+
+    def _load(self) -> None:
+        """读取完成日志，忽略中断时写了一半的最后一行"""
+        try:
+            text = self.path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            return
+        valid = 0
+        for line in text.splitlines(keepends=True):
+            if not line.endswith("\n"):
+                break
+            chunk_id, _, size = line.rstrip("\n").partition("\t")
+            try:
+                self.output_size = int(size)
+            except ValueError:
+                break
+            self.done.add(chunk_id)
+            valid += len(line.encode("utf-8"))
+        if valid != len(text.encode("utf-8")):
+            with self.path.open("r+b") as f:
+                f.truncate(valid)
+
+    def reset(self) -> None:
+        """丢弃断点（完成日志和坐标），重新记录导出参数"""
+        self.close()
+        for path in (self.path, self.coordinates_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        self.done = set()
+        self.output_size = 0
+        self.coordinates = {}
+        if self.params is not None:
+            atomic_write_json(self.params_path, self.params)
+
+    def mark_done(self, chunk_id: str, output_size: int = 0) -> None:
+        """
+        记录块已完成并持久化。
+
+        Args:
+            chunk_id: 块 ID
+            output_size: 写完该块后 CSV 输出文件的大小（npz 格式为 0）
+        """
+        with self._lock:
+            if self._log is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._log = self.path.open("a", encoding="utf-8")
+            self._log.write(f"{chunk_id}\t{output_size}\n")
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self.done.add(chunk_id)
+            self.output_size = output_size
+
+    def set_coordinates(self, city: str, city_info: Dict) -> None:
+        """记录城市坐标并持久化"""
+        with self._lock:
+            self.coordinates[city] = city_info
+            atomic_write_json(self.coordinates_path, self.coordinates)
+
+    def close(self) -> None:
+        """关闭完成日志"""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class CsvHistoryWriter:
+    """
+    CSV 写入器
+
+    每个块下载完成后立即追加写入并刷新，不在内存中累积数据。
+    """
+
+    def __init__(self, path: Path, variables: List[str], truncate_to: int = 0):
+        """
+        Args:
+            path: 输出文件路径
+            variables: 变量列表
+            truncate_to: 续传时保留的文件大小（最后一个已完成块的末尾），
+                之后的内容是上次中断时写了一半的数据，会被丢弃
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a+", encoding="utf-8", newline="")
+        self._file.truncate(truncate_to)
+        self._file.seek(truncate_to)
+        self._writer = csv.writer(self._file)
+        self._variables = variables
+        if truncate_to == 0:
+            self._writer.writerow(
+                ["city", "latitude", "longitude", "time", *variables]
+            )
+            self._file.flush()
+
+    def write_chunk(self, chunk: Dict, columns: Dict[str, list]) -> int:
+        """
+        追加写入一个块的数据。
+
+        Args:
+            chunk: 块描述
+            columns: 列式数据
+
+        Returns:
+            写入的行数
+        """
+        rows = zip(
+            columns["time"], *(columns[name] for name in self._variables)
+        )
+        count = 0
+        for row in rows:
+            self._writer.writerow(
+                [chunk["city"], chunk["latitude"], chunk["longitude"], *row]
+            )
+            count += 1
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return count
+
+    def size(self) -> int:
+        """当前文件大小（写入断点用）"""
+        return self._file.tell()
+
+    def close(self) -> None:
+        """关闭文件"""
+        self._file.close()
+
+
+class NpzHistoryWriter:
+    """
+    NumPy 列式写入器
+
+    每个块写入输出目录下的一个 .npz 文件，文件内每个变量一个数组，
+    时间列为 datetime64，缺失值为 NaN。
+    """
+
+    def __init__(self, directory: Path, variables: List[str]):
+        if np is None:
+            raise ValueError("npz 格式需要安装 numpy: pip install numpy")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._variables = variables
+
+    def write_chunk(self, chunk: Dict, columns: Dict[str, list]) -> int:
+        """
+        将一个块写入独立的 .npz 文件。
+
+        Args:
+            chunk: 块描述
+            columns: 列式数据
+
+        Returns:
+            写入的行数
+        """
+        arrays = {"time": np.array(columns["time"], dtype="datetime64[m]")}
+        for name in self._variables:
+            arrays[name] = np.array(
+                [np.nan if v is None else v for v in columns[name]],
+                dtype=np.float64,
+            )
+        path = self.directory / f"{chunk['id']}.npz"
+        tmp_path = path.with_name(path.stem + ".tmp.npz")
+        np.savez_compressed(
+            tmp_path,
+            latitude=chunk["latitude"],
+            longitude=chunk["longitude"],
+            **arrays,
+        )
+        tmp_path.replace(path)
+        return len(arrays["time"])
+
+    def size(self) -> int:
+        """每块独立成文件，无需记录大小"""
+        return 0
+
+    def close(self) -> None:
+        """无需清理"""
+
+
+def _resolve_cities(
+    cities: Iterable[str], checkpoint: Checkpoint
+) -> Dict[str, Dict]:
+    """
+    解析所有城市坐标，已记录在断点中的城市不再请求。
+
+    Args:
+        cities: 城市名列表
+        checkpoint: 断点记录
+
+    Returns:
+        城市名 -> 坐标信息
+    """
+    resolved = {}
+    for city in cities:
+        if city not in checkpoint.coordinates:
+            checkpoint.set_coordinates(city, get_coordinates(city))
+        resolved[city] = checkpoint.coordinates[city]
+    return resolved
+
+
+def export_history(
+    cities: List[str],
+    start: date,
+    end: date,
+    output: Path,
+    output_format: str = "csv",
+    resolution: str = "daily",
+    variables: Optional[List[str]] = None,
+    chunk_days: int = 90,
+    workers: int = 4,
+    checkpoint_path: Optional[Path] = None,
+) -> Dict[str, int]:
+    """
+    导出多个城市在一段日期范围内的历史天气数据。
+
+    Args:
+        cities: 城市名列表
+        start: 开始日期
+        end: 结束日期（包含）
+        output: csv 格式为输出文件，npz 格式为输出目录
+        output_format: "csv" 或 "npz"
+        resolution: "daily" 或 "hourly"
+        variables: 要导出的变量，默认使用 DEFAULT_VARIABLES
+        chunk_days: 每个请求覆盖的最大天数
+        workers: 并行下载的最大请求数
+        checkpoint_path: 断点日志路径，默认放在输出旁边
+
+    Returns:
+        统计信息: chunks, skipped, downloaded, failed, rows
+
+    Raises:
+        ValueError: 参数不合法或城市无法解析时抛出
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {output_format}")
+    if resolution not in DEFAULT_VARIABLES:
+        raise ValueError(f"不支持的时间分辨率: {resolution}")
+    if workers < 1:
+        raise ValueError(f"并发数必须为正整数: {workers}")
+    variables = variables or DEFAULT_VARIABLES[resolution]
+    output = Path(output)
+
+    if checkpoint_path is None:
+        if output_format == "csv":
+            checkpoint_path = output.with_name(output.name + ".checkpoint")
+        else:
+            checkpoint_path = output / "checkpoint"
+    checkpoint = Checkpoint(checkpoint_path, {
+        "cities": list(cities),
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "resolution": resolution,
+        "variables": list(variables),
+        "chunk_days": chunk_days,
+        "output_format": output_format,
+    })
+
+    if output_format == "csv":
+        # 输出被删除或截短时断点对应的数据已不在，截断会用 NUL 填充文件
+        size = output.stat().st_size if output.exists() else 0
+        if size < checkpoint.output_size:
+            logger.warning(f"输出文件比断点记录的短，重新开始: {output}")
+            checkpoint.reset()
+        # 没有断点时从头开始，覆盖旧的输出
+        writer = CsvHistoryWriter(output, variables, checkpoint.output_size)
+    else:
+        writer = NpzHistoryWriter(output, variables)
+
+    ranges = split_date_range(start, end, chunk_days)
+    stats = {"chunks": 0, "skipped": 0, "downloaded": 0, "failed": 0, "rows": 0}
+
+    def pending_chunks():
+        for city, info in _resolve_cities(cities, checkpoint).items():
+            for chunk_start, chunk_end in ranges:
+                chunk_id = (
+                    f"{_safe_name(city)}_{resolution}_"
+                    f"{chunk_start.isoformat()}_{chunk_end.isoformat()}"
+                )
+                stats["chunks"] += 1
+                if chunk_id in checkpoint.done:
+                    stats["skipped"] += 1
+                    continue
+                yield {
+                    "id": chunk_id,
+                    "city": city,
+                    "latitude": info["latitude"],
+                    "longitude": info["longitude"],
+                    "start": chunk_start.isoformat(),
+                    "end": chunk_end.isoformat(),
+                }
+
+    def download(chunk: Dict) -> Dict[str, list]:
+        return get_archive(
+            chunk["latitude"], chunk["longitude"],
+            chunk["start"], chunk["end"],
+            variables, resolution,
+        )
+
+    # 最多保持 workers * 2 个块在途，避免一次提交全部任务占用内存
+    max_in_flight = workers * 2
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = {}
+            chunks = pending_chunks()
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < max_in_flight:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    in_flight[executor.submit(download, chunk)] = chunk
+
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    try:
+                        columns = future.result()
+                    except ValueError as e:
+                        logger.error(f"下载失败 {chunk['id']}: {e}")
+                        stats["failed"] += 1
+                        continue
+                    with profile_phase("output"):
+                        stats["rows"] += writer.write_chunk(chunk, columns)
+                        checkpoint.mark_done(chunk["id"], writer.size())
+                    stats["downloaded"] += 1
+                    logger.debug(f"已完成 {chunk['id']}")
+    finally:
+        writer.close()
+        checkpoint.close()
+
+    logger.info(
+        f"历史数据导出完成: 共 {stats['chunks']} 块, 跳过 {stats['skipped']}, "
+        f"下载 {stats['downloaded']}, 失败 {stats['failed']}"
+    )
+    return stats
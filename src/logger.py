@@ -71,9 +71,6 @@ def setup_logger(
     Returns:
         配置好的日志记录器
     """
-    # 创建日志目录
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
-    
     # 获取或创建日志记录器
     logger = logging.getLogger("weather-cli")
     logger.setLevel(level)
@@ -95,6 +92,7 @@ def setup_logger(
     
     # 文件处理器（支持轮转）
     if log_to_file:
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
         file_handler = TimedRotatingFileHandler(
             LOG_FILE,
             when="midnight",  # 每天轮转
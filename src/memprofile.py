@@ -0,0 +1,237 @@
+"""
+内存分析模块
+
+基于 tracemalloc 按阶段（fetch / parse / format / output）统计峰值内存
+和主要分配位置。代码中用 profile_phase() 标记阶段，没有启用分析器时
+它什么也不做。tracemalloc 是进程级的，工作线程中的阶段同样会被统计；
+多个阶段并发时，峰值和分配位置会包含同一时段其他线程的分配。
+测试可以直接使用 MemoryProfiler 或 track_allocations() 断言分配预算。
+"""
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# 当前启用的分析器
+_active: Optional["MemoryProfiler"] = None
+
+# 统计时排除的文件（分析器本身）
+_EXCLUDE = frozenset([tracemalloc.__file__, __file__])
+
+
+class AllocationStats:
+    """
+    一段代码的内存分配统计
+
+    Attributes:
+        peak: 相对进入时的峰值增量（字节）
+        allocated: 退出时仍未释放的净分配量（字节）
+    """
+
+    def __init__(self):
+        self.peak = 0
+        self.allocated = 0
+
+    def __repr__(self) -> str:
+        return f"AllocationStats(peak={self.peak}, allocated={self.allocated})"
+
+
+class _Phase:
+    """单个阶段的累计统计"""
+
+    def __init__(self):
+        self.calls = 0
+        self.peak = 0
+        self.allocated = 0
+        self.sites: Dict[str, List[int]] = {}
+
+
+class MemoryProfiler:
+    """
+    按阶段统计内存分配的分析器（上下文管理器）
+
+    用法::
+
+        with MemoryProfiler() as profiler:
+            with profile_phase("parse"):
+                ...
+        report = profiler.report()
+    """
+
+    def __init__(self, top: int = 5, frames: int = 1):
+        """
+        Args:
+            top: 每个阶段报告的分配位置数量
+            frames: tracemalloc 记录的调用栈深度
+        """
+        self.top = top
+        self.frames = frames
+        self.peak = 0
+        self._phases: Dict[str, _Phase] = {}
+        # 正在进行的阶段: id -> [进入时内存, 期间峰值]
+        self._open: Dict[int, List[int]] = {}
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    def start(self) -> None:
+        """
+        启动分析并注册为当前分析器。
+
+        Raises:
+            RuntimeError: 已有分析器在运行时抛出
+        """
+        global _active
+        if _active is not None:
+            raise RuntimeError("已有内存分析器在运行")
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        _active = self
+
+    def stop(self) -> None:
+        """停止分析并记录总峰值"""
+        global _active
+        if _active is self:
+            _active = None
+        with self._lock:
+            self._note_peak()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> "MemoryProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _note_peak(self) -> None:
+        """
+        把当前 tracemalloc 峰值计入总峰值和所有正在进行的阶段（需持有锁）。
+
+        之后才能 reset_peak，否则其他阶段会丢失这段时间的峰值。
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak = max(self.peak, peak - self._baseline)
+        for frame in self._open.values():
+            frame[1] = max(frame[1], peak)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        统计一个阶段（可嵌套，可多次进入同名阶段并累计，可在任意线程中使用）。
+
+        Args:
+            name: 阶段名称
+        """
+        with self._lock:
+            self._note_peak()
+            tracemalloc.reset_peak()
+            before = tracemalloc.take_snapshot()
+            start = tracemalloc.get_traced_memory()[0]
+            frame = [start, start]
+            self._open[id(frame)] = frame
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._note_peak()
+                del self._open[id(frame)]
+                current = tracemalloc.get_traced_memory()[0]
+                after = tracemalloc.take_snapshot()
+
+            # 比较快照较慢，放在锁外进行
+            sites = []
+            for diff in after.compare_to(before, "lineno"):
+                frame_info = diff.traceback[0]
+                if diff.size_diff > 0 and frame_info.filename not in _EXCLUDE:
+                    sites.append((
+                        f"{frame_info.filename}:{frame_info.lineno}",
+                        diff.size_diff,
+                        max(0, diff.count_diff),
+                    ))
+
+            with self._lock:
+                stats = self._phases.setdefault(name, _Phase())
+                stats.calls += 1
+                stats.peak = max(stats.peak, frame[1] - start)
+                stats.allocated += current - start
+                for site, size, count in sites:
+                    totals = stats.sites.setdefault(site, [0, 0])
+                    totals[0] += size
+                    totals[1] += count
+
+    def report(self) -> Dict:
+        """
+        生成分析报告。
+
+        Returns:
+            {"peak": 总峰值, "phases": {阶段名: {calls, peak, allocated, top}}}，
+            top 为 [{"site", "size", "count"}]，按分配量降序，单位均为字节
+        """
+        phases = {}
+        with self._lock:
+            items = list(self._phases.items())
+        for name, stats in items:
+            top = sorted(stats.sites.items(), key=lambda item: -item[1][0])
+            phases[name] = {
+                "calls": stats.calls,
+                "peak": stats.peak,
+                "allocated": stats.allocated,
+                "top": [
+                    {"site": site, "size": size, "count": count}
+                    for site, (size, count) in top[:self.top]
+                ],
+            }
+        return {"peak": self.peak, "phases": phases}
+
+
+@contextmanager
+def profile_phase(name: str) -> Iterator[None]:
+    """
+    标记一个分析阶段。
+
+    没有启用分析器时不做任何事。
+
+    Args:
+        name: 阶段名称，例如 fetch / parse / format / output
+    """
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.phase(name):
+        yield
+
+
+@contextmanager
+def track_allocations() -> Iterator[AllocationStats]:
+    """
+    统计一段代码的峰值和净分配量，供测试断言分配预算。
+
+    用法::
+
+        with track_allocations() as stats:
+            format_json(...)
+        assert stats.peak < 64 * 1024
+
+    Yields:
+        AllocationStats，退出上下文后填充数据
+    """
+    stats = AllocationStats()
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        yield stats
+        current, peak = tracemalloc.get_traced_memory()
+        stats.peak = peak - start
+        stats.allocated = current - start
+    finally:
+        if started:
+            tracemalloc.stop()
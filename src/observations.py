@@ -0,0 +1,367 @@
+"""
+本地观测记录模块
+
+把查询到的当前天气追加写入 ~/.weather-cli/observations/ 下按地点划分的
+二进制文件。每条记录为定长结构 (时间戳, 温度, 天气代码)，
+另有一个按时间排序的索引文件 (时间戳, 记录序号)，查询时通过内存映射
+对索引二分查找，时间范围查询为 O(log n)。
+记录文件只追加；定期压缩时按时间重写、去重并删除超过保留期的记录。
+"""
+import logging
+import math
+import mmap
+import re
+import struct
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from config import CONFIG_DIR
+from storage import atomic_write_bytes, file_lock
+
+logger = logging.getLogger("weather-cli.observations")
+
+OBSERVATIONS_DIR = CONFIG_DIR / "observations"
+
+# 记录: 时间戳 (秒, UTC), 温度 (float32, 缺失为 NaN), 天气代码 (缺失为 -1)
+RECORD = struct.Struct("<qfhxx")
+# 索引项: 时间戳, 记录序号
+INDEX_ENTRY = struct.Struct("<qq")
+
+# 每追加多少条记录压缩一次
+COMPACT_EVERY = 500
+
+_RELATIVE_RE = re.compile(r"^(\d+)\s*([mhdw])$")
+_RELATIVE_UNITS = {"m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def location_id(lat: float, lon: float) -> str:
+    """
+    根据坐标生成地点标识（保留两位小数，约 1 km）。
+
+    Args:
+        lat: 纬度
+        lon: 经度
+
+    Returns:
+        地点标识，例如 "39.90_116.40"
+    """
+    return f"{lat:.2f}_{lon:.2f}"
+
+
+def parse_time(text: str) -> int:
+    """
+    将 API 返回的 ISO 时间转换为 UTC 时间戳。
+
+    Open-Meteo 未指定 timezone 时返回 GMT 时间，不带时区后缀。
+
+    Args:
+        text: ISO 时间字符串，例如 "2026-03-01T12:00"
+
+    Returns:
+        UTC 秒级时间戳
+
+    Raises:
+        ValueError: 格式错误时抛出
+    """
+    parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def format_time(timestamp: int) -> str:
+    """将 UTC 时间戳格式化为与 API 相同的 ISO 时间"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M")
+
+
+def parse_since(text: str, now: Optional[datetime] = None) -> int:
+    """
+    解析 --since 参数。
+
+    Args:
+        text: 相对时间 (30m, 6h, 2d, 1w) 或 ISO 日期/时间 (UTC)
+        now: 当前时间（便于测试）
+
+    Returns:
+        UTC 秒级时间戳
+
+    Raises:
+        ValueError: 格式错误时抛出
+    """
+    text = text.strip()
+    match = _RELATIVE_RE.match(text)
+    if match:
+        now = now or datetime.now(timezone.utc)
+        delta = timedelta(**{_RELATIVE_UNITS[match.group(2)]: int(match.group(1))})
+        return int((now - delta).timestamp())
+    try:
+        return parse_time(text)
+    except ValueError:
+        raise ValueError(
+            f"无效的时间: '{text}'，应为 30m / 6h / 2d / 1w 或 YYYY-MM-DD[THH:MM]"
+        )
+
+
+class _Timestamps:
+    """把内存映射的索引包装成时间戳序列，供 bisect 使用"""
+
+    def __init__(self, buffer: mmap.mmap, count: int):
+        self._buffer = buffer
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> int:
+        return INDEX_ENTRY.unpack_from(self._buffer, i * INDEX_ENTRY.size)[0]
+
+
+@contextmanager
+def _mapped(path: Path) -> Iterator[Optional[mmap.mmap]]:
+    """只读内存映射文件，空文件或不存在时返回 None"""
+    try:
+        f = path.open("rb")
+    except FileNotFoundError:
+        yield None
+        return
+    with f:
+        if path.stat().st_size == 0:
+            yield None
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+class ObservationLog:
+    """
+    单个地点的观测记录
+
+    数据文件 <id>.bin 为定长记录的追加日志，索引文件 <id>.idx 为按时间
+    排序的 (时间戳, 记录序号)。按时间顺序追加时索引同步追加；
+    乱序追加时索引在下次查询时重建。读写由同名 .lock 文件锁保护。
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path: 数据文件路径（.bin），索引和锁文件放在同一目录
+        """
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".idx")
+        self.lock_path = self.path.with_suffix(".lock")
+
+    def _count(self, path: Path, size: int) -> int:
+        """文件中完整的记录条数"""
+        try:
+            return path.stat().st_size // size
+        except FileNotFoundError:
+            return 0
+
+    def count(self) -> int:
+        """
+        获取记录条数（包括尚未压缩的重复记录）。
+
+        Returns:
+            数据文件中的记录条数
+        """
+        return self._count(self.path, RECORD.size)
+
+    def _last_timestamp(self, path: Path, entry: struct.Struct) -> Optional[int]:
+        """读取文件最后一条记录的时间戳"""
+        count = self._count(path, entry.size)
+        if count == 0:
+            return None
+        with path.open("rb") as f:
+            f.seek((count - 1) * entry.size)
+            return entry.unpack(f.read(entry.size))[0]
+
+    def append(self, timestamp: int, temperature: Optional[float],
+               weather_code: Optional[int]) -> bool:
+        """
+        追加一条观测记录。
+
+        与最后一条记录时间相同的观测（例如命中缓存的重复查询）会被忽略。
+
+        Args:
+            timestamp: UTC 秒级时间戳
+            temperature: 温度 (°C)
+            weather_code: WMO 天气代码
+
+        Returns:
+            是否写入了新记录
+        """
+        record = RECORD.pack(
+            timestamp,
+            math.nan if temperature is None else temperature,
+            -1 if weather_code is None else weather_code,
+        )
+        with file_lock(self.lock_path):
+            if self._last_timestamp(self.path, RECORD) == timestamp:
+                return False
+
+            count = self._count(self.path, RECORD.size)
+            with self.path.open("ab") as f:
+                f.write(record)
+
+            # 索引与数据同步且时间有序时直接追加，否则留待查询时重建
+            last_indexed = self._last_timestamp(self.index_path, INDEX_ENTRY)
+            in_sync = self._count(self.index_path, INDEX_ENTRY.size) == count
+            if in_sync and (last_indexed is None or timestamp >= last_indexed):
+                with self.index_path.open("ab") as f:
+                    f.write(INDEX_ENTRY.pack(timestamp, count))
+            return True
+
+    def _rebuild_index(self) -> None:
+        """按时间重新排序生成索引（需持有锁）"""
+        entries = []
+        with _mapped(self.path) as buffer:
+            if buffer is not None:
+                for i in range(len(buffer) // RECORD.size):
+                    timestamp = RECORD.unpack_from(buffer, i * RECORD.size)[0]
+                    entries.append((timestamp, i))
+        entries.sort()
+        atomic_write_bytes(
+            self.index_path,
+            b"".join(INDEX_ENTRY.pack(t, i) for t, i in entries),
+        )
+        logger.debug(f"重建观测索引: {self.path.name}, {len(entries)} 条")
+
+    def query(self, since: int, until: Optional[int] = None) -> List[Dict]:
+        """
+        查询时间范围内的观测记录。
+
+        Args:
+            since: 起始时间戳（含）
+            until: 结束时间戳（含），默认不限
+
+        Returns:
+            按时间排序的 {time, timestamp, temperature, weather_code} 列表
+        """
+        with file_lock(self.lock_path):
+            records = self._count(self.path, RECORD.size)
+            if self._count(self.index_path, INDEX_ENTRY.size) != records:
+                self._rebuild_index()
+
+            results = []
+            with _mapped(self.index_path) as index, _mapped(self.path) as data:
+                if index is None or data is None:
+                    return results
+                timestamps = _Timestamps(index, records)
+                start = bisect_left(timestamps, since)
+                stop = records if until is None else bisect_right(timestamps, until)
+                for i in range(start, stop):
+                    _, record_no = INDEX_ENTRY.unpack_from(index, i * INDEX_ENTRY.size)
+                    timestamp, temp, code = RECORD.unpack_from(
+                        data, record_no * RECORD.size
+                    )
+                    results.append({
+                        "time": format_time(timestamp),
+                        "timestamp": timestamp,
+                        "temperature": None if math.isnan(temp) else round(temp, 2),
+                        "weather_code": None if code < 0 else code,
+                    })
+            return results
+
+    def compact(self, retention_days: int = 0, now: Optional[float] = None) -> int:
+        """
+        压缩记录: 按时间排序、同一时间只保留最后写入的一条，并删除过期记录。
+
+        Args:
+            retention_days: 保留天数，0 表示不删除
+            now: 当前时间戳（便于测试）
+
+        Returns:
+            压缩后的记录条数
+        """
+        if now is None:
+            now = datetime.now(timezone.utc).timestamp()
+        cutoff = now - retention_days * 86400 if retention_days > 0 else None
+
+        with file_lock(self.lock_path):
+            latest: Dict[int, bytes] = {}
+            with _mapped(self.path) as buffer:
+                if buffer is not None:
+                    for i in range(len(buffer) // RECORD.size):
+                        raw = buffer[i * RECORD.size:(i + 1) * RECORD.size]
+                        timestamp = RECORD.unpack(raw)[0]
+                        if cutoff is None or timestamp >= cutoff:
+                            latest[timestamp] = raw
+
+            ordered = sorted(latest)
+            atomic_write_bytes(self.path, b"".join(latest[t] for t in ordered))
+            atomic_write_bytes(
+                self.index_path,
+                b"".join(INDEX_ENTRY.pack(t, i) for i, t in enumerate(ordered)),
+            )
+        logger.debug(f"压缩观测记录: {self.path.name}, 剩余 {len(ordered)} 条")
+        return len(ordered)
+
+
+def get_log(lat: float, lon: float, directory: Optional[Path] = None) -> ObservationLog:
+    """
+    获取坐标对应地点的观测记录。
+
+    Args:
+        lat: 纬度
+        lon: 经度
+        directory: 存储目录，默认 ~/.weather-cli/observations
+
+    Returns:
+        ObservationLog 实例
+    """
+    directory = Path(directory) if directory is not None else OBSERVATIONS_DIR
+    return ObservationLog(directory / f"{location_id(lat, lon)}.bin")
+
+
+def record_observation(
+    lat: float,
+    lon: float,
+    weather: Dict,
+    retention_days: int = 0,
+    directory: Optional[Path] = None,
+) -> bool:
+    """
+    记录一次 get_weather() 的结果，每 COMPACT_EVERY 条记录压缩一次。
+
+    Args:
+        lat: 纬度
+        lon: 经度
+        weather: get_weather() 返回的天气字典（需要 time 字段）
+        retention_days: 压缩时的保留天数，0 表示不删除
+        directory: 存储目录，默认 ~/.weather-cli/observations
+
+    Returns:
+        是否写入了新记录
+
+    Raises:
+        ValueError: time 字段缺失或格式错误时抛出
+    """
+    if not weather.get("time"):
+        raise ValueError("天气数据缺少 time 字段，无法记录")
+    log = get_log(lat, lon, directory)
+    written = log.append(
+        parse_time(weather["time"]),
+        weather.get("temperature"),
+        weather.get("weather_code"),
+    )
+    if written and log.count() % COMPACT_EVERY == 0:
+        log.compact(retention_days)
+    return written
+
+
+def query_observations(
+    lat: float,
+    lon: float,
+    since: int,
+    until: Optional[int] = None,
+    directory: Optional[Path] = None,
+) -> List[Dict]:
+    """
+    查询坐标对应地点在时间范围内的观测记录。
+
+    参见 ObservationLog.query。
+    """
+    return get_log(lat, lon, directory).query(since, until)
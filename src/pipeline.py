@@ -0,0 +1,432 @@
+"""
+流式批量查询模块
+
+从 CSV 或 JSON Lines 文件中逐行读取坐标，经过
+读取 → 去重/查询 → 格式化 → 写出 几个由有界队列连接的阶段，
+下游变慢时上游自动阻塞，内存占用与输入文件大小无关。
+输出按输入顺序逐行写出，并定期记录断点，中断后可从断点继续。
+"""
+import csv
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from memprofile import profile_phase
+from storage import atomic_write_json, read_json
+from weather import UpstreamUnavailableError, get_weather, parse_weather_code
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+logger = logging.getLogger("weather-cli.pipeline")
+
+# 可识别的坐标列名
+LATITUDE_KEYS = ("latitude", "lat")
+LONGITUDE_KEYS = ("longitude", "lon", "lng")
+ID_KEYS = ("id", "name")
+
+OUTPUT_FIELDS = [
+    "id", "latitude", "longitude",
+    "temperature", "weather_code", "weather", "time", "error",
+]
+
+# 队列结束标记
+_DONE = object()
+
+
+def _is_jsonl(path: Path) -> bool:
+    """根据扩展名判断是否为 JSON Lines 文件"""
+    return path.suffix.lower() in (".jsonl", ".ndjson")
+
+
+def _pick(record: Dict, keys: Tuple[str, ...]) -> Optional[str]:
+    """按候选列名取第一个存在的值"""
+    for key in keys:
+        if record.get(key) not in (None, ""):
+            return record[key]
+    return None
+
+
+def iter_locations(path: Path, start: int = 0) -> Iterator[Dict]:
+    """
+    逐行读取坐标文件。
+
+    CSV 需要表头，JSON Lines 每行一个对象；坐标列可以是
+    latitude/lat 和 longitude/lon/lng，可选的 id/name 列作为标识。
+
+    Args:
+        path: 输入文件路径
+        start: 跳过前 start 条记录（断点续传）
+
+    Yields:
+        {"offset", "id", "latitude", "longitude", "error"} 字典，
+        坐标无法解析时 latitude/longitude 为 None 并带有 error
+    """
+    path = Path(path)
+    with path.open("r", encoding="utf-8", newline="") as f:
+        if _is_jsonl(path):
+            records = (json.loads(line) for line in f if line.strip())
+        else:
+            records = csv.DictReader(f)
+
+        for offset, record in enumerate(records):
+            if offset < start:
+                continue
+            item = {
+                "offset": offset,
+                "id": _pick(record, ID_KEYS) or str(offset),
+                "latitude": None,
+                "longitude": None,
+                "error": None,
+            }
+            try:
+                item["latitude"] = float(_pick(record, LATITUDE_KEYS))
+                item["longitude"] = float(_pick(record, LONGITUDE_KEYS))
+            except (TypeError, ValueError):
+                item["error"] = "无效坐标"
+            yield item
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    获取当前进程的峰值常驻内存。
+
+    Returns:
+        峰值内存 (MB)，平台不支持时返回 None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return peak / divisor
+
+
+class _DedupeCache:
+    """
+    按吸附后的坐标去重的有界 LRU 缓存
+
+    只缓存成功的查询结果（天气字典），超出容量时淘汰最久未使用的条目。
+    正在查询的坐标另外登记一个 Event，同一坐标的并发请求等待它完成，
+    这部分条目数不超过工作线程数。查询失败不缓存，等待者会自己重试。
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self._results: "OrderedDict[Tuple[float, float], Dict]" = OrderedDict()
+        self._pending: Dict[Tuple[float, float], threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get_or_reserve(self, key: Tuple[float, float]) -> Optional[Dict]:
+        """
+        获取坐标对应的查询结果。
+
+        Returns:
+            缓存的结果；返回 None 表示调用方负责查询，
+            之后必须调用 resolve() 或 release()
+        """
+        while True:
+            with self._lock:
+                result = self._results.get(key)
+                if result is not None:
+                    self._results.move_to_end(key)
+                    self.hits += 1
+                    return result
+                event = self._pending.get(key)
+                if event is None:
+                    self._pending[key] = threading.Event()
+                    return None
+            event.wait()
+
+    def resolve(self, key: Tuple[float, float], result: Dict) -> None:
+        """保存查询结果并唤醒等待者"""
+        with self._lock:
+            self._results[key] = result
+            if len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+            self._pending.pop(key).set()
+
+    def release(self, key: Tuple[float, float]) -> None:
+        """查询失败: 不缓存，唤醒等待者由其重试"""
+        with self._lock:
+            self._pending.pop(key).set()
+
+
+class _Writer:
+    """CSV / JSON Lines 输出写入器"""
+
+    def __init__(self, path: Path, truncate_to: int):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._jsonl = _is_jsonl(self.path)
+        exists = self.path.exists()
+        self._file = self.path.open("a+", encoding="utf-8", newline="")
+        if exists:
+            # 丢弃上次中断时已写出但未记入断点的行
+            self._file.truncate(truncate_to)
+            self._file.seek(truncate_to)
+        self._csv = None if self._jsonl else csv.writer(self._file)
+        if self._csv is not None and self._file.tell() == 0:
+            self._csv.writerow(OUTPUT_FIELDS)
+
+    def format(self, row: Dict):
+        """将结果行格式化为 JSON 文本或 CSV 单元格列表"""
+        if self._jsonl:
+            return json.dumps(row, ensure_ascii=False) + "\n"
+        return [row[k] for k in OUTPUT_FIELDS]
+
+    def write(self, formatted) -> None:
+        """写出一行已格式化的结果"""
+        if self._jsonl:
+            self._file.write(formatted)
+        else:
+            self._csv.writerow(formatted)
+
+    def flush(self) -> int:
+        """刷新到磁盘并返回当前文件大小"""
+        self._file.flush()
+        return self._file.tell()
+
+    def close(self) -> None:
+        """关闭文件"""
+        self._file.close()
+
+
+def stream_weather(
+    input_path: Path,
+    output_path: Path,
+    workers: int = 4,
+    snap: float = 0.01,
+    queue_size: int = 256,
+    dedupe_size: int = 100_000,
+    checkpoint_every: int = 1000,
+    checkpoint_path: Optional[Path] = None,
+    fetch: Callable[[float, float], Dict] = get_weather,
+) -> Dict:
+    """
+    流式查询大量坐标的当前天气。
+
+    Args:
+        input_path: 输入文件 (CSV 或 .jsonl)
+        output_path: 输出文件 (CSV 或 .jsonl)，续传时追加写入
+        workers: 并行查询线程数
+        snap: 坐标吸附精度（度），吸附后相同的坐标只查询一次
+        queue_size: 各阶段之间队列的容量，也是在途行数的上限
+        dedupe_size: 去重缓存的最大条目数（只保存结果字典）
+        checkpoint_every: 每写出多少行记录一次断点
+        checkpoint_path: 断点文件，默认为 <输出>.checkpoint.json
+        fetch: 查询函数 (lat, lon) -> 天气字典
+
+    Returns:
+        统计信息: rows, fetched, deduped, failed, resumed_from,
+        elapsed, rows_per_sec, peak_rss_mb
+
+    Raises:
+        ValueError: 参数不合法或输入文件读取失败时抛出
+        UpstreamUnavailableError: 上游熔断时抛出；断点停在第一个未完成的行，
+            冷却后重新运行即可继续
+    """
+    if workers < 1:
+        raise ValueError(f"并发数必须为正整数: {workers}")
+    if snap <= 0:
+        raise ValueError(f"坐标吸附精度必须大于 0: {snap}")
+    output_path = Path(output_path)
+    if checkpoint_path is None:
+        checkpoint_path = output_path.with_name(
+            output_path.name + ".checkpoint.json"
+        )
+
+    checkpoint = read_json(checkpoint_path, default={}) or {}
+    if checkpoint.get("input") != str(Path(input_path).resolve()):
+        checkpoint = {}
+    start_offset = checkpoint.get("offset", 0)
+    if start_offset:
+        logger.info(f"从断点继续: 第 {start_offset} 行")
+
+    # 没有有效断点时从头开始，覆盖旧的输出
+    writer = _Writer(output_path, checkpoint.get("output_size", 0))
+    dedupe = _DedupeCache(dedupe_size)
+    to_fetch: queue.Queue = queue.Queue(maxsize=queue_size)
+    to_format: queue.Queue = queue.Queue(maxsize=queue_size)
+    to_write: queue.Queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    # 在途窗口: 读取前占用一个名额，按顺序写出后归还
+    window = threading.Semaphore(queue_size)
+    read_errors = []
+    stats = {"rows": 0, "fetched": 0, "failed": 0}
+    stats_lock = threading.Lock()
+
+    def put(q: queue.Queue, item) -> bool:
+        """带停止检查的阻塞写入，实现背压"""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def take(q: queue.Queue):
+        """带停止检查的阻塞读取，停止后返回 _DONE"""
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def read_stage() -> None:
+        try:
+            for item in iter_locations(input_path, start_offset):
+                while not window.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                if not put(to_fetch, item):
+                    return
+        except (OSError, ValueError) as e:
+            # 正常结束后续阶段，已读取的行仍会写出并记入断点
+            logger.error(f"读取输入失败: {e}")
+            read_errors.append(e)
+        finally:
+            for _ in range(workers):
+                put(to_fetch, _DONE)
+
+    def fetch_stage() -> None:
+        while True:
+            item = take(to_fetch)
+            if item is _DONE:
+                put(to_format, _DONE)
+                return
+            if item["error"] is None:
+                key = (
+                    round(round(item["latitude"] / snap) * snap, 6),
+                    round(round(item["longitude"] / snap) * snap, 6),
+                )
+                result = dedupe.get_or_reserve(key)
+                if result is None:
+                    try:
+                        result = fetch(*key)
+                    except UpstreamUnavailableError as e:
+                        # 熔断: 该行不写出，由写出阶段停止整个流程
+                        dedupe.release(key)
+                        item["unavailable"] = e
+                    except Exception as e:
+                        dedupe.release(key)
+                        item["error"] = str(e)
+                    else:
+                        dedupe.resolve(key, result)
+                        with stats_lock:
+                            stats["fetched"] += 1
+                item["weather"] = result
+            if not put(to_format, item):
+                return
+
+    def format_stage() -> None:
+        with profile_phase("format"):
+            finished = 0
+            while finished < workers:
+                item = take(to_format)
+                if item is _DONE:
+                    finished += 1
+                    continue
+                if "unavailable" in item:
+                    if not put(to_write, (item["offset"], None, item["unavailable"])):
+                        return
+                    continue
+                weather = item.get("weather") or {}
+                code = weather.get("weather_code")
+                row = {
+                    "id": item["id"],
+                    "latitude": item["latitude"],
+                    "longitude": item["longitude"],
+                    "temperature": weather.get("temperature"),
+                    "weather_code": code,
+                    "weather": parse_weather_code(code) if code is not None else None,
+                    "time": weather.get("time"),
+                    "error": item["error"],
+                }
+                message = (item["offset"], writer.format(row), item["error"])
+                if not put(to_write, message):
+                    return
+            put(to_write, _DONE)
+
+    threads = [threading.Thread(target=read_stage, daemon=True)]
+    threads += [
+        threading.Thread(target=fetch_stage, daemon=True) for _ in range(workers)
+    ]
+    threads.append(threading.Thread(target=format_stage, daemon=True))
+
+    def save_checkpoint(offset: int) -> None:
+        atomic_write_json(checkpoint_path, {
+            "input": str(Path(input_path).resolve()),
+            "offset": offset,
+            "output_size": writer.flush(),
+        })
+
+    started = time.monotonic()
+    next_offset = start_offset
+    # 乱序完成的结果暂存，受在途窗口限制最多 queue_size 条
+    pending: Dict[int, Tuple] = {}
+    unavailable: Optional[UpstreamUnavailableError] = None
+    try:
+        for thread in threads:
+            thread.start()
+
+        # 写出阶段在主线程: 按输入顺序写出
+        with profile_phase("output"):
+            while unavailable is None:
+                message = to_write.get()
+                if message is _DONE:
+                    break
+                offset, formatted, error = message
+                pending[offset] = (formatted, error)
+                while next_offset in pending:
+                    formatted, error = pending.pop(next_offset)
+                    if formatted is None:
+                        # 上游熔断: 不写出该行，断点停在这里
+                        unavailable = error
+                        break
+                    writer.write(formatted)
+                    window.release()
+                    stats["rows"] += 1
+                    if error:
+                        stats["failed"] += 1
+                    next_offset += 1
+                    if stats["rows"] % checkpoint_every == 0:
+                        save_checkpoint(next_offset)
+        save_checkpoint(next_offset)
+    finally:
+        stop.set()
+        writer.close()
+
+    if unavailable is not None:
+        logger.error(f"上游不可用，已在第 {next_offset} 行保存断点: {unavailable}")
+        raise unavailable
+    if read_errors:
+        raise ValueError(f"读取输入失败: {read_errors[0]}")
+
+    elapsed = time.monotonic() - started
+    result = {
+        "rows": stats["rows"],
+        "fetched": stats["fetched"],
+        "deduped": dedupe.hits,
+        "failed": stats["failed"],
+        "resumed_from": start_offset,
+        "elapsed": elapsed,
+        "rows_per_sec": stats["rows"] / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    logger.info(
+        f"流式查询完成: {result['rows']} 行, 查询 {result['fetched']} 次, "
+        f"去重 {result['deduped']} 次, 失败 {result['failed']} 行"
+    )
+    return result
@@ -0,0 +1,82 @@
+"""
+客户端限流模块
+
+基于令牌桶算法限制对 Open-Meteo 的请求速率。桶的状态保存在
+~/.weather-cli/ 下的一个小文件中并由文件锁保护，多个并发的
+cli.py 进程共享同一个桶，超出速率时调用方短暂等待而不是失败。
+"""
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from storage import StateStore
+
+logger = logging.getLogger("weather-cli.ratelimit")
+
+
+class TokenBucket:
+    """
+    跨进程共享的令牌桶
+
+    令牌以 rate 个/秒的速度补充，最多积累 capacity 个。令牌不足时
+    调用方预订下一个令牌（令牌数可以为负），然后休眠到令牌可用，
+    因此并发的调用方会按到达顺序依次放行。
+    """
+
+    def __init__(
+        self,
+        state_file: Optional[Path],
+        rate: float,
+        capacity: int,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            state_file: 状态文件路径，锁文件为同名 .lock 文件；
+                为 None 时状态只保存在内存中
+            rate: 每秒补充的令牌数，必须大于 0
+            capacity: 桶容量（允许的突发请求数）
+            clock: 时间函数（便于测试）
+            sleep: 休眠函数（便于测试）
+        """
+        if rate <= 0:
+            raise ValueError(f"限流速率必须大于 0: {rate}")
+        self._store = StateStore(state_file)
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._clock = clock
+        self._sleep = sleep
+
+    def reserve(self) -> float:
+        """
+        预订一个令牌。
+
+        Returns:
+            需要等待的秒数，0 表示可以立即请求
+        """
+        with self._store.transaction() as state:
+            now = self._clock()
+            tokens = state.get("tokens", float(self.capacity))
+            updated = state.get("updated", now)
+
+            elapsed = max(0.0, now - updated)
+            tokens = min(float(self.capacity), tokens + elapsed * self.rate)
+            tokens -= 1
+            wait = 0.0 if tokens >= 0 else -tokens / self.rate
+
+            state.update(tokens=tokens, updated=now)
+        return wait
+
+    def acquire(self) -> float:
+        """
+        获取一个令牌，必要时阻塞等待。
+
+        Returns:
+            实际等待的秒数
+        """
+        wait = self.reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
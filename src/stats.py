@@ -0,0 +1,355 @@
+"""
+预报统计模块
+
+把多个城市的逐日预报 (forecast_stats) 或逐小时预报 (hourly_stats) 装入
+(城市 × 时间) 矩阵，一次性计算均值、极值、分位数、滑动平均、
+雨天（降水小时）数和度日数。安装了 numpy 时使用向量化计算，
+否则退化为纯 Python 实现，两者结果一致。
+温度缺失 (null) 的时间点以 NaN 保留在时间轴上，不参与统计；
+包含缺失值的滑动窗口以及无法计算的统计量为 None。
+"""
+import math
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖
+    np = None
+
+# 度日数的默认基准温度 (°C)
+DEFAULT_BASE_TEMP = 18.0
+
+# 默认滑动窗口天数
+DEFAULT_WINDOW = 3
+
+# 逐小时统计的默认滑动窗口小时数
+DEFAULT_HOURLY_WINDOW = 24
+
+# 默认分位数
+DEFAULT_PERCENTILES = (10, 50, 90)
+
+# 视为降雨的 WMO 天气代码：毛毛雨、雨、冻雨、阵雨、雷暴
+RAIN_CODES = frozenset(
+    [51, 53, 55, 56, 57, 61, 63, 65, 66, 67, 80, 81, 82, 95, 96, 99]
+)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """
+    线性插值分位数，与 numpy.percentile 默认方法一致。
+
+    Args:
+        values: 已排序的数值列表
+        q: 分位数 (0-100)
+
+    Returns:
+        分位数值
+    """
+    if not values:
+        return math.nan
+    pos = (len(values) - 1) * q / 100
+    lower = math.floor(pos)
+    upper = math.ceil(pos)
+    return values[lower] + (values[upper] - values[lower]) * (pos - lower)
+
+
+def _stats_python(
+    names: List[str],
+    high_rows: List[List[float]],
+    low_rows: List[List[float]],
+    wet_rows: List[Optional[List[bool]]],
+    base_temp: float,
+    window: int,
+    percentiles: Sequence[int],
+    steps_per_day: int,
+) -> List[Dict]:
+    """纯 Python 实现，逐城市计算"""
+    results = []
+    for name, highs, lows, wet in zip(names, high_rows, low_rows, wet_rows):
+        means = [(h + l) / 2 for h, l in zip(highs, lows)]
+        present = [m for m in means if not math.isnan(m)]
+        ordered = sorted(present)
+        rolling = []
+        for i in range(len(means) - window + 1):
+            values = means[i:i + window]
+            if any(math.isnan(v) for v in values):
+                rolling.append(math.nan)
+            else:
+                rolling.append(sum(values) / window)
+        valid_highs = [h for h in highs if not math.isnan(h)]
+        valid_lows = [l for l in lows if not math.isnan(l)]
+        results.append({
+            "name": name,
+            "count": len(present),
+            "mean_temp": sum(present) / len(present) if present else math.nan,
+            "max_temp": max(valid_highs) if valid_highs else math.nan,
+            "min_temp": min(valid_lows) if valid_lows else math.nan,
+            "percentiles": {
+                f"p{q}": _percentile(ordered, q) for q in percentiles
+            },
+            "wet": None if wet is None else sum(wet),
+            "hdd": sum(max(0.0, base_temp - m) for m in present) / steps_per_day,
+            "cdd": sum(max(0.0, m - base_temp) for m in present) / steps_per_day,
+            "rolling_mean": rolling,
+        })
+    return results
+
+
+def _stats_numpy(
+    names: List[str],
+    high_rows: List[List[float]],
+    low_rows: List[List[float]],
+    wet_rows: List[Optional[List[bool]]],
+    base_temp: float,
+    window: int,
+    percentiles: Sequence[int],
+    steps_per_day: int,
+) -> List[Dict]:
+    """numpy 向量化实现，所有城市一次计算，长度不一的行以 NaN 补齐"""
+    lengths = np.array([len(row) for row in high_rows], dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+    if width == 0:
+        # 所有城市都没有数据，无法对空矩阵做归约
+        return _stats_python(
+            names, high_rows, low_rows, wet_rows,
+            base_temp, window, percentiles, steps_per_day,
+        )
+    inside = np.arange(width)[None, :] < lengths[:, None]
+
+    highs = np.full((len(names), width), np.nan)
+    lows = np.full((len(names), width), np.nan)
+    wet = np.zeros((len(names), width), dtype=bool)
+    highs[inside] = np.concatenate(high_rows)
+    lows[inside] = np.concatenate(low_rows)
+    wet[inside] = np.concatenate([
+        row if row is not None else [False] * n
+        for row, n in zip(wet_rows, lengths)
+    ]).astype(bool)
+
+    means = (highs + lows) / 2
+    # 补齐位置和缺失值都是 NaN
+    valid = ~np.isnan(means)
+    counts = valid.sum(axis=1)
+    has_data = counts > 0
+    safe = np.where(valid, means, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_temp = safe.sum(axis=1) / counts
+    max_temp = np.where(
+        has_data, np.max(np.where(valid, highs, -np.inf), axis=1), np.nan
+    )
+    min_temp = np.where(
+        has_data, np.min(np.where(valid, lows, np.inf), axis=1), np.nan
+    )
+
+    # 把无效位置排到末尾后按行排序，再对每行做线性插值
+    ordered = np.sort(np.where(valid, means, np.inf), axis=1)
+    rows = np.arange(len(names))
+    pct = {}
+    for q in percentiles:
+        pos = np.maximum(counts - 1, 0) * q / 100
+        lower = np.floor(pos).astype(np.int64)
+        upper = np.ceil(pos).astype(np.int64)
+        lo_val = ordered[rows, lower]
+        hi_val = ordered[rows, upper]
+        with np.errstate(invalid="ignore"):
+            value = lo_val + (hi_val - lo_val) * (pos - lower)
+        pct[f"p{q}"] = np.where(has_data, value, np.nan)
+
+    wet_count = wet.sum(axis=1)
+    hdd = np.where(valid, np.maximum(0.0, base_temp - means), 0.0).sum(axis=1)
+    cdd = np.where(valid, np.maximum(0.0, means - base_temp), 0.0).sum(axis=1)
+
+    # 滑动平均: 用累积和一次算出所有窗口，包含缺失值的窗口记为 NaN
+    if width >= window:
+        cumsum = np.cumsum(np.pad(safe, ((0, 0), (1, 0))), axis=1)
+        missing = np.cumsum(np.pad(~valid, ((0, 0), (1, 0))), axis=1)
+        sums = cumsum[:, window:] - cumsum[:, :-window]
+        gaps = missing[:, window:] - missing[:, :-window]
+        rolling = np.where(gaps == 0, sums / window, np.nan)
+    else:
+        rolling = np.empty((len(names), 0))
+
+    results = []
+    for i, name in enumerate(names):
+        results.append({
+            "name": name,
+            "count": int(counts[i]),
+            "mean_temp": float(mean_temp[i]),
+            "max_temp": float(max_temp[i]),
+            "min_temp": float(min_temp[i]),
+            "percentiles": {key: float(values[i]) for key, values in pct.items()},
+            "wet": None if wet_rows[i] is None else int(wet_count[i]),
+            "hdd": float(hdd[i]) / steps_per_day,
+            "cdd": float(cdd[i]) / steps_per_day,
+            "rolling_mean": rolling[i, :max(0, lengths[i] - window + 1)].tolist(),
+        })
+    return results
+
+
+def _compute(
+    names: List[str],
+    high_rows: List[List[float]],
+    low_rows: List[List[float]],
+    wet_rows: List[Optional[List[bool]]],
+    base_temp: float,
+    window: int,
+    percentiles: Sequence[int],
+    steps_per_day: int,
+    use_numpy: Optional[bool],
+    unit: str,
+) -> List[Dict]:
+    """
+    校验参数、选择实现，整理每个城市的结果并把 NaN 转换为 None。
+
+    每行是一个城市的时间序列，缺失值为 NaN；wet_rows 中的 None 表示
+    该城市没有降水信息。有效时间点数和降水时间点数分别输出为
+    unit 与 "rainy_" + unit（例如 days / rainy_days）。
+    """
+    if window < 1:
+        raise ValueError(f"滑动窗口必须为正整数: {window}")
+    if use_numpy is None:
+        use_numpy = np is not None
+    elif use_numpy and np is None:
+        raise ValueError("需要安装 numpy: pip install numpy")
+
+    compute = _stats_numpy if use_numpy else _stats_python
+    results = compute(
+        names, high_rows, low_rows, wet_rows,
+        base_temp, window, percentiles, steps_per_day,
+    )
+    return [
+        {
+            "name": loc["name"],
+            unit: loc["count"],
+            "mean_temp": _nan_to_none(loc["mean_temp"]),
+            "max_temp": _nan_to_none(loc["max_temp"]),
+            "min_temp": _nan_to_none(loc["min_temp"]),
+            "percentiles": {
+                k: _nan_to_none(v) for k, v in loc["percentiles"].items()
+            },
+            f"rainy_{unit}": loc["wet"],
+            "hdd": loc["hdd"],
+            "cdd": loc["cdd"],
+            "rolling_mean": [_nan_to_none(v) for v in loc["rolling_mean"]],
+        }
+        for loc in results
+    ]
+
+
+def forecast_stats(
+    forecasts_by_location: Dict[str, List[Dict]],
+    base_temp: float = DEFAULT_BASE_TEMP,
+    window: int = DEFAULT_WINDOW,
+    percentiles: Sequence[int] = DEFAULT_PERCENTILES,
+    use_numpy: Optional[bool] = None,
+) -> Dict:
+    """
+    计算多个城市逐日预报的统计信息。
+
+    日均温取 (最高温 + 最低温) / 2。最高温或最低温缺失的日期不参与统计，
+    但仍占据时间轴上的位置，跨过它的滑动窗口为 None。
+
+    Args:
+        forecasts_by_location: 城市名 -> get_forecast() 返回的预报列表
+        base_temp: 度日数基准温度 (°C)
+        window: 滑动平均窗口天数
+        percentiles: 要计算的日均温分位数
+        use_numpy: 是否使用 numpy，默认在可用时使用
+
+    Returns:
+        统计结果字典，包含 resolution ("daily"), base_temp, window 和每个城市的
+        locations 列表（days, mean_temp, max_temp, min_temp, percentiles,
+        rainy_days, hdd, cdd, rolling_mean）；
+        没有有效数据的城市 mean_temp / max_temp / min_temp / 分位数为 None
+
+    Raises:
+        ValueError: 窗口大小不合法，或要求 numpy 但未安装时抛出
+    """
+    names = list(forecasts_by_location)
+    high_rows, low_rows, wet_rows = [], [], []
+    for name in names:
+        highs, lows, wet = [], [], []
+        for f in forecasts_by_location[name]:
+            high, low = f.get("max_temp"), f.get("min_temp")
+            if high is None or low is None:
+                highs.append(math.nan)
+                lows.append(math.nan)
+                wet.append(False)
+            else:
+                highs.append(high)
+                lows.append(low)
+                wet.append(f.get("weather_code") in RAIN_CODES)
+        high_rows.append(highs)
+        low_rows.append(lows)
+        wet_rows.append(wet)
+
+    locations = _compute(
+        names, high_rows, low_rows, wet_rows,
+        base_temp, window, percentiles, 1, use_numpy, "days",
+    )
+    return {
+        "resolution": "daily",
+        "base_temp": base_temp,
+        "window": window,
+        "locations": locations,
+    }
+
+
+def hourly_stats(
+    hourly_by_location: Dict[str, Dict[str, list]],
+    base_temp: float = DEFAULT_BASE_TEMP,
+    window: int = DEFAULT_HOURLY_WINDOW,
+    percentiles: Sequence[int] = DEFAULT_PERCENTILES,
+    use_numpy: Optional[bool] = None,
+) -> Dict:
+    """
+    计算多个城市逐小时预报的统计信息。
+
+    度日数按逐小时温度计算后除以 24；有 precipitation 列时统计
+    降水量大于 0 的小时数，否则 rainy_hours 为 None。
+
+    Args:
+        hourly_by_location: 城市名 -> get_hourly() 返回的列式数据
+            （需要 temperature 列，可选 precipitation 列）
+        base_temp: 度日数基准温度 (°C)
+        window: 滑动平均窗口小时数
+        percentiles: 要计算的温度分位数
+        use_numpy: 是否使用 numpy，默认在可用时使用
+
+    Returns:
+        统计结果字典，包含 resolution ("hourly"), base_temp, window 和每个城市的
+        locations 列表（hours, mean_temp, max_temp, min_temp, percentiles,
+        rainy_hours, hdd, cdd, rolling_mean）
+
+    Raises:
+        ValueError: 窗口大小不合法，或要求 numpy 但未安装时抛出
+    """
+    names = list(hourly_by_location)
+    temp_rows, wet_rows = [], []
+    for name in names:
+        columns = hourly_by_location[name]
+        temp_rows.append([
+            math.nan if t is None else t for t in columns.get("temperature", [])
+        ])
+        precipitation = columns.get("precipitation")
+        wet_rows.append(
+            None if precipitation is None
+            else [p is not None and p > 0 for p in precipitation]
+        )
+
+    locations = _compute(
+        names, temp_rows, temp_rows, wet_rows,
+        base_temp, window, percentiles, 24, use_numpy, "hours",
+    )
+    return {
+        "resolution": "hourly",
+        "base_temp": base_temp,
+        "window": window,
+        "locations": locations,
+    }
+
+
+def _nan_to_none(value: float) -> Optional[float]:
+    """NaN 转换为 None，JSON 输出为 null"""
+    return None if math.isnan(value) else value
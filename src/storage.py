@@ -0,0 +1,185 @@
+"""
+本地状态文件工具模块
+
+为 ~/.weather-cli/ 下的状态文件提供原子写入、跨进程建议锁，
+以及可选择落盘或仅保存在内存中的小型状态存储。
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows 等平台没有 fcntl
+    fcntl = None
+
+logger = logging.getLogger("weather-cli.storage")
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """
+    获取文件的 (mtime_ns, size) 签名，用于判断文件是否变化。
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        (mtime_ns, size) 元组，文件不存在时返回 None
+    """
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """
+    原子地写入二进制文件。
+
+    先写入同目录下的临时文件，再通过 os.replace 替换目标文件，
+    读取方永远不会看到写了一半的内容。
+
+    Args:
+        path: 目标文件路径
+        data: 要写入的字节
+
+    Raises:
+        OSError: 写入失败时抛出
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """
+    原子地写入文本文件（UTF-8）。
+
+    Args:
+        path: 目标文件路径
+        text: 要写入的文本
+
+    Raises:
+        OSError: 写入失败时抛出
+    """
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path: Path, data: Any) -> None:
+    """
+    原子地写入 JSON 文件。
+
+    Args:
+        path: 目标文件路径
+        data: 可 JSON 序列化的数据
+    """
+    atomic_write_text(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+def read_json(path: Path, default: Any = None) -> Any:
+    """
+    读取 JSON 文件，文件不存在或损坏时返回默认值。
+
+    Args:
+        path: 文件路径
+        default: 读取失败时的返回值
+
+    Returns:
+        解析后的数据或 default
+    """
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning("读取状态文件失败 %s: %s", path, e)
+        return default
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """
+    获取跨进程的排他建议锁（上下文管理器）。
+
+    锁文件本身不保存数据，只用于 flock 互斥；
+    在不支持 fcntl 的平台上退化为无锁。
+
+    Args:
+        path: 锁文件路径
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class StateStore:
+    """
+    小型 JSON 状态存储
+
+    指定文件路径时状态保存在磁盘上，读-改-写由文件锁保护，多个进程共享；
+    路径为 None 时状态只保存在内存中，由线程锁保护，仅在当前对象内共享。
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else None
+        self._memory: Any = {}
+        self._lock = threading.Lock()
+
+    def read(self) -> Any:
+        """
+        读取当前状态（不加锁）。
+
+        Returns:
+            状态字典
+        """
+        if self.path is None:
+            with self._lock:
+                return json.loads(json.dumps(self._memory))
+        return read_json(self.path, default={}) or {}
+
+    @contextmanager
+    def transaction(self) -> Iterator[Dict[str, Any]]:
+        """
+        在锁内读取状态，退出时写回被修改过的状态（上下文管理器）。
+
+        Yields:
+            可直接修改的状态字典
+        """
+        if self.path is None:
+            with self._lock:
+                yield self._memory
+            return
+
+        with file_lock(self.path.with_suffix(".lock")):
+            data = read_json(self.path, default={}) or {}
+            original = json.dumps(data, sort_keys=True)
+            yield data
+            if json.dumps(data, sort_keys=True) != original:
+                atomic_write_json(self.path, data)
@@ -0,0 +1,138 @@
+"""
+缓存预热模块
+
+在缓存过期之前主动刷新预热城市列表的当前天气和预报，
+请求按时间分散并加入随机抖动，避免集中冲击上游 API。
+"""
+import heapq
+import logging
+import random
+import time
+from typing import Callable, Dict, List, Optional
+
+from cache import (
+    PRUNE_AGE_FACTOR,
+    cached_coordinates,
+    cached_forecast,
+    cached_weather,
+    location_key,
+    prune_cache,
+    read_cache_entry,
+)
+
+logger = logging.getLogger("weather-cli.warm")
+
+
+def warm_watchlist(
+    cities: List[str],
+    ttl: int,
+    days: int = 3,
+    lead: float = 0.2,
+    jitter: float = 0.1,
+    min_gap: float = 1.0,
+    once: bool = False,
+    max_refreshes: Optional[int] = None,
+    clock: Callable[[], float] = time.time,
+    sleep: Callable[[float], None] = time.sleep,
+    rng: Optional[random.Random] = None,
+) -> Dict[str, int]:
+    """
+    按计划刷新预热城市的缓存。
+
+    每个城市在缓存写入后 ttl * (1 - lead) 秒左右刷新一次，
+    并随机提前最多 jitter 比例的时间，使各城市的刷新时间逐渐错开；
+    相邻两次请求之间至少间隔 min_gap 秒。
+    启动时以及之后每隔 ttl 秒清理一次超过 PRUNE_AGE_FACTOR * ttl 的缓存条目，
+    其中包括不在预热列表中的坐标和 --vars 组合。
+
+    Args:
+        cities: 城市名列表
+        ttl: 缓存有效期（秒）
+        days: 预报天数，需与普通查询一致
+        lead: 提前刷新的比例，0.2 表示在有效期过去 80% 时刷新
+        jitter: 随机提前的最大比例
+        min_gap: 相邻请求的最小间隔（秒）
+        once: 为 True 时只刷新当前已到期的城市后退出
+        max_refreshes: 最多刷新次数，None 表示不限
+        clock: 时间函数（便于测试）
+        sleep: 休眠函数（便于测试）
+        rng: 随机数生成器（便于测试）
+
+    Returns:
+        统计信息: locations, refreshed, failed, pruned
+
+    Raises:
+        ValueError: ttl 不合法时抛出
+    """
+    if ttl <= 0:
+        raise ValueError("缓存有效期 cache_ttl 必须大于 0 才能预热")
+    rng = rng or random.Random()
+    interval = ttl * (1 - lead)
+    stats = {"locations": 0, "refreshed": 0, "failed": 0, "pruned": 0}
+    next_prune = clock()
+
+    # 坐标只解析一次
+    locations = []
+    for city in cities:
+        try:
+            locations.append((city, cached_coordinates(city)))
+        except ValueError as e:
+            logger.warning(f"跳过无法解析的城市 {city}: {e}")
+            stats["failed"] += 1
+    stats["locations"] = len(locations)
+
+    # 根据已有缓存的写入时间安排首次刷新，缺失的立即刷新
+    start = clock()
+    schedule = []
+    for index, (_, info) in enumerate(locations):
+        entry = read_cache_entry(
+            "current", location_key(info["latitude"], info["longitude"])
+        )
+        due = start if entry is None else entry["fetched_at"] + interval
+        heapq.heappush(schedule, (due, index))
+
+    last_request = None
+    while True:
+        now = clock()
+        if now >= next_prune:
+            stats["pruned"] += prune_cache(PRUNE_AGE_FACTOR * ttl, now=now)
+            next_prune = now + ttl
+        if not schedule:
+            break
+        if max_refreshes is not None and stats["refreshed"] >= max_refreshes:
+            break
+        due, index = heapq.heappop(schedule)
+        if once and due > start:
+            break
+
+        now = clock()
+        earliest = due
+        if last_request is not None:
+            gap = min_gap * (1 + rng.uniform(0, jitter))
+            earliest = max(earliest, last_request + gap)
+        if earliest > now:
+            sleep(earliest - now)
+
+        city, info = locations[index]
+        lat, lon = info["latitude"], info["longitude"]
+        last_request = clock()
+        try:
+            cached_weather(lat, lon, ttl=ttl, refresh=True)
+            cached_forecast(lat, lon, days, ttl=ttl, refresh=True)
+        except ValueError as e:
+            logger.warning(f"刷新失败 {city}: {e}")
+            stats["failed"] += 1
+            next_due = last_request + min(interval, 60)
+        else:
+            logger.debug(f"已刷新 {city}")
+            stats["refreshed"] += 1
+            next_due = last_request + interval * (1 - rng.uniform(0, jitter))
+
+        if not once:
+            heapq.heappush(schedule, (next_due, index))
+
+    logger.info(
+        f"预热结束: {stats['locations']} 个城市, 刷新 {stats['refreshed']} 次, "
+        f"失败 {stats['failed']} 次"
+    )
+    return stats
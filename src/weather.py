@@ -2,142 +2,711 @@
 天气查询核心模块
 
 提供天气 API 调用和数据解析功能。
+
+WeatherClient 封装了 HTTP 传输、配置、限流、熔断和日志，可以注入依赖
+创建相互隔离的实例；模块级的 get_coordinates / get_weather / get_forecast
+等函数是默认客户端的简单包装。
 """
 import logging
-from typing import Dict, Optional
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
 import requests
 
+from breaker import CircuitBreaker, UpstreamUnavailableError
+from config import CONFIG_DIR, DEFAULT_CONFIG, get_config
+from derived import EXTRA_VARIABLES, compute_derived, to_list
+from memprofile import profile_phase
+from ratelimit import TokenBucket
+
 # 配置模块级日志记录器
 logger = logging.getLogger("weather-cli.weather")
+_module_logger = logger
 
+# 限流状态文件（所有进程共享）
+RATE_LIMIT_FILE = CONFIG_DIR / "ratelimit.json"
 
-def get_coordinates(city: str) -> Dict:
+# 熔断器状态文件（所有进程共享）
+BREAKER_FILE = CONFIG_DIR / "breaker.json"
+
+# 收到 HTTP 429 时的最大重试次数
+MAX_THROTTLE_RETRIES = 2
+
+# API 地址
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+
+# 请求超时（秒）
+REQUEST_TIMEOUT = 30
+
+# 传输函数: 与 requests.get 签名兼容，(url, params=None, timeout=None) -> 响应
+Transport = Callable[..., requests.Response]
+
+
+class RequestsTransport:
     """
-    获取城市坐标信息。
+    基于 requests.Session 的默认 HTTP 传输
 
-    Args:
-        city: 城市名称
+    每个线程使用独立的 Session，复用连接且线程安全。
+    """
 
-    Returns:
-        包含 latitude, longitude, country, name 的字典
+    def __init__(self):
+        self._local = threading.local()
+
+    def __call__(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session.get(url, params=params, timeout=timeout)
+
+
+class WeatherClient:
+    """
+    Open-Meteo 天气客户端
+
+    持有自己的 HTTP 传输、配置、限流器、熔断器和日志记录器，
+    全部可以通过构造参数注入，多个实例之间互不影响。
+
+    Example:
+        client = WeatherClient(
+            settings={"rate_limit_per_minute": 0},
+            transport=fake_get,
+        )
+        city = client.get_coordinates("Beijing")
+    """
+
+    def __init__(
+        self,
+        transport: Optional[Transport] = None,
+        settings: Optional[Dict[str, Any]] = None,
+        state_dir: Optional[Path] = None,
+        logger: Optional[logging.Logger] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            transport: HTTP 传输函数，默认为 RequestsTransport()
+            settings: 配置字典（键同 config.DEFAULT_CONFIG），缺省的键使用默认值；
+                为 None 时从配置文件读取
+            state_dir: 限流和熔断状态文件所在目录，多个进程共享；
+                为 None 时状态只保存在本实例的内存中
+            logger: 日志记录器，默认为 weather-cli.weather
+            sleep: 休眠函数（便于测试）
+        """
+        self.transport = transport or RequestsTransport()
+        self.settings = (
+            None if settings is None else {**DEFAULT_CONFIG, **settings}
+        )
+        self.state_dir = Path(state_dir) if state_dir is not None else None
+        self.logger = logger or _module_logger
+        self._sleep = sleep
+        self._rate_limiter: Optional[TokenBucket] = None
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def _setting(self, key: str) -> Any:
+        """读取配置项，未注入配置时读取配置文件（带进程内缓存）"""
+        if self.settings is not None:
+            return self.settings.get(key, DEFAULT_CONFIG.get(key))
+        return get_config(key, DEFAULT_CONFIG.get(key))
+
+    def _state_file(self, name: str) -> Optional[Path]:
+        """状态文件路径，未指定 state_dir 时返回 None（仅内存）"""
+        return self.state_dir / name if self.state_dir is not None else None
+
+    def _get_rate_limiter(self) -> Optional[TokenBucket]:
+        """
+        获取本实例的限流器，首次使用时按配置创建。
+
+        Returns:
+            TokenBucket，rate_limit_per_minute 为 0 时返回 None
+        """
+        per_minute = self._setting("rate_limit_per_minute")
+        if not per_minute:
+            return None
+        with self._lock:
+            if self._rate_limiter is None:
+                self._rate_limiter = TokenBucket(
+                    self._state_file(RATE_LIMIT_FILE.name),
+                    rate=per_minute / 60,
+                    capacity=self._setting("rate_limit_burst"),
+                )
+            return self._rate_limiter
+
+    def _get_breaker(self, endpoint: str) -> Optional[CircuitBreaker]:
+        """
+        获取指定接口的熔断器，首次使用时按配置创建。
+
+        Args:
+            endpoint: 接口名称（geocoding / forecast / archive）
+
+        Returns:
+            CircuitBreaker，breaker_failure_threshold 为 0 时返回 None
+        """
+        threshold = self._setting("breaker_failure_threshold")
+        if not threshold:
+            return None
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(
+                    self._state_file(BREAKER_FILE.name),
+                    endpoint,
+                    failure_threshold=threshold,
+                    cooldown=self._setting("breaker_cooldown"),
+                )
+            return self._breakers[endpoint]
+
+    def _http_get(
+        self, url: str, params: Optional[Dict] = None, endpoint: str = "forecast"
+    ) -> requests.Response:
+        """
+        发送经过熔断和限流的 GET 请求。
+
+        熔断器打开时直接抛出 UpstreamUnavailableError；否则从令牌桶
+        获取令牌后发送请求，收到 HTTP 429 时按 Retry-After 等待后重试，
+        最多 MAX_THROTTLE_RETRIES 次。
+
+        Args:
+            url: 请求地址
+            params: 查询参数
+            endpoint: 接口名称，每个接口有独立的熔断器
+
+        Returns:
+            状态码正常的响应对象
+
+        Raises:
+            UpstreamUnavailableError: 熔断器打开时抛出
+            requests.exceptions.RequestException: 请求失败时抛出
+        """
+        breaker = self._get_breaker(endpoint)
+        if breaker is not None:
+            breaker.before_call()
+
+        try:
+            with profile_phase("fetch"):
+                response = self._send_with_throttle(url, params)
+        except requests.exceptions.RequestException as e:
+            if breaker is not None:
+                if _is_upstream_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            raise
+
+        if breaker is not None:
+            breaker.record_success()
+        return response
+
+    def _send_with_throttle(
+        self, url: str, params: Optional[Dict] = None
+    ) -> requests.Response:
+        """
+        发送经过限流的 GET 请求，遇到 HTTP 429 时等待重试。
+
+        Args:
+            url: 请求地址
+            params: 查询参数
+
+        Returns:
+            状态码正常的响应对象
+
+        Raises:
+            requests.exceptions.RequestException: 请求失败时抛出
+        """
+        limiter = self._get_rate_limiter()
+        for attempt in range(MAX_THROTTLE_RETRIES + 1):
+            if limiter is not None:
+                waited = limiter.acquire()
+                if waited > 0:
+                    self.logger.debug(f"限流等待 {waited:.3f}s: {url}")
+
+            response = self.transport(url, params=params, timeout=REQUEST_TIMEOUT)
+            if response.status_code != 429 or attempt == MAX_THROTTLE_RETRIES:
+                break
+
+            try:
+                retry_after = float(response.headers.get("Retry-After", 1))
+            except ValueError:
+                retry_after = 1.0
+            retry_after = min(max(retry_after, 0.0), 30.0)
+            self.logger.debug(
+                f"上游限流 (HTTP 429)，等待 {retry_after:.3f}s 后重试: {url}"
+            )
+            self._sleep(retry_after)
 
-    Raises:
-        ValueError: 找不到城市时抛出
-    """
-    logger.debug(f"查询城市坐标: {city}")
-    
-    url = f"https://geocoding-api.open-meteo.com/v1/search"
-    params = {"name": city, "count": 1}
-    
-    try:
-        logger.debug(f"API请求: {url}")
-        response = requests.get(url, params=params, timeout=30)
         response.raise_for_status()
-        data = response.json()
-        
-        if not data.get("results"):
-            logger.warning(f"找不到城市: {city}")
-            raise ValueError(f"找不到城市: {city}")
-        
-        result = data["results"][0]
-        city_info = {
-            "latitude": result["latitude"],
-            "longitude": result["longitude"],
-            "country": result.get("country", "未知"),
-            "name": result.get("name", city),
+        return response
+
+    def get_coordinates(self, city: str) -> Dict:
+        """
+        获取城市坐标信息。
+
+        Args:
+            city: 城市名称
+
+        Returns:
+            包含 latitude, longitude, country, name 的字典
+
+        Raises:
+            ValueError: 找不到城市时抛出
+            UpstreamUnavailableError: 上游接口已熔断时抛出
+        """
+        logger = self.logger
+        logger.debug(f"查询城市坐标: {city}")
+
+        url = GEOCODING_URL
+        params = {"name": city, "count": 1}
+
+        try:
+            logger.debug(f"API请求: {url}")
+            response = self._http_get(url, params, endpoint="geocoding")
+            with profile_phase("parse"):
+                data = response.json()
+
+                if not data.get("results"):
+                    logger.warning(f"找不到城市: {city}")
+                    raise ValueError(f"找不到城市: {city}")
+
+                result = data["results"][0]
+                city_info = {
+                    "latitude": result["latitude"],
+                    "longitude": result["longitude"],
+                    "country": result.get("country", "未知"),
+                    "name": result.get("name", city),
+                }
+
+            logger.debug(f"城市信息: {city_info}")
+            return city_info
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"网络请求失败: {e}")
+            raise ValueError(f"网络请求失败: {e}")
+
+    def get_weather(
+        self, lat: float, lon: float, variables: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        获取当前天气数据。
+
+        Args:
+            lat: 纬度
+            lon: 经度
+            variables: 额外变量（derived.EXTRA_VARIABLES 中的名称），
+                例如 ["humidity", "wind_speed"]；输入齐全的派生指标
+                （露点、酷热指数、风寒温度、humidex）会一并计算
+
+        Returns:
+            天气数据字典，包含 temperature, weather_code, time，
+            以及请求的额外变量和派生指标
+
+        Raises:
+            ValueError: 变量名不合法或请求失败时抛出
+        """
+        logger = self.logger
+        logger.debug(f"获取天气: lat={lat}, lon={lon}")
+
+        extras = _resolve_variables(variables)
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "current": ",".join(
+                ["temperature_2m", "weather_code", *extras.values()]
+            ),
         }
-        
-        logger.debug(f"城市信息: {city_info}")
-        return city_info
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"网络请求失败: {e}")
-        raise ValueError(f"网络请求失败: {e}")
 
+        try:
+            response = self._http_get(FORECAST_URL, params)
+            with profile_phase("parse"):
+                data = response.json()
+
+                current = data.get("current", {})
+                weather_data = {
+                    "temperature": current.get("temperature_2m"),
+                    "weather_code": current.get("weather_code"),
+                    "time": current.get("time"),
+                }
+                for name, api_name in extras.items():
+                    weather_data[name] = current.get(api_name)
+                if extras and weather_data["temperature"] is not None:
+                    columns = {k: [v] for k, v in weather_data.items()}
+                    for name, values in compute_derived(columns).items():
+                        weather_data[name] = to_list(values)[0]
+
+            logger.debug(f"天气数据: {weather_data}")
+            return weather_data
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"获取天气失败: {e}")
+            raise ValueError(f"获取天气失败: {e}")
+
+    def get_hourly(
+        self,
+        lat: float,
+        lon: float,
+        variables: Optional[List[str]] = None,
+        days: int = 1,
+    ) -> Dict[str, list]:
+        """
+        获取逐小时预报，并对整段数据计算派生指标。
+
+        Args:
+            lat: 纬度
+            lon: 经度
+            variables: 额外变量（derived.EXTRA_VARIABLES 中的名称）
+            days: 预报天数
+
+        Returns:
+            列式数据字典: time, temperature, 额外变量以及派生指标，
+            每列为等长列表
+
+        Raises:
+            ValueError: 变量名不合法或请求失败时抛出
+        """
+        logger = self.logger
+        logger.debug(f"获取逐小时预报: lat={lat}, lon={lon}, days={days}")
+
+        extras = _resolve_variables(variables)
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "hourly": ",".join(["temperature_2m", *extras.values()]),
+            "forecast_days": days,
+        }
+
+        try:
+            response = self._http_get(FORECAST_URL, params)
+            with profile_phase("parse"):
+                data = response.json()
+
+                hourly = data.get("hourly", {})
+                columns = {
+                    "time": hourly.get("time", []),
+                    "temperature": hourly.get("temperature_2m", []),
+                }
+                for name, api_name in extras.items():
+                    columns[name] = hourly.get(api_name, [])
+                for name, values in compute_derived(columns).items():
+                    columns[name] = to_list(values)
+
+            logger.debug(f"逐小时数据: {len(columns['time'])} 条")
+            return columns
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"获取逐小时预报失败: {e}")
+            raise ValueError(f"获取逐小时预报失败: {e}")
+
+    def get_forecast(self, lat: float, lon: float, days: int = 3) -> list:
+        """
+        获取未来天气预报。
+
+        Args:
+            lat: 纬度
+            lon: 经度
+            days: 预报天数，默认 3 天
+
+        Returns:
+            预报数据列表
+        """
+        logger = self.logger
+        logger.debug(f"获取预报: lat={lat}, lon={lon}, days={days}")
+
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "daily": "temperature_2m_max,temperature_2m_min,weather_code",
+            "forecast_days": days,
+        }
+
+        try:
+            response = self._http_get(FORECAST_URL, params)
+            with profile_phase("parse"):
+                data = response.json()
+
+                daily = data.get("daily", {})
+                forecasts = []
+
+                for i in range(len(daily.get("time", []))):
+                    forecasts.append({
+                        "date": daily["time"][i],
+                        "max_temp": daily["temperature_2m_max"][i],
+                        "min_temp": daily["temperature_2m_min"][i],
+                        "weather_code": daily["weather_code"][i],
+                    })
+
+            logger.debug(f"预报数据: {len(forecasts)} 条")
+            return forecasts
 
-def get_weather(lat: float, lon: float) -> Dict:
+        except requests.exceptions.RequestException as e:
+            logger.error(f"获取预报失败: {e}")
+            raise ValueError(f"获取预报失败: {e}")
+
+    def get_model_forecasts(
+        self, lat: float, lon: float, models: List[str], days: int = 3
+    ) -> Dict[str, list]:
+        """
+        在一次请求中获取多个预报模型的逐日预报。
+
+        Open-Meteo 对多个模型返回带 "_<模型名>" 后缀的变量列，
+        只请求一个模型时变量名不带后缀。
+
+        Args:
+            lat: 纬度
+            lon: 经度
+            models: 模型名称列表，例如 ["ecmwf_ifs025", "gfs_seamless"]
+            days: 预报天数，默认 3 天
+
+        Returns:
+            模型名 -> 预报数据列表（格式同 get_forecast），保持输入顺序
+
+        Raises:
+            ValueError: 模型列表为空、模型无数据或请求失败时抛出
+        """
+        logger = self.logger
+        if not models:
+            raise ValueError("请至少指定一个预报模型")
+        logger.debug(f"获取多模型预报: lat={lat}, lon={lon}, models={models}")
+
+        variables = ["temperature_2m_max", "temperature_2m_min", "weather_code"]
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "daily": ",".join(variables),
+            "models": ",".join(models),
+            "forecast_days": days,
+        }
+
+        try:
+            response = self._http_get(FORECAST_URL, params)
+            with profile_phase("parse"):
+                data = response.json()
+
+                daily = data.get("daily", {})
+                dates = daily.get("time", [])
+                results = {}
+                for model in models:
+                    suffix = "" if len(models) == 1 else f"_{model}"
+                    columns = [daily.get(var + suffix) for var in variables]
+                    if any(column is None for column in columns):
+                        raise ValueError(f"预报模型无数据: {model}")
+                    results[model] = [
+                        {
+                            "date": date,
+                            "max_temp": max_temp,
+                            "min_temp": min_temp,
+                            "weather_code": code,
+                        }
+                        for date, max_temp, min_temp, code in zip(dates, *columns)
+                    ]
+        except requests.exceptions.RequestException as e:
+            logger.error(f"获取多模型预报失败: {e}")
+            raise ValueError(f"获取多模型预报失败: {e}")
+
+        logger.debug(f"多模型预报: {len(models)} 个模型, {len(dates)} 天")
+        return results
+
+    def get_archive(
+        self,
+        lat: float,
+        lon: float,
+        start_date: str,
+        end_date: str,
+        variables: List[str],
+        resolution: str = "daily",
+    ) -> Dict[str, list]:
+        """
+        获取历史天气数据（Open-Meteo Archive API）。
+
+        Args:
+            lat: 纬度
+            lon: 经度
+            start_date: 开始日期 (YYYY-MM-DD)
+            end_date: 结束日期 (YYYY-MM-DD)，包含当天
+            variables: 要获取的变量名列表
+            resolution: "daily" 或 "hourly"
+
+        Returns:
+            列式数据字典，包含 time 以及每个变量对应的值列表
+
+        Raises:
+            ValueError: 请求失败时抛出
+        """
+        logger = self.logger
+        logger.debug(
+            f"获取历史数据: lat={lat}, lon={lon}, {start_date} ~ {end_date}"
+        )
+
+        params = {
+            "latitude": lat,
+            "longitude": lon,
+            "start_date": start_date,
+            "end_date": end_date,
+            resolution: ",".join(variables),
+            "timezone": "auto",
+        }
+
+        try:
+            response = self._http_get(ARCHIVE_URL, params, endpoint="archive")
+            with profile_phase("parse"):
+                data = response.json()
+
+                block = data.get(resolution, {})
+                columns = {"time": block.get("time", [])}
+                for name in variables:
+                    columns[name] = block.get(name, [None] * len(columns["time"]))
+
+            logger.debug(f"历史数据: {len(columns['time'])} 条")
+            return columns
+
+        except requests.exceptions.RequestException as e:
+            logger.error(f"获取历史数据失败: {e}")
+            raise ValueError(f"获取历史数据失败: {e}")
+
+
+def _resolve_variables(variables: Optional[List[str]]) -> Dict[str, str]:
     """
-    获取当前天气数据。
+    校验额外变量名并映射为 Open-Meteo 变量名。
 
     Args:
-        lat: 纬度
-        lon: 经度
+        variables: 变量名列表
 
     Returns:
-        天气数据字典，包含 temperature, weather_code, time
-    """
-    logger.debug(f"获取天气: lat={lat}, lon={lon}")
-    
-    url = (
-        f"https://api.open-meteo.com/v1/forecast?"
-        f"latitude={lat}&longitude={lon}&"
-        f"current=temperature_2m,weather_code"
-    )
-    
-    try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        current = data.get("current", {})
-        weather_data = {
-            "temperature": current.get("temperature_2m"),
-            "weather_code": current.get("weather_code"),
-            "time": current.get("time"),
-        }
-        
-        logger.debug(f"天气数据: {weather_data}")
-        return weather_data
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"获取天气失败: {e}")
-        raise ValueError(f"获取天气失败: {e}")
+        变量名 -> Open-Meteo 变量名（保持输入顺序）
 
+    Raises:
+        ValueError: 包含不支持的变量时抛出
+    """
+    resolved = {}
+    for name in variables or []:
+        if name not in EXTRA_VARIABLES:
+            raise ValueError(
+                f"不支持的变量: '{name}'。支持的变量: {list(EXTRA_VARIABLES)}"
+            )
+        resolved[name] = EXTRA_VARIABLES[name]
+    return resolved
 
-def get_forecast(lat: float, lon: float, days: int = 3) -> list:
+
+def _is_upstream_failure(error: requests.exceptions.RequestException) -> bool:
     """
-    获取未来天气预报。
+    判断请求错误是否说明上游不可用。
 
-    Args:
-        lat: 纬度
-        lon: 经度
-        days: 预报天数，默认 3 天
+    超时、连接错误、5xx 和持续的 429 计入熔断；其他 4xx 是请求本身的问题。
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        status = error.response.status_code if error.response is not None else 0
+        return status >= 500 or status == 429
+    return True
+
+
+_default_client: Optional[WeatherClient] = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> WeatherClient:
+    """
+    获取模块级函数使用的默认客户端，首次调用时创建。
+
+    默认客户端从配置文件读取配置，限流和熔断状态保存在 ~/.weather-cli/。
 
     Returns:
-        预报数据列表
-    """
-    logger.debug(f"获取预报: lat={lat}, lon={lon}, days={days}")
-    
-    url = (
-        f"https://api.open-meteo.com/v1/forecast?"
-        f"latitude={lat}&longitude={lon}&"
-        f"daily=temperature_2m_max,temperature_2m_min,weather_code&"
-        f"forecast_days={days}"
+        WeatherClient 实例
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = WeatherClient(state_dir=CONFIG_DIR)
+    return _default_client
+
+
+def set_default_client(client: Optional[WeatherClient]) -> None:
+    """
+    替换默认客户端，传入 None 时下次使用会重新创建。
+
+    Args:
+        client: 新的默认客户端
+    """
+    global _default_client
+    _default_client = client
+
+
+def get_coordinates(city: str) -> Dict:
+    """
+    获取城市坐标信息（使用默认客户端）。
+
+    参见 WeatherClient.get_coordinates。
+    """
+    return get_default_client().get_coordinates(city)
+
+
+def get_weather(
+    lat: float, lon: float, variables: Optional[List[str]] = None
+) -> Dict:
+    """
+    获取当前天气数据（使用默认客户端）。
+
+    参见 WeatherClient.get_weather。
+    """
+    return get_default_client().get_weather(lat, lon, variables)
+
+
+def get_hourly(
+    lat: float,
+    lon: float,
+    variables: Optional[List[str]] = None,
+    days: int = 1,
+) -> Dict[str, list]:
+    """
+    获取逐小时预报及派生指标（使用默认客户端）。
+
+    参见 WeatherClient.get_hourly。
+    """
+    return get_default_client().get_hourly(lat, lon, variables, days)
+
+
+def get_forecast(lat: float, lon: float, days: int = 3) -> list:
+    """
+    获取未来天气预报（使用默认客户端）。
+
+    参见 WeatherClient.get_forecast。
+    """
+    return get_default_client().get_forecast(lat, lon, days)
+
+
+def get_model_forecasts(
+    lat: float, lon: float, models: List[str], days: int = 3
+) -> Dict[str, list]:
+    """
+    获取多个预报模型的逐日预报（使用默认客户端）。
+
+    参见 WeatherClient.get_model_forecasts。
+    """
+    return get_default_client().get_model_forecasts(lat, lon, models, days)
+
+
+def get_archive(
+    lat: float,
+    lon: float,
+    start_date: str,
+    end_date: str,
+    variables: List[str],
+    resolution: str = "daily",
+) -> Dict[str, list]:
+    """
+    获取历史天气数据（使用默认客户端）。
+
+    参见 WeatherClient.get_archive。
+    """
+    return get_default_client().get_archive(
+        lat, lon, start_date, end_date, variables, resolution
     )
-    
-    try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        
-        daily = data.get("daily", {})
-        forecasts = []
-        
-        for i in range(len(daily.get("time", []))):
-            forecasts.append({
-                "date": daily["time"][i],
-                "max_temp": daily["temperature_2m_max"][i],
-                "min_temp": daily["temperature_2m_min"][i],
-                "weather_code": daily["weather_code"][i],
-            })
-        
-        logger.debug(f"预报数据: {len(forecasts)} 条")
-        return forecasts
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"获取预报失败: {e}")
-        raise ValueError(f"获取预报失败: {e}")
 
 
 def parse_weather_code(code: int) -> str:
@@ -0,0 +1,65 @@
+"""
+测试公共配置
+
+src 下的模块之间以顶层模块名互相导入（from weather import ...），
+这里把项目根目录和 src 加入 sys.path。测试需要与被测代码共享模块状态时
+（例如替换 cache 的属性、读取 memprofile 的当前分析器），直接导入顶层模块，
+不要通过 src 包导入，否则会得到另一个模块对象。
+
+另外提供假的 HTTP 传输层，供 WeatherClient 相关测试使用。
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+class FakeResponse:
+    """最小化的响应对象"""
+
+    def __init__(self, payload, status_code=200):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = {}
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(response=self)
+
+
+class FakeTransport:
+    """
+    按 URL 返回预设响应的传输，并记录请求
+
+    路由值为异常时抛出该异常；为可调用对象时每次请求调用它生成响应数据
+    （例如每次重新解码录制的 JSON）；否则直接作为响应数据。
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.calls = []
+
+    def __call__(self, url, params=None, timeout=None):
+        self.calls.append((url, params))
+        result = self.routes[url]
+        if isinstance(result, Exception):
+            raise result
+        if callable(result):
+            result = result()
+        return FakeResponse(result)
+
+
+@pytest.fixture
+def fake_transport():
+    """返回 FakeTransport 类，用 {URL: 响应数据} 创建传输"""
+    return FakeTransport
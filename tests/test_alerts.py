@@ -0,0 +1,98 @@
+"""
+阈值告警测试
+"""
+
+import pytest
+
+from src import alerts
+
+FORECASTS = {
+    "Beijing": [
+        {"date": "2026-03-01", "max_temp": 5.0, "min_temp": -3.0, "weather_code": 71},
+        {"date": "2026-03-02", "max_temp": 12.0, "min_temp": 2.0, "weather_code": 95},
+    ],
+    "Tokyo": [
+        {"date": "2026-03-01", "max_temp": 16.0, "min_temp": None, "weather_code": 61},
+    ],
+}
+
+
+def test_parse_rules():
+    """测试规则命名、分号和注释"""
+    rules = alerts.parse_rules(
+        "# 注释\nfrost: min_temp < 0; max_temp >= 30\n\nstorm: weather_code in thunderstorm"
+    )
+    assert [r.name for r in rules] == ["frost", "max_temp >= 30", "storm"]
+
+
+@pytest.mark.parametrize("rule, expected", [
+    ("min_temp < 0", [0]),
+    ("min_temp <= 2 and max_temp > 10", [1]),
+    ("weather_code in thunderstorm or weather_code in [61, 63]", [1, 2]),
+    ("weather_code in 70..79", [0]),
+    ("not weather_code in snow", [1, 2]),
+    ("weather_code not in snow and (max_temp > 15 or min_temp < -10)", [2]),
+    ("min_temp != 2", [0]),
+    ("not min_temp < 0", [1]),
+    ("not (min_temp < 0 or max_temp > 15)", [1]),
+])
+def test_rule_matches(rule, expected):
+    """测试各种运算符，缺失值不命中"""
+    records = [f for forecasts in FORECASTS.values() for f in forecasts]
+    assert alerts.AlertRule("r", rule).match(records) == expected
+
+
+@pytest.mark.parametrize("rule", [
+    "not min_temp < 0",
+    "not (min_temp < 0)",
+    "not (max_temp > 30 and min_temp < 0)",
+    "not not min_temp < 0",
+    "not weather_code in rain",
+])
+def test_negation_skips_missing_values(rule):
+    """测试 not 取反后缺失值仍然不命中"""
+    record = {"date": "2026-03-01", "max_temp": 16.0, "min_temp": None,
+              "weather_code": None}
+    assert alerts.AlertRule("r", rule).match([record]) == []
+    assert alerts.evaluate_alerts([alerts.AlertRule("r", rule)],
+                                  {"Tokyo": [record]}) == []
+
+
+@pytest.mark.parametrize("rule", [
+    "humidity > 5",
+    "min_temp <",
+    "min_temp < 0 and",
+    "weather_code in hail",
+    "min_temp < 0 max_temp",
+    "__import__('os')",
+    "min_temp < 0; x",
+])
+def test_invalid_rules(rule):
+    """测试非法规则被拒绝"""
+    with pytest.raises(ValueError, match="规则语法错误"):
+        alerts.parse_rules(rule)
+
+
+def test_evaluate_alerts():
+    """测试批量求值并按地点、日期排序"""
+    rules = alerts.parse_rules("storm: weather_code in thunderstorm\nfrost: min_temp < 0")
+    result = alerts.evaluate_alerts(rules, FORECASTS)
+    assert [(a["location"], a["date"], a["rule"]) for a in result] == [
+        ("Beijing", "2026-03-01", "frost"),
+        ("Beijing", "2026-03-02", "storm"),
+    ]
+    assert result[1]["weather"] == "雷暴"
+
+
+def test_evaluate_many_locations():
+    """测试数千地点 x 16 天"""
+    forecasts = {
+        f"loc{i}": [
+            {"date": f"d{d}", "max_temp": float(d), "min_temp": float(i % 10 - 5),
+             "weather_code": 0}
+            for d in range(16)
+        ]
+        for i in range(5000)
+    }
+    rules = alerts.parse_rules("min_temp < -4 and max_temp >= 15")
+    assert len(alerts.evaluate_alerts(rules, forecasts)) == 500
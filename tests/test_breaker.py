@@ -0,0 +1,147 @@
+"""
+熔断器测试
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from src import weather
+from src.breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    UpstreamUnavailableError,
+)
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_breaker(tmp_path, clock, name="forecast"):
+    return CircuitBreaker(
+        tmp_path / "breaker.json", name,
+        failure_threshold=2, cooldown=30, probe_timeout=10, clock=clock.time,
+    )
+
+
+def test_opens_after_threshold(tmp_path, clock):
+    """测试连续失败达到阈值后熔断"""
+    breaker = make_breaker(tmp_path, clock)
+    breaker.record_failure()
+    assert breaker.state() == CLOSED
+    breaker.record_failure()
+    assert breaker.state() == OPEN
+    with pytest.raises(UpstreamUnavailableError):
+        breaker.before_call()
+
+
+def test_success_resets_failures(tmp_path, clock):
+    """测试成功请求清零失败计数"""
+    breaker = make_breaker(tmp_path, clock)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state() == CLOSED
+
+
+def test_single_probe_after_cooldown(tmp_path, clock):
+    """测试冷却后只放行一个探测请求，且状态跨实例共享"""
+    breaker = make_breaker(tmp_path, clock)
+    other_process = make_breaker(tmp_path, clock)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    clock.now += 31
+    breaker.before_call()
+    assert breaker.state() == HALF_OPEN
+    with pytest.raises(UpstreamUnavailableError):
+        other_process.before_call()
+
+    breaker.record_success()
+    other_process.before_call()
+    assert other_process.state() == CLOSED
+
+
+def test_failed_probe_reopens(tmp_path, clock):
+    """测试探测失败后重新熔断"""
+    breaker = make_breaker(tmp_path, clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 31
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state() == OPEN
+
+
+def test_late_failures_do_not_extend_cooldown(tmp_path, clock):
+    """测试熔断后陆续失败的在途请求不会推迟冷却结束"""
+    breaker = make_breaker(tmp_path, clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    for _ in range(3):
+        clock.now += 10
+        breaker.record_failure()
+    assert breaker.state() == OPEN
+
+    clock.now += 1  # 距打开已过 31 秒
+    breaker.before_call()
+    assert breaker.state() == HALF_OPEN
+
+
+def test_endpoints_are_independent(tmp_path, clock):
+    """测试不同接口的熔断器互不影响"""
+    forecast = make_breaker(tmp_path, clock, "forecast")
+    geocoding = make_breaker(tmp_path, clock, "geocoding")
+    forecast.record_failure()
+    forecast.record_failure()
+    geocoding.before_call()
+    assert geocoding.state() == CLOSED
+
+
+def make_client(transport):
+    return weather.WeatherClient(
+        transport=transport,
+        settings={"rate_limit_per_minute": 0, "breaker_failure_threshold": 2},
+    )
+
+
+def test_http_get_fails_fast_when_open():
+    """测试熔断后 _http_get 不再发送请求"""
+    transport = MagicMock(side_effect=requests.exceptions.Timeout("timeout"))
+    client = make_client(transport)
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.Timeout):
+            client._http_get("https://example.invalid")
+    with pytest.raises(weather.UpstreamUnavailableError):
+        client._http_get("https://example.invalid")
+    assert transport.call_count == 2
+
+
+def test_client_errors_do_not_trip():
+    """测试 4xx 错误不计入熔断"""
+    response = MagicMock(status_code=400)
+    response.raise_for_status.side_effect = requests.exceptions.HTTPError(
+        response=response
+    )
+    client = make_client(MagicMock(return_value=response))
+
+    for _ in range(3):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client._http_get("https://example.invalid")
+    assert client._get_breaker("forecast").state() == "closed"
@@ -0,0 +1,136 @@
+"""
+WeatherClient 测试
+"""
+
+import pytest
+import requests
+
+from src import weather
+
+
+SETTINGS = {"rate_limit_per_minute": 0}
+
+
+def test_get_coordinates(fake_transport):
+    """测试解析地理编码响应"""
+    transport = fake_transport({weather.GEOCODING_URL: {"results": [{
+        "latitude": 39.9, "longitude": 116.4, "country": "China", "name": "Beijing",
+    }]}})
+    client = weather.WeatherClient(transport=transport, settings=SETTINGS)
+
+    info = client.get_coordinates("beijing")
+    assert info == {
+        "latitude": 39.9, "longitude": 116.4, "country": "China", "name": "Beijing",
+    }
+    assert transport.calls[0][1] == {"name": "beijing", "count": 1}
+
+
+def test_get_coordinates_not_found(fake_transport):
+    """测试找不到城市"""
+    transport = fake_transport({weather.GEOCODING_URL: {}})
+    client = weather.WeatherClient(transport=transport, settings=SETTINGS)
+    with pytest.raises(ValueError, match="找不到城市"):
+        client.get_coordinates("Atlantis")
+
+
+def test_get_forecast(fake_transport):
+    """测试解析预报响应"""
+    transport = fake_transport({weather.FORECAST_URL: {"daily": {
+        "time": ["2026-03-01", "2026-03-02"],
+        "temperature_2m_max": [10, 12],
+        "temperature_2m_min": [1, 2],
+        "weather_code": [0, 61],
+    }}})
+    client = weather.WeatherClient(transport=transport, settings=SETTINGS)
+
+    forecasts = client.get_forecast(1.0, 2.0, days=2)
+    assert forecasts[1] == {
+        "date": "2026-03-02", "max_temp": 12, "min_temp": 2, "weather_code": 61,
+    }
+    assert transport.calls[0][1]["forecast_days"] == 2
+
+
+def test_network_error_becomes_value_error(fake_transport):
+    """测试网络错误转换为 ValueError"""
+    transport = fake_transport({
+        weather.FORECAST_URL: requests.exceptions.ConnectionError("down"),
+    })
+    client = weather.WeatherClient(transport=transport, settings=SETTINGS)
+    with pytest.raises(ValueError, match="获取天气失败"):
+        client.get_weather(1.0, 2.0)
+
+
+def test_instances_are_isolated(fake_transport):
+    """测试不同实例的熔断状态互不影响且不落盘"""
+    failing = fake_transport({
+        weather.FORECAST_URL: requests.exceptions.Timeout("timeout"),
+    })
+    healthy = fake_transport({weather.FORECAST_URL: {"current": {}}})
+    settings = {"rate_limit_per_minute": 0, "breaker_failure_threshold": 1}
+    tenant_a = weather.WeatherClient(transport=failing, settings=settings)
+    tenant_b = weather.WeatherClient(transport=healthy, settings=settings)
+
+    with pytest.raises(ValueError):
+        tenant_a.get_weather(1.0, 2.0)
+    with pytest.raises(weather.UpstreamUnavailableError):
+        tenant_a.get_weather(1.0, 2.0)
+    assert tenant_b.get_weather(1.0, 2.0)["temperature"] is None
+
+
+def test_module_functions_use_default_client(fake_transport):
+    """测试模块级函数委托给默认客户端"""
+    transport = fake_transport({weather.FORECAST_URL: {"current": {
+        "temperature_2m": 21.5, "weather_code": 2, "time": "2026-03-01T12:00",
+    }}})
+    weather.set_default_client(
+        weather.WeatherClient(transport=transport, settings=SETTINGS)
+    )
+    try:
+        assert weather.get_weather(1.0, 2.0)["temperature"] == 21.5
+    finally:
+        weather.set_default_client(None)
+
+
+def test_get_weather_with_variables(fake_transport):
+    """测试一次请求额外变量并计算派生指标"""
+    transport = fake_transport({weather.FORECAST_URL: {"current": {
+        "temperature_2m": 20.0, "weather_code": 0, "time": "2026-03-01T12:00",
+        "relative_humidity_2m": 50, "wind_speed_10m": 10.0,
+    }}})
+    client = weather.WeatherClient(transport=transport, settings=SETTINGS)
+
+    data = client.get_weather(39.9, 116.4, ["humidity", "wind_speed"])
+    assert transport.calls[0][1]["current"] == (
+        "temperature_2m,weather_code,relative_humidity_2m,wind_speed_10m"
+    )
+    assert data["humidity"] == 50
+    assert data["dew_point"] == pytest.approx(9.26, abs=0.05)
+    assert data["wind_chill"] == 20.0
+    assert len(transport.calls) == 1
+
+    with pytest.raises(ValueError, match="不支持的变量"):
+        client.get_weather(39.9, 116.4, ["pressure"])
+
+
+def test_get_model_forecasts(fake_transport):
+    """测试一次请求多个模型并按后缀拆分"""
+    transport = fake_transport({weather.FORECAST_URL: {"daily": {
+        "time": ["2026-03-01"],
+        "temperature_2m_max_ecmwf": [10.0],
+        "temperature_2m_min_ecmwf": [0.0],
+        "weather_code_ecmwf": [0],
+        "temperature_2m_max_gfs": [12.0],
+        "temperature_2m_min_gfs": [1.0],
+        "weather_code_gfs": [3],
+    }}})
+    client = weather.WeatherClient(transport=transport, settings=SETTINGS)
+
+    result = client.get_model_forecasts(39.9, 116.4, ["ecmwf", "gfs"])
+    assert transport.calls[0][1]["models"] == "ecmwf,gfs"
+    assert len(transport.calls) == 1
+    assert result["gfs"] == [
+        {"date": "2026-03-01", "max_temp": 12.0, "min_temp": 1.0, "weather_code": 3},
+    ]
+
+    with pytest.raises(ValueError, match="预报模型无数据"):
+        client.get_model_forecasts(39.9, 116.4, ["ecmwf", "icon"])
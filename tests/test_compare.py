@@ -0,0 +1,43 @@
+"""
+多模型预报对比测试
+"""
+
+import pytest
+
+from src import compare
+
+FORECASTS = {
+    "ecmwf": [
+        {"date": "2026-03-01", "max_temp": 10.0, "min_temp": 0.0, "weather_code": 0},
+        {"date": "2026-03-02", "max_temp": 12.0, "min_temp": 2.0, "weather_code": 61},
+    ],
+    "gfs": [
+        {"date": "2026-03-01", "max_temp": 13.0, "min_temp": 1.0, "weather_code": 0},
+        {"date": "2026-03-02", "max_temp": None, "min_temp": None, "weather_code": None},
+    ],
+    "icon": [
+        {"date": "2026-03-01", "max_temp": 11.5, "min_temp": -1.0, "weather_code": 3},
+    ],
+}
+
+
+def test_compare_models_spread_and_agreement():
+    """测试按日期对齐、离散度与一致度"""
+    result = compare.compare_models(FORECASTS)
+    assert result["models"] == ["ecmwf", "gfs", "icon"]
+
+    first, second = result["days"]
+    assert first["date"] == "2026-03-01"
+    assert first["max_temp_spread"] == pytest.approx(3.0)
+    assert first["min_temp_spread"] == pytest.approx(2.0)
+    assert first["consensus"] == "晴朗"
+    assert first["agreement"] == pytest.approx(0.67)
+
+
+def test_compare_models_missing_data():
+    """测试模型缺少某天数据"""
+    second = compare.compare_models(FORECASTS)["days"][1]
+    assert second["models"]["gfs"] is None
+    assert second["models"]["icon"] is None
+    assert second["max_temp_spread"] is None
+    assert second["agreement"] == 1.0
@@ -0,0 +1,128 @@
+"""
+配置模块测试
+"""
+
+import json
+
+import pytest
+
+from src import config
+
+
+@pytest.fixture
+def config_home(tmp_path, monkeypatch):
+    """将配置文件重定向到临时目录"""
+    monkeypatch.setattr(config, "CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(config, "CONFIG_FILE", tmp_path / "config.json")
+    monkeypatch.setattr(config, "CONFIG_LOCK_FILE", tmp_path / "config.lock")
+    monkeypatch.setattr(config, "SYSTEM_CONFIG_FILE", tmp_path / "system.json")
+    for key in config.VALID_CONFIG_KEYS:
+        monkeypatch.delenv(config.ENV_PREFIX + key.upper(), raising=False)
+    config.reload_config()
+    yield tmp_path
+    config.reload_config()
+
+
+class TestConfigCache:
+    """测试进程内配置缓存"""
+
+    def test_creates_default_config(self, config_home):
+        """测试首次加载时创建默认配置"""
+        assert config.load_config() == config.DEFAULT_CONFIG
+        assert (config_home / "config.json").exists()
+
+    def test_unchanged_file_is_parsed_once(self, config_home, monkeypatch):
+        """测试文件未变化时不重复解析"""
+        config.save_config({"default_city": "Beijing"})
+        config.reload_config()
+        calls = []
+        original = config._read_json_file
+        monkeypatch.setattr(
+            config, "_read_json_file",
+            lambda path: calls.append(path) or original(path),
+        )
+        config.load_config()
+        config.load_config()
+        config.get_config("default_city")
+        assert len(calls) == 1
+
+    def test_external_change_invalidates_cache(self, config_home):
+        """测试文件被其他进程修改后重新读取"""
+        config.set_config("default_city", "Beijing")
+        assert config.get_config("default_city") == "Beijing"
+        (config_home / "config.json").write_text(
+            json.dumps({"default_city": "Shanghai, China"}), encoding="utf-8"
+        )
+        assert config.get_config("default_city") == "Shanghai, China"
+
+    def test_returned_dict_is_a_copy(self, config_home):
+        """测试修改返回值不会污染缓存"""
+        config.load_config()["default_city"] = "Tokyo"
+        assert config.get_config("default_city") == ""
+
+
+class TestAtomicWrite:
+    """测试原子写入"""
+
+    def test_no_temp_files_left(self, config_home):
+        """测试写入后不残留临时文件"""
+        config.set_config("forecast_days", "5")
+        names = {p.name for p in config_home.iterdir()}
+        assert names == {"config.json", "config.lock"}
+        data = json.loads((config_home / "config.json").read_text("utf-8"))
+        assert data["forecast_days"] == 5
+
+
+class TestConfigLayers:
+    """测试分层配置来源"""
+
+    def test_priority(self, config_home, monkeypatch):
+        """测试 默认值 < 系统配置 < 用户配置 < 环境变量"""
+        (config_home / "system.json").write_text(
+            json.dumps({"default_city": "Paris", "forecast_days": 2}),
+            encoding="utf-8",
+        )
+        config.save_config({"forecast_days": 4})
+        monkeypatch.setenv("WEATHER_CLI_DEFAULT_FORMAT", "json")
+        config.reload_config()
+
+        cfg = config.load_config()
+        assert cfg["default_city"] == "Paris"
+        assert cfg["forecast_days"] == 4
+        assert cfg["default_format"] == "json"
+
+    def test_env_override_not_persisted(self, config_home, monkeypatch):
+        """测试 set_config 不会把环境变量写入用户配置"""
+        monkeypatch.setenv("WEATHER_CLI_DEFAULT_CITY", "Berlin")
+        config.reload_config()
+        config.set_config("forecast_days", "6")
+        data = json.loads((config_home / "config.json").read_text("utf-8"))
+        assert data == {"forecast_days": 6}
+        assert config.get_config("default_city") == "Berlin"
+
+    def test_system_config_survives_user_writes(self, config_home):
+        """测试创建、修改和重置用户配置后系统配置仍然生效"""
+        (config_home / "system.json").write_text(
+            json.dumps({"default_city": "Paris", "rate_limit_per_minute": 60}),
+            encoding="utf-8",
+        )
+        config.reload_config()
+
+        config.load_config()
+        assert json.loads((config_home / "config.json").read_text("utf-8")) == {}
+        config.set_config("forecast_days", "5")
+        cfg = config.load_config()
+        assert cfg["default_city"] == "Paris"
+        assert cfg["rate_limit_per_minute"] == 60
+        assert cfg["forecast_days"] == 5
+
+        config.reset_config()
+        cfg = config.load_config()
+        assert cfg["default_city"] == "Paris"
+        assert cfg["forecast_days"] == config.DEFAULT_CONFIG["forecast_days"]
+
+    def test_invalid_env_value_ignored(self, config_home, monkeypatch):
+        """测试非法的环境变量值被忽略"""
+        monkeypatch.setenv("WEATHER_CLI_FORECAST_DAYS", "99")
+        config.reload_config()
+        assert config.get_config("forecast_days") == 3
@@ -0,0 +1,74 @@
+"""
+派生指标测试
+"""
+
+import math
+
+import pytest
+
+from src import derived
+
+BACKENDS = [False]
+if derived.np is not None:
+    BACKENDS.append(True)
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_dew_point(use_numpy):
+    """测试露点（20°C, 50% 约为 9.3°C）"""
+    result = derived.to_list(derived.dew_point([20.0, 10.0], [50.0, 100.0], use_numpy))
+    assert result[0] == pytest.approx(9.26, abs=0.05)
+    assert result[1] == pytest.approx(10.0, abs=0.01)
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_heat_index(use_numpy):
+    """测试酷热指数（90°F, 70% 约为 106°F）与低温时的简化公式"""
+    result = derived.to_list(
+        derived.heat_index([32.22, 15.0], [70.0, 50.0], use_numpy)
+    )
+    assert result[0] == pytest.approx(41.0, abs=0.5)
+    assert result[1] == pytest.approx(14.3, abs=0.5)
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_wind_chill(use_numpy):
+    """测试风寒温度（-10°C, 20 km/h 约为 -17.9°C），不适用时返回气温"""
+    result = derived.to_list(
+        derived.wind_chill([-10.0, 20.0, 5.0], [20.0, 30.0, 2.0], use_numpy)
+    )
+    assert result[0] == pytest.approx(-17.9, abs=0.1)
+    assert result[1] == 20.0
+    assert result[2] == 5.0
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_missing_values(use_numpy):
+    """测试缺失输入和 0% 湿度得到 None"""
+    result = derived.to_list(
+        derived.dew_point([None, 20.0, 20.0], [50.0, 0.0, None], use_numpy)
+    )
+    assert result == [None, None, None]
+
+
+def test_compute_derived_only_available_inputs():
+    """测试只计算输入齐全的指标"""
+    result = derived.compute_derived({"temperature": [5.0], "wind_speed": [20.0]})
+    assert list(result) == ["wind_chill"]
+
+
+@pytest.mark.skipif(derived.np is None, reason="需要 numpy")
+def test_backends_agree():
+    """测试 numpy 与 array 实现结果一致"""
+    temps = [t / 2 for t in range(-60, 90)]
+    columns = {
+        "temperature": temps,
+        "humidity": [(i * 7) % 101 for i in range(len(temps))],
+        "wind_speed": [(i * 3) % 60 for i in range(len(temps))],
+    }
+    fast = derived.compute_derived(columns, use_numpy=True)
+    slow = derived.compute_derived(columns, use_numpy=False)
+    assert list(fast) == list(slow)
+    for name in fast:
+        for a, b in zip(fast[name].tolist(), slow[name].tolist()):
+            assert (math.isnan(a) and math.isnan(b)) or a == pytest.approx(b)
@@ -1,5 +1,8 @@
 import pytest
-from src.formatter import format_text_current, format_json
+from src.formatter import (
+    format_text_current, format_json, format_text_stats, format_text_models,
+    format_text_alerts,
+)
 
 def test_format_text_current():
     """测试当前天气文本格式"""
@@ -17,4 +20,60 @@ def test_format_json():
         {"temperature": 25, "weather_code": 0}
     )
     assert '"city": "Beijing"' in result
-    assert '"temperature": 25' in result
\ No newline at end of file
+    assert '"temperature": 25' in result
+
+
+def test_format_text_stats():
+    """测试统计表格输出"""
+    from src.stats import forecast_stats
+    result = format_text_stats(forecast_stats(
+        {"Beijing": [{"max_temp": 10, "min_temp": 0, "weather_code": 61}]},
+        window=1,
+    ))
+    assert "Beijing" in result
+    assert "p50" in result
+
+def test_format_derived_fields():
+    """测试额外变量和派生指标的输出"""
+    current = {
+        "temperature": 20, "weather_code": 0,
+        "humidity": 50, "dew_point": 9.26,
+    }
+    text = format_text_current("Beijing", "China", 39.9, 116.4, current)
+    assert "湿度: 50%" in text
+    assert "露点: 9.26°C" in text
+    assert "风速" not in text
+
+    result = format_json("Beijing", "China", 39.9, 116.4, current)
+    assert '"dew_point": 9.26' in result
+
+def test_format_text_models():
+    """测试多模型对比表格"""
+    comparison = {
+        "models": ["ecmwf", "gfs"],
+        "days": [{
+            "date": "2026-03-01",
+            "models": {
+                "ecmwf": {"max_temp": 10.0, "min_temp": 0.0, "weather_code": 0, "weather": "晴朗"},
+                "gfs": None,
+            },
+            "max_temp_spread": None,
+            "min_temp_spread": None,
+            "consensus": "晴朗",
+            "agreement": 1.0,
+        }],
+    }
+    result = format_text_models({"Beijing": comparison})
+    assert "Beijing 多模型预报对比" in result
+    assert "0.0~10.0°C 晴朗" in result
+    assert "100%" in result
+
+def test_format_text_alerts():
+    """测试告警表格"""
+    assert "未触发任何告警" in format_text_alerts([])
+    result = format_text_alerts([{
+        "location": "Beijing", "rule": "frost", "date": "2026-03-01",
+        "max_temp": 5.0, "min_temp": -3.0, "weather_code": 71, "weather": "小雪",
+    }])
+    assert "触发 1 条告警" in result
+    assert "frost" in result
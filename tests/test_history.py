@@ -0,0 +1,181 @@
+"""
+历史数据导出测试
+"""
+
+import csv
+from datetime import date
+
+import pytest
+
+from src import history
+
+
+def fake_coordinates(city):
+    return {"latitude": 1.0, "longitude": 2.0, "country": "X", "name": city}
+
+
+def fake_archive(lat, lon, start, end, variables, resolution="daily"):
+    days = (date.fromisoformat(end) - date.fromisoformat(start)).days + 1
+    times = [
+        date.fromordinal(date.fromisoformat(start).toordinal() + i).isoformat()
+        for i in range(days)
+    ]
+    columns = {"time": times}
+    for name in variables:
+        columns[name] = [float(i) for i in range(days)]
+    return columns
+
+
+def test_split_date_range():
+    """测试日期范围切分"""
+    chunks = history.split_date_range(date(2024, 1, 1), date(2024, 1, 10), 4)
+    assert chunks == [
+        (date(2024, 1, 1), date(2024, 1, 4)),
+        (date(2024, 1, 5), date(2024, 1, 8)),
+        (date(2024, 1, 9), date(2024, 1, 10)),
+    ]
+
+
+def test_split_date_range_invalid():
+    """测试结束日期早于开始日期"""
+    with pytest.raises(ValueError):
+        history.split_date_range(date(2024, 2, 1), date(2024, 1, 1), 30)
+
+
+def test_read_city_file(tmp_path):
+    """测试读取城市列表文件"""
+    path = tmp_path / "cities.txt"
+    path.write_text("# 注释\nBeijing\n\nNew York\n", encoding="utf-8")
+    assert history.read_city_file(path) == ["Beijing", "New York"]
+
+
+def test_export_csv(tmp_path, monkeypatch):
+    """测试导出 CSV"""
+    monkeypatch.setattr(history, "get_coordinates", fake_coordinates)
+    monkeypatch.setattr(history, "get_archive", fake_archive)
+    output = tmp_path / "out.csv"
+
+    stats = history.export_history(
+        ["Beijing", "Tokyo"], date(2024, 1, 1), date(2024, 1, 10),
+        output, chunk_days=5, workers=2,
+    )
+
+    assert stats["downloaded"] == 4
+    assert stats["rows"] == 20
+    with output.open(encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0][:4] == ["city", "latitude", "longitude", "time"]
+    assert len(rows) == 21
+
+
+def test_export_resumes_from_checkpoint(tmp_path, monkeypatch):
+    """测试中断后续传不重复下载"""
+    monkeypatch.setattr(history, "get_coordinates", fake_coordinates)
+    calls = []
+    failing = {"2024-01-06"}
+
+    def flaky_archive(lat, lon, start, end, variables, resolution="daily"):
+        calls.append(start)
+        if start in failing:
+            raise ValueError("网络请求失败")
+        return fake_archive(lat, lon, start, end, variables, resolution)
+
+    monkeypatch.setattr(history, "get_archive", flaky_archive)
+    output = tmp_path / "out.csv"
+
+    first = history.export_history(
+        ["Beijing"], date(2024, 1, 1), date(2024, 1, 10),
+        output, chunk_days=5, workers=1,
+    )
+    assert first["failed"] == 1
+
+    calls.clear()
+    failing.clear()
+    second = history.export_history(
+        ["Beijing"], date(2024, 1, 1), date(2024, 1, 10),
+        output, chunk_days=5, workers=1,
+    )
+    assert second == {
+        "chunks": 2, "skipped": 1, "downloaded": 1, "failed": 0, "rows": 5,
+    }
+    assert calls == ["2024-01-06"]
+    with output.open(encoding="utf-8") as f:
+        assert len(list(csv.reader(f))) == 11
+
+
+def test_npz_requires_numpy(tmp_path, monkeypatch):
+    """测试未安装 numpy 时 npz 格式报错"""
+    monkeypatch.setattr(history, "np", None)
+    with pytest.raises(ValueError):
+        history.NpzHistoryWriter(tmp_path, ["temperature_2m"])
+
+
+def test_resume_discards_partial_chunk(tmp_path, monkeypatch):
+    """测试写入后、记录断点前中断时，续传不会产生重复或残缺的行"""
+    monkeypatch.setattr(history, "get_coordinates", fake_coordinates)
+    monkeypatch.setattr(history, "get_archive", fake_archive)
+    output = tmp_path / "out.csv"
+    args = (["Beijing"], date(2024, 1, 1), date(2024, 1, 10), output)
+
+    history.export_history(*args, chunk_days=5, workers=1)
+    log = tmp_path / "out.csv.checkpoint"
+    lines = log.read_text(encoding="utf-8").splitlines(keepends=True)
+    assert len(lines) == 2
+
+    # 模拟: 第二块已写入 CSV（末尾还有半行），但断点只记录了第一块，且日志末行残缺
+    with output.open("a", encoding="utf-8") as f:
+        f.write("Beijing,1.0,2.0,2024-01-")
+    log.write_text(lines[0] + lines[1][:5], encoding="utf-8")
+
+    stats = history.export_history(*args, chunk_days=5, workers=1)
+    assert stats["skipped"] == 1
+    assert stats["downloaded"] == 1
+    with output.open(encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert len(rows) == 11
+    assert [r[3] for r in rows[1:]] == [f"2024-01-{d:02d}" for d in range(1, 11)]
+    assert len(log.read_text(encoding="utf-8").splitlines()) == 2
+
+
+@pytest.mark.parametrize("damage", ["delete", "shorten"])
+def test_resume_restarts_when_output_is_damaged(tmp_path, monkeypatch, damage):
+    """测试输出文件被删除或截短时丢弃断点重新导出，而不是用 NUL 填充"""
+    monkeypatch.setattr(history, "get_coordinates", fake_coordinates)
+    monkeypatch.setattr(history, "get_archive", fake_archive)
+    output = tmp_path / "out.csv"
+    args = (["Beijing"], date(2024, 1, 1), date(2024, 1, 10), output)
+
+    history.export_history(*args, chunk_days=5, workers=1)
+    if damage == "delete":
+        output.unlink()
+    else:
+        output.write_bytes(output.read_bytes()[:20])
+
+    stats = history.export_history(*args, chunk_days=5, workers=1)
+    assert stats["skipped"] == 0
+    assert stats["downloaded"] == 2
+    data = output.read_text(encoding="utf-8")
+    assert "\0" not in data
+    rows = list(csv.reader(data.splitlines()))
+    assert rows[0][:4] == ["city", "latitude", "longitude", "time"]
+    assert len(rows) == 11
+
+
+def test_resume_restarts_when_parameters_change(tmp_path, monkeypatch):
+    """测试导出参数变化时断点作废，输出与新参数的表头一致"""
+    monkeypatch.setattr(history, "get_coordinates", fake_coordinates)
+    monkeypatch.setattr(history, "get_archive", fake_archive)
+    output = tmp_path / "out.csv"
+    args = (["Beijing"], date(2024, 1, 1), date(2024, 1, 10), output)
+
+    history.export_history(*args, chunk_days=5, workers=1)
+    stats = history.export_history(
+        *args, chunk_days=5, workers=1, variables=["precipitation_sum"],
+    )
+    assert stats["skipped"] == 0
+    assert stats["downloaded"] == 2
+    with output.open(encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["city", "latitude", "longitude", "time", "precipitation_sum"]
+    assert len(rows) == 11
+    assert all(len(row) == 5 for row in rows)
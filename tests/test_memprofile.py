@@ -0,0 +1,99 @@
+"""
+内存分析测试
+
+使用录制的 API 响应和假的传输层，断言 weather.py / formatter.py
+热点路径的分配预算。
+"""
+
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+import memprofile  # 与 weather 共享同一个模块对象（参见 conftest.py）
+from src import formatter, weather
+
+FIXTURE_TEXT = (
+    Path(__file__).parent / "fixtures" / "forecast_16d.json"
+).read_text(encoding="utf-8")
+
+
+@pytest.fixture
+def client(fake_transport):
+    """每次请求重新解码录制响应的客户端"""
+    return weather.WeatherClient(
+        transport=fake_transport({weather.FORECAST_URL: lambda: json.loads(FIXTURE_TEXT)}),
+        settings={"rate_limit_per_minute": 0, "breaker_failure_threshold": 0},
+    )
+
+
+def test_profiler_reports_phases(client):
+    """测试按阶段统计 fetch / parse / format"""
+    with memprofile.MemoryProfiler(top=3) as profiler:
+        forecasts = client.get_forecast(39.9, 116.4, days=16)
+        with memprofile.profile_phase("format"):
+            formatter.format_json("Beijing", "China", 39.9, 116.4,
+                                  {"temperature": 5, "weather_code": 0}, forecasts)
+
+    report = profiler.report()
+    assert list(report["phases"]) == ["fetch", "parse", "format"]
+    parse = report["phases"]["parse"]
+    assert parse["calls"] == 1
+    assert parse["peak"] > 0
+    assert len(parse["top"]) <= 3
+    assert report["peak"] >= parse["peak"]
+    assert memprofile._active is None
+
+
+def test_phases_from_worker_threads(client):
+    """测试工作线程中的阶段同样计入报告"""
+    with memprofile.MemoryProfiler() as profiler:
+        threads = [
+            threading.Thread(target=client.get_forecast, args=(39.9, 116.4, 16))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    phases = profiler.report()["phases"]
+    assert phases["fetch"]["calls"] == 4
+    assert phases["parse"]["calls"] == 4
+    assert phases["parse"]["peak"] > 0
+    assert profiler._open == {}
+
+
+def test_phase_is_noop_without_profiler():
+    """测试未启用分析器时 profile_phase 不做任何事"""
+    with memprofile.profile_phase("parse"):
+        pass
+    assert memprofile._active is None
+
+
+def test_nested_profilers_rejected():
+    """测试同时只能运行一个分析器"""
+    with memprofile.MemoryProfiler():
+        with pytest.raises(RuntimeError):
+            memprofile.MemoryProfiler().start()
+
+
+def test_get_forecast_allocation_budget(client):
+    """测试解析 16 天预报的分配预算"""
+    client.get_forecast(39.9, 116.4, days=16)  # 预热导入和缓存
+    with memprofile.track_allocations() as stats:
+        forecasts = client.get_forecast(39.9, 116.4, days=16)
+    assert len(forecasts) == 16
+    assert stats.peak < 64 * 1024
+
+
+def test_format_json_allocation_budget(client):
+    """测试 16 天预报 JSON 格式化的分配预算"""
+    forecasts = client.get_forecast(39.9, 116.4, days=16)
+    current = {"temperature": 5, "weather_code": 0, "time": "2026-03-01T12:00"}
+    formatter.format_json("Beijing", "China", 39.9, 116.4, current, forecasts)
+    with memprofile.track_allocations() as stats:
+        formatter.format_json("Beijing", "China", 39.9, 116.4, current, forecasts)
+    assert stats.peak < 64 * 1024
+    assert stats.allocated < 16 * 1024
@@ -0,0 +1,81 @@
+"""
+本地观测记录测试
+"""
+
+from datetime import datetime, timezone
+
+import pytest
+
+from src import observations
+
+
+def ts(text):
+    return observations.parse_time(text)
+
+
+@pytest.fixture
+def log(tmp_path):
+    return observations.ObservationLog(tmp_path / "39.90_116.40.bin")
+
+
+def test_append_and_query(log):
+    """测试追加与时间范围查询"""
+    for hour, temp in [(0, 1.5), (1, 2.0), (2, 3.25), (3, None)]:
+        assert log.append(ts(f"2026-03-01T{hour:02d}:00"), temp, 0)
+
+    result = log.query(ts("2026-03-01T01:00"), ts("2026-03-01T02:00"))
+    assert [(r["time"], r["temperature"]) for r in result] == [
+        ("2026-03-01T01:00", 2.0),
+        ("2026-03-01T02:00", 3.25),
+    ]
+    assert log.query(ts("2026-03-01T03:00"))[0]["temperature"] is None
+    assert log.query(ts("2026-03-02T00:00")) == []
+    assert log.path.stat().st_size == 4 * observations.RECORD.size
+
+
+def test_duplicate_is_skipped(log):
+    """测试相同时间的重复观测被忽略"""
+    assert log.append(ts("2026-03-01T00:00"), 1.0, 0)
+    assert not log.append(ts("2026-03-01T00:00"), 1.0, 0)
+    assert log.count() == 1
+
+
+def test_out_of_order_rebuilds_index(log):
+    """测试乱序追加后查询结果仍按时间排序"""
+    for hour in (5, 1, 3):
+        log.append(ts(f"2026-03-01T{hour:02d}:00"), float(hour), 61)
+    result = log.query(ts("2026-03-01T00:00"))
+    assert [r["temperature"] for r in result] == [1.0, 3.0, 5.0]
+    assert result[0]["weather_code"] == 61
+
+
+def test_compact_retention(log):
+    """测试压缩: 排序、去重并删除过期记录"""
+    for day in (1, 3, 2, 1):
+        log.append(ts(f"2026-03-0{day}T00:00"), float(day), 0)
+    remaining = log.compact(retention_days=2, now=ts("2026-03-03T12:00"))
+    assert remaining == 2
+    assert [r["time"] for r in log.query(0)] == ["2026-03-02T00:00", "2026-03-03T00:00"]
+
+
+def test_record_observation(tmp_path):
+    """测试记录 get_weather() 结果"""
+    weather = {"temperature": 20.0, "weather_code": 3, "time": "2026-03-01T12:00"}
+    assert observations.record_observation(39.9, 116.4, weather, directory=tmp_path)
+    assert (tmp_path / "39.90_116.40.bin").exists()
+
+    result = observations.query_observations(39.9, 116.4, 0, directory=tmp_path)
+    assert result[0]["weather_code"] == 3
+
+    with pytest.raises(ValueError, match="time"):
+        observations.record_observation(39.9, 116.4, {}, directory=tmp_path)
+
+
+def test_parse_since():
+    """测试相对时间和绝对时间"""
+    now = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    assert observations.parse_since("6h", now) == ts("2026-03-01T18:00")
+    assert observations.parse_since("1d", now) == ts("2026-03-01T00:00")
+    assert observations.parse_since("2026-03-01") == ts("2026-03-01T00:00")
+    with pytest.raises(ValueError, match="无效的时间"):
+        observations.parse_since("yesterday")
@@ -0,0 +1,190 @@
+"""
+流式批量查询测试
+"""
+
+import csv
+import json
+import threading
+
+import pytest
+
+from src import pipeline
+
+
+def fake_fetch(calls):
+    def fetch(lat, lon):
+        calls.append((lat, lon))
+        return {"temperature": lat, "weather_code": 0, "time": "2026-03-01T12:00"}
+    return fetch
+
+
+def write_csv(path, rows):
+    with path.open("w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "lat", "lon"])
+        writer.writerows(rows)
+
+
+def read_output(path):
+    with path.open(encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_iter_locations_jsonl(tmp_path):
+    """测试读取 JSON Lines 输入"""
+    path = tmp_path / "in.jsonl"
+    path.write_text(
+        '{"name": "a", "latitude": 1, "longitude": 2}\n\n{"lat": "x"}\n',
+        encoding="utf-8",
+    )
+    items = list(pipeline.iter_locations(path))
+    assert items[0]["id"] == "a"
+    assert items[0]["latitude"] == 1.0
+    assert items[1]["error"] == "无效坐标"
+
+
+def test_stream_preserves_order_and_dedupes(tmp_path):
+    """测试输出保持输入顺序，吸附后相同的坐标只查询一次"""
+    source = tmp_path / "in.csv"
+    rows = [[f"p{i}", 10 + (i % 5) * 0.001, 20] for i in range(200)]
+    write_csv(source, rows)
+    calls = []
+
+    stats = pipeline.stream_weather(
+        source, tmp_path / "out.csv", workers=4, snap=0.01,
+        queue_size=8, fetch=fake_fetch(calls),
+    )
+
+    output = read_output(tmp_path / "out.csv")
+    assert [r["id"] for r in output] == [f"p{i}" for i in range(200)]
+    assert stats["rows"] == 200
+    assert len(calls) == stats["fetched"] == 1
+    assert stats["deduped"] == 199
+
+
+def test_stream_resumes_from_checkpoint(tmp_path):
+    """测试断点续传时丢弃未记入断点的行并从断点继续"""
+    source = tmp_path / "in.csv"
+    write_csv(source, [[f"p{i}", i, 0] for i in range(10)])
+    output = tmp_path / "out.csv"
+    calls = []
+
+    pipeline.stream_weather(
+        source, output, workers=2, checkpoint_every=4, fetch=fake_fetch(calls),
+    )
+    checkpoint = tmp_path / "out.csv.checkpoint.json"
+    # 模拟在写出第 8 行之后、记录断点之前崩溃
+    state = json.loads(checkpoint.read_text(encoding="utf-8"))
+    lines = output.read_bytes().splitlines(keepends=True)
+    state["offset"] = 6
+    state["output_size"] = len(b"".join(lines[:7]))
+    checkpoint.write_text(json.dumps(state), encoding="utf-8")
+
+    calls.clear()
+    stats = pipeline.stream_weather(
+        source, output, workers=2, fetch=fake_fetch(calls),
+    )
+
+    assert stats["resumed_from"] == 6
+    assert stats["rows"] == 4
+    assert sorted(lat for lat, _ in calls) == [6, 7, 8, 9]
+    assert [r["id"] for r in read_output(output)] == [f"p{i}" for i in range(10)]
+
+
+def test_fetch_errors_are_reported(tmp_path):
+    """测试查询失败的行带有错误信息"""
+    source = tmp_path / "in.csv"
+    write_csv(source, [["a", 1, 1], ["b", "", 1]])
+
+    def failing(lat, lon):
+        raise ValueError("获取天气失败")
+
+    stats = pipeline.stream_weather(source, tmp_path / "out.csv", fetch=failing)
+    output = read_output(tmp_path / "out.csv")
+    assert stats["failed"] == 2
+    assert output[0]["error"] == "获取天气失败"
+    assert output[1]["error"] == "无效坐标"
+
+
+def test_reports_throughput(tmp_path):
+    """测试报告吞吐量和峰值内存"""
+    source = tmp_path / "in.csv"
+    write_csv(source, [["a", 1, 1]])
+    stats = pipeline.stream_weather(
+        source, tmp_path / "out.csv", fetch=fake_fetch([]),
+    )
+    assert stats["rows_per_sec"] > 0
+    if pipeline.resource is not None:
+        assert stats["peak_rss_mb"] > 0
+
+
+def test_fetch_errors_are_not_cached(tmp_path):
+    """测试查询失败不缓存，同一坐标的后续行会重新查询"""
+    source = tmp_path / "in.csv"
+    write_csv(source, [["a", 1, 1], ["b", 1, 1]])
+    calls = []
+
+    def flaky(lat, lon):
+        calls.append(lat)
+        if len(calls) == 1:
+            raise ValueError("获取天气失败")
+        return {"temperature": lat, "weather_code": 0, "time": "t"}
+
+    stats = pipeline.stream_weather(
+        source, tmp_path / "out.csv", workers=1, fetch=flaky,
+    )
+    output = read_output(tmp_path / "out.csv")
+    assert len(calls) == 2
+    assert stats["failed"] == 1
+    assert output[0]["error"] == "获取天气失败"
+    assert output[1]["error"] == ""
+
+
+def test_upstream_unavailable_stops_before_row(tmp_path):
+    """测试熔断时停止写出，断点停在熔断的行，续传时重新查询"""
+    source = tmp_path / "in.csv"
+    write_csv(source, [[f"p{i}", i, 0] for i in range(6)])
+    output = tmp_path / "out.csv"
+
+    def breaker_open(lat, lon):
+        if lat >= 3:
+            raise pipeline.UpstreamUnavailableError("forecast", 30)
+        return {"temperature": lat, "weather_code": 0, "time": "t"}
+
+    with pytest.raises(pipeline.UpstreamUnavailableError):
+        pipeline.stream_weather(source, output, workers=2, fetch=breaker_open)
+    assert [r["id"] for r in read_output(output)] == ["p0", "p1", "p2"]
+
+    calls = []
+    stats = pipeline.stream_weather(source, output, workers=2, fetch=fake_fetch(calls))
+    assert stats["resumed_from"] == 3
+    assert sorted(lat for lat, _ in calls) == [3, 4, 5]
+    assert [r["id"] for r in read_output(output)] == [f"p{i}" for i in range(6)]
+
+
+def test_in_flight_rows_are_bounded(tmp_path):
+    """测试某一行查询很慢时，读取阶段最多领先 queue_size 行"""
+    source = tmp_path / "in.csv"
+    write_csv(source, [[f"p{i}", i, 0] for i in range(200)])
+    release = threading.Event()
+    started = []
+    started_before_release = []
+
+    def slow_first(lat, lon):
+        started.append(lat)
+        if lat == 0:
+            assert release.wait(5)
+        return {"temperature": lat, "weather_code": 0, "time": "t"}
+
+    def unblock():
+        started_before_release.append(len(started))
+        release.set()
+
+    timer = threading.Timer(0.5, unblock)
+    timer.start()
+    stats = pipeline.stream_weather(
+        source, tmp_path / "out.csv", workers=4, queue_size=8, fetch=slow_first,
+    )
+    timer.join()
+    assert started_before_release[0] <= 8
+    assert stats["rows"] == 200
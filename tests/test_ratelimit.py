@@ -0,0 +1,79 @@
+"""
+限流模块测试
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src import weather
+from src.ratelimit import TokenBucket
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_burst_then_throttle(tmp_path):
+    """测试突发容量用完后开始等待"""
+    clock = FakeClock()
+    bucket = TokenBucket(
+        tmp_path / "rl.json", rate=2, capacity=3,
+        clock=clock.time, sleep=clock.sleep,
+    )
+    waits = [bucket.acquire() for _ in range(5)]
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] == pytest.approx(0.5)
+    assert waits[4] == pytest.approx(0.5)
+
+
+def test_state_shared_between_instances(tmp_path):
+    """测试不同实例（模拟不同进程）共享同一个桶"""
+    clock = FakeClock()
+    first = TokenBucket(tmp_path / "rl.json", rate=1, capacity=1, clock=clock.time)
+    second = TokenBucket(tmp_path / "rl.json", rate=1, capacity=1, clock=clock.time)
+    assert first.reserve() == 0
+    assert second.reserve() == pytest.approx(1.0)
+    assert first.reserve() == pytest.approx(2.0)
+
+
+def test_tokens_refill(tmp_path):
+    """测试令牌随时间补充"""
+    clock = FakeClock()
+    bucket = TokenBucket(tmp_path / "rl.json", rate=1, capacity=2, clock=clock.time)
+    bucket.reserve()
+    bucket.reserve()
+    clock.now += 10
+    assert bucket.reserve() == 0
+
+
+def test_invalid_rate(tmp_path):
+    """测试非法速率"""
+    with pytest.raises(ValueError):
+        TokenBucket(tmp_path / "rl.json", rate=0, capacity=1)
+
+
+def test_http_get_retries_on_429():
+    """测试收到 429 后等待并重试"""
+    throttled = MagicMock(status_code=429, headers={"Retry-After": "0.25"})
+    ok = MagicMock(status_code=200)
+    transport = MagicMock(side_effect=[throttled, ok])
+    sleep = MagicMock()
+    client = weather.WeatherClient(
+        transport=transport, settings={"rate_limit_per_minute": 0}, sleep=sleep,
+    )
+
+    assert client._http_get("https://example.invalid") is ok
+    assert transport.call_count == 2
+    sleep.assert_called_once_with(0.25)
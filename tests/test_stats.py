@@ -0,0 +1,148 @@
+"""
+预报统计测试
+"""
+
+import json
+
+import pytest
+
+from src import formatter, stats
+
+FORECASTS = {
+    "Beijing": [
+        {"date": "2026-03-01", "max_temp": 10.0, "min_temp": 0.0, "weather_code": 0},
+        {"date": "2026-03-02", "max_temp": 14.0, "min_temp": 4.0, "weather_code": 61},
+        {"date": "2026-03-03", "max_temp": 20.0, "min_temp": 10.0, "weather_code": 3},
+        {"date": "2026-03-04", "max_temp": 30.0, "min_temp": 20.0, "weather_code": 95},
+    ],
+    "Tokyo": [
+        {"date": "2026-03-01", "max_temp": 16.0, "min_temp": 8.0, "weather_code": 80},
+        {"date": "2026-03-02", "max_temp": 18.0, "min_temp": 10.0, "weather_code": 2},
+    ],
+}
+
+BACKENDS = [False]
+if stats.np is not None:
+    BACKENDS.append(True)
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_forecast_stats(use_numpy):
+    """测试基本统计量"""
+    result = stats.forecast_stats(FORECASTS, use_numpy=use_numpy)
+    beijing, tokyo = result["locations"]
+
+    # 日均温: 5, 9, 15, 25
+    assert beijing["days"] == 4
+    assert beijing["mean_temp"] == pytest.approx(13.5)
+    assert beijing["max_temp"] == 30.0
+    assert beijing["min_temp"] == 0.0
+    assert beijing["percentiles"]["p50"] == pytest.approx(12.0)
+    assert beijing["rainy_days"] == 2
+    assert beijing["hdd"] == pytest.approx(13 + 9 + 3)
+    assert beijing["cdd"] == pytest.approx(7)
+    assert beijing["rolling_mean"] == pytest.approx([29 / 3, 49 / 3])
+
+    assert tokyo["days"] == 2
+    assert tokyo["rainy_days"] == 1
+    assert tokyo["rolling_mean"] == []
+
+
+@pytest.mark.skipif(stats.np is None, reason="需要 numpy")
+def test_numpy_matches_python():
+    """测试 numpy 与纯 Python 实现结果一致"""
+    fast = stats.forecast_stats(FORECASTS, window=2, use_numpy=True)
+    slow = stats.forecast_stats(FORECASTS, window=2, use_numpy=False)
+    for a, b in zip(fast["locations"], slow["locations"]):
+        for key in ("mean_temp", "max_temp", "min_temp", "hdd", "cdd"):
+            assert a[key] == pytest.approx(b[key])
+        assert a["percentiles"] == pytest.approx(b["percentiles"])
+        assert a["rolling_mean"] == pytest.approx(b["rolling_mean"])
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_empty_location(use_numpy):
+    """测试没有预报数据的城市（包括所有城市都没有数据）"""
+    result = stats.forecast_stats({"Nowhere": []}, use_numpy=use_numpy)
+    location = result["locations"][0]
+    assert location["mean_temp"] is None
+    assert location["percentiles"]["p50"] is None
+    assert location["hdd"] == 0
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_missing_values(use_numpy):
+    """测试缺失温度的日期不参与统计，跨过它的滑动窗口为 None，JSON 中没有 NaN"""
+    beijing = list(FORECASTS["Beijing"])
+    beijing.insert(2, {
+        "date": "2026-03-03", "max_temp": 12.0, "min_temp": None, "weather_code": 61,
+    })
+    forecasts = {
+        "Beijing": beijing,
+        "Nowhere": [
+            {"date": "2026-03-01", "max_temp": None, "min_temp": None, "weather_code": None},
+        ],
+    }
+    result = stats.forecast_stats(forecasts, window=2, use_numpy=use_numpy)
+    expected = stats.forecast_stats(
+        {"Beijing": FORECASTS["Beijing"], "Nowhere": []}, window=2, use_numpy=False
+    )
+    for a, b in zip(result["locations"], expected["locations"]):
+        for key in ("days", "mean_temp", "max_temp", "min_temp", "rainy_days"):
+            assert a[key] == pytest.approx(b[key])
+        assert a["percentiles"] == pytest.approx(b["percentiles"])
+
+    # 日均温: 5, 9, (缺失), 15, 25 —— 不把 9 和 15 当作相邻的两天
+    location = result["locations"][0]
+    assert location["rolling_mean"] == pytest.approx([7.0, None, None, 20.0])
+    assert result["locations"][1]["rolling_mean"] == []
+
+    text = formatter.format_stats_json(result)
+    assert "NaN" not in text
+    assert json.loads(text)["locations"][1]["mean_temp"] is None
+    output = formatter.format_text_stats(result)
+    assert "Nowhere" in output
+    assert "7.0, -, -, 20.0" in output
+
+
+HOURLY = {
+    "Beijing": {
+        "time": [f"2026-03-01T{h:02d}:00" for h in range(6)],
+        "temperature": [10.0, 12.0, None, 16.0, 20.0, 22.0],
+        "precipitation": [0.0, 0.4, 1.2, 0.0, None, 0.0],
+    },
+    "Tokyo": {
+        "time": ["2026-03-01T00:00", "2026-03-01T01:00"],
+        "temperature": [6.0, 18.0],
+    },
+}
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_hourly_stats(use_numpy):
+    """测试逐小时预报统计"""
+    result = stats.hourly_stats(HOURLY, window=2, use_numpy=use_numpy)
+    assert result["resolution"] == "hourly"
+    beijing, tokyo = result["locations"]
+
+    assert beijing["hours"] == 5
+    assert beijing["mean_temp"] == pytest.approx(16.0)
+    assert beijing["max_temp"] == 22.0
+    assert beijing["min_temp"] == 10.0
+    assert beijing["rainy_hours"] == 2
+    # 度日数按小时累计后除以 24
+    assert beijing["hdd"] == pytest.approx((8 + 6 + 2) / 24)
+    assert beijing["cdd"] == pytest.approx((2 + 4) / 24)
+    assert beijing["rolling_mean"] == pytest.approx([11.0, None, None, 18.0, 21.0])
+
+    assert tokyo["hours"] == 2
+    assert tokyo["rainy_hours"] is None
+    output = formatter.format_text_stats(result)
+    assert "降水小时" in output
+    assert "Tokyo" in output
+
+
+def test_invalid_window():
+    """测试非法窗口大小"""
+    with pytest.raises(ValueError):
+        stats.forecast_stats(FORECASTS, window=0)
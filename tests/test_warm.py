@@ -0,0 +1,130 @@
+"""
+缓存与预热测试
+"""
+
+import random
+
+import pytest
+
+import cache  # 与 warm 共享同一个模块对象（参见 conftest.py）
+from src import warm
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """将缓存重定向到临时目录，并替换 API 调用"""
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path)
+    calls = []
+    monkeypatch.setattr(
+        cache, "get_coordinates",
+        lambda city: calls.append(("geo", city)) or {
+            "latitude": float(len(city)), "longitude": 1.0,
+            "country": "X", "name": city,
+        },
+    )
+    monkeypatch.setattr(
+        cache, "get_weather",
+        lambda lat, lon, variables=None: calls.append(("current", lat)) or {
+            "temperature": 20, "weather_code": 0, "time": "t",
+        },
+    )
+    monkeypatch.setattr(
+        cache, "get_forecast",
+        lambda lat, lon, days=3: calls.append(("forecast", lat)) or [],
+    )
+    return calls
+
+
+class TestCache:
+    """测试本地缓存"""
+
+    def test_hit_within_ttl(self, cache_dir):
+        """测试有效期内命中缓存"""
+        cache.cached_weather(1.0, 2.0, ttl=60)
+        cache.cached_weather(1.0, 2.0, ttl=60)
+        assert cache_dir == [("current", 1.0)]
+
+    def test_zero_ttl_disables_cache(self, cache_dir, tmp_path):
+        """测试 ttl 为 0 时不使用缓存，也不写入缓存文件"""
+        cache.cached_weather(1.0, 2.0, ttl=0)
+        cache.cached_weather(1.0, 2.0, ttl=0)
+        cache.cached_forecast(1.0, 2.0, ttl=0)
+        assert len(cache_dir) == 3
+        assert list(tmp_path.rglob("*.json")) == []
+
+    def test_coordinates_never_expire(self, cache_dir):
+        """测试坐标缓存不过期，城市名不区分大小写"""
+        cache.cached_coordinates("Beijing")
+        cache.cached_coordinates("beijing ")
+        assert cache_dir == [("geo", "Beijing")]
+
+    def test_prune_old_entries(self, cache_dir):
+        """测试清理过期的当前天气和预报条目，坐标保留"""
+        cache.cached_coordinates("Beijing")
+        cache.cached_weather(1.0, 2.0, ttl=60)
+        cache.cached_forecast(1.0, 2.0, ttl=60)
+        cache.cached_weather(3.0, 4.0, ttl=60, variables=["humidity"])
+        assert cache.prune_cache(100) == 0
+
+        now = cache.read_cache_entry("current", cache.location_key(1.0, 2.0))["fetched_at"]
+        assert cache.prune_cache(100, now=now + 101) == 3
+        assert cache.read_cache_entry("current", cache.location_key(1.0, 2.0)) is None
+        assert cache.read_cache_entry("geocode", "beijing") is not None
+
+
+class TestWarm:
+    """测试预热调度"""
+
+    def test_requests_are_spread(self, cache_dir):
+        """测试冷启动时请求按最小间隔分散"""
+        clock = FakeClock()
+        stats = warm.warm_watchlist(
+            ["Paris", "Tokyo", "Rome"], ttl=600, min_gap=2.0, jitter=0.0,
+            once=True, clock=clock.time, sleep=clock.sleep,
+        )
+        assert stats == {"locations": 3, "refreshed": 3, "failed": 0, "pruned": 0}
+        assert clock.sleeps == [2.0, 2.0]
+
+    def test_refresh_ahead_of_expiry(self, cache_dir):
+        """测试在缓存过期之前刷新"""
+        clock = FakeClock()
+        warm.warm_watchlist(
+            ["Paris"], ttl=600, lead=0.2, jitter=0.1, max_refreshes=3,
+            clock=clock.time, sleep=clock.sleep, rng=random.Random(1),
+        )
+        assert len(clock.sleeps) == 2
+        for seconds in clock.sleeps:
+            assert 600 * 0.8 * 0.9 <= seconds <= 600 * 0.8
+
+    def test_once_skips_fresh_entries(self, cache_dir):
+        """测试 once 模式跳过仍然新鲜的城市"""
+        cache.cached_weather(5.0, 1.0, ttl=600)
+        cache_dir.clear()
+        clock = FakeClock(now=cache.time.time())
+        stats = warm.warm_watchlist(
+            ["Paris", "Rome"], ttl=600, once=True,
+            clock=clock.time, sleep=clock.sleep,
+        )
+        assert stats["refreshed"] == 1
+        assert ("current", 4.0) in cache_dir
+        assert ("current", 5.0) not in cache_dir
+
+    def test_requires_positive_ttl(self, cache_dir):
+        """测试 ttl 为 0 时无法预热"""
+        with pytest.raises(ValueError):
+            warm.warm_watchlist(["Paris"], ttl=0)